@@ -2,19 +2,31 @@
 
 from __future__ import annotations
 
+import threading
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Optional, Sequence
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 import pyperclip  # re-exported for backwards compatibility
+import requests
+from youtube_transcript_api import YouTubeTranscriptApi
 
-from .domain import TranscriptService, VideoID, VideoTranscriptBundle, extract_video_id
-from .domain.entities import TranscriptLine, VideoMetadata
+from .domain import CACHE_FIRST, TranscriptService, VideoID, VideoTranscriptBundle, extract_video_id
+from .domain.entities import TranscriptLine, TranscriptTrack, VideoMetadata
 from .infrastructure import (
     CachedYouTubeTranscriptRepository,
     ConfigRepository,
+    FileKeyLocks,
     PyperclipClipboardGateway,
     YouTubeMetadataGateway,
 )
+from .infrastructure.cache_eviction import EVICTION_FILE_NAME, EvictionSchedule
+from .infrastructure.cache_stats import STATS_FILE_NAME, CacheStatsRecorder
+from .infrastructure.cache_tiers import create_cache_hierarchy
+from .infrastructure.page_archive import ARCHIVE_OFF, WatchPageArchive
+from .infrastructure.revalidation import spawn_revalidation
+from .infrastructure.transcript_repository import LOCK_DIR_NAME
 from .main import main
 from .version import get_version
 
@@ -31,6 +43,7 @@ __all__ = [
     "get_transcript",
     "get_video_metadata",
     "get_video_bundle",
+    "get_transcript_tracks",
     "copy_to_clipboard",
     "__version__",
 ]
@@ -60,41 +73,123 @@ def save_config(config: dict) -> None:
     _config_repository().save(config)
 
 
-def get_transcript(video_id: str, preferred_languages: Optional[Sequence[str]] = None) -> Optional[list[TranscriptLine]]:
-    languages = list(preferred_languages or [])
-    repository = CachedYouTubeTranscriptRepository(
-        _config_repository().cache_dir,
-        YouTubeMetadataGateway(),
+# The API functions share one repository per process. It is rebuilt only
+# when the config file changes, so the in-memory cache tier and the HTTP
+# sessions survive across calls.
+_shared_repository_lock = threading.Lock()
+_shared_repository: Optional[Tuple[tuple, CachedYouTubeTranscriptRepository]] = None
+
+
+@lru_cache(maxsize=1)
+def _metadata_gateway() -> YouTubeMetadataGateway:
+    return YouTubeMetadataGateway(session=requests.Session())
+
+
+@lru_cache(maxsize=1)
+def _transcript_api() -> YouTubeTranscriptApi:
+    return YouTubeTranscriptApi(http_client=requests.Session())
+
+
+@lru_cache(maxsize=1)
+def _cache_server_session() -> requests.Session:
+    return requests.Session()
+
+
+@lru_cache(maxsize=None)
+def _cache_stats(path: Path) -> CacheStatsRecorder:
+    return CacheStatsRecorder(path)
+
+
+def _config_signature(config_file: Path) -> tuple:
+    try:
+        stat = config_file.stat()
+    except OSError:
+        return (str(config_file), None, None)
+    return (str(config_file), stat.st_mtime_ns, stat.st_size)
+
+
+def _build_transcript_repository(config_repository: ConfigRepository) -> CachedYouTubeTranscriptRepository:
+    cache_store = create_cache_hierarchy(
+        config_repository.get_cache_backend(),
+        config_repository.cache_dir,
+        memory_entries=config_repository.get_memory_cache_entries(),
+        memory_bytes=config_repository.get_memory_cache_size(),
+        shared_dir=config_repository.get_shared_cache_dir(),
+        remote_url=config_repository.get_cache_server_url(),
+        session=_cache_server_session(),
     )
+    metadata_gateway = _metadata_gateway()
+    page_archive = config_repository.get_page_archive()
+    if page_archive != ARCHIVE_OFF:
+        metadata_gateway = replace(metadata_gateway, archive=WatchPageArchive(cache_store, page_archive))
+    return CachedYouTubeTranscriptRepository(
+        cache_store,
+        metadata_gateway,
+        max_cache_bytes=config_repository.get_cache_max_size(),
+        max_cache_age=config_repository.get_cache_max_age(),
+        transcript_ttl=config_repository.get_transcript_ttl(),
+        metadata_ttl=config_repository.get_metadata_ttl(),
+        negative_ttl=config_repository.get_negative_ttl(),
+        transcript_api=_transcript_api(),
+        locks=FileKeyLocks(config_repository.cache_dir / LOCK_DIR_NAME),
+        stats=_cache_stats(config_repository.cache_dir / STATS_FILE_NAME),
+        revalidate=spawn_revalidation,
+        history_versions=config_repository.get_history_versions(),
+        eviction=EvictionSchedule(
+            max_bytes=config_repository.get_cache_max_size(),
+            max_age=config_repository.get_cache_max_age(),
+            path=config_repository.cache_dir / EVICTION_FILE_NAME,
+        ),
+    )
+
+
+def _transcript_repository() -> CachedYouTubeTranscriptRepository:
+    global _shared_repository
+    config_repository = _config_repository()
+    signature = _config_signature(config_repository.config_file)
+    with _shared_repository_lock:
+        if _shared_repository is None or _shared_repository[0] != signature:
+            previous = _shared_repository
+            _shared_repository = (signature, _build_transcript_repository(config_repository))
+            if previous is not None:
+                previous[1].close()
+        return _shared_repository[1]
+
+
+def get_transcript(
+    video_id: str, preferred_languages: Optional[Sequence[str]] = None, *, policy: str = CACHE_FIRST
+) -> Optional[Sequence[TranscriptLine]]:
+    languages = list(preferred_languages or [])
+    repository = _transcript_repository()
     service = TranscriptService(repository)
-    bundle = service.fetch(VideoID(video_id), languages)
-    if bundle:
+    bundle = service.fetch(VideoID(video_id), languages, policy=policy)
+    if bundle and not bundle.transcript_unavailable:
         return bundle.transcript
     return None
 
 
-def get_video_metadata(video_id: str) -> Optional[VideoMetadata]:
-    repository = CachedYouTubeTranscriptRepository(
-        _config_repository().cache_dir,
-        YouTubeMetadataGateway(),
-    )
+def get_video_metadata(video_id: str, *, policy: str = CACHE_FIRST) -> Optional[VideoMetadata]:
+    repository = _transcript_repository()
     service = TranscriptService(repository)
-    bundle = service.fetch(VideoID(video_id), [])
+    bundle = service.fetch(VideoID(video_id), [], policy=policy)
     if bundle:
         return bundle.metadata
     return None
 
 
 def get_video_bundle(
-    video_id: str, preferred_languages: Optional[Sequence[str]] = None
+    video_id: str, preferred_languages: Optional[Sequence[str]] = None, *, policy: str = CACHE_FIRST
 ) -> Optional[VideoTranscriptBundle]:
     languages = list(preferred_languages or [])
-    repository = CachedYouTubeTranscriptRepository(
-        _config_repository().cache_dir,
-        YouTubeMetadataGateway(),
-    )
+    repository = _transcript_repository()
+    service = TranscriptService(repository)
+    return service.fetch(VideoID(video_id), languages, policy=policy)
+
+
+def get_transcript_tracks(video_id: str, *, policy: str = CACHE_FIRST) -> Optional[List[TranscriptTrack]]:
+    repository = _transcript_repository()
     service = TranscriptService(repository)
-    return service.fetch(VideoID(video_id), languages)
+    return service.tracks(VideoID(video_id), policy=policy)
 
 
 def copy_to_clipboard(transcript: Iterable[TranscriptLine]) -> bool:
@@ -1,11 +1,13 @@
 """Application layer for ytt."""
 
+from .cache_service import CacheService
 from .cli import build_parser
 from .config_service import ConfigService
 from .fetch_service import FetchTranscriptUseCase
 
 __all__ = [
     "build_parser",
+    "CacheService",
     "ConfigService",
     "FetchTranscriptUseCase",
 ]
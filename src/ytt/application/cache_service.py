@@ -0,0 +1,788 @@
+"""Application service for cache maintenance."""
+
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Set, Tuple
+
+from ..domain import VideoID, extract_video_id
+from ..infrastructure.cache_eviction import PruneResult, prune_cache
+from ..infrastructure.cache_index import CacheIndex, IndexEntry
+from ..infrastructure.cache_lock import KeyLocks, NullKeyLocks
+from ..infrastructure.cache_migration import MigrationProgress, MigrationResult, migrate_cache
+from ..infrastructure.cache_stats import CacheStatsRecorder
+from ..infrastructure.cache_store import BLOB_NAMESPACE, CacheEntry, CacheRecord, CacheStore
+from ..infrastructure.cache_sync import (
+    ManifestEntry,
+    SyncResult,
+    build_manifest,
+    export_cache,
+    import_cache,
+    read_manifest,
+)
+from ..infrastructure.cache_tiers import local_cache_store
+from ..infrastructure.cache_verify import CorruptEntry, VerifyProgress, VerifyResult, verify_cache
+from ..infrastructure.metadata import extract_archived_metadata
+from ..infrastructure.page_archive import PAGE_NAME
+from ..infrastructure.rendered_cache import RenderedOutputCache
+from ..infrastructure.transcript_history import EntryHistory, is_history_name, load_history, record_version
+from ..infrastructure.transcript_repository import (
+    METADATA_NAME,
+    TRANSCRIPT_NAME_PREFIX,
+    TRACKS_NAME,
+    UNAVAILABLE_NAME,
+    UNKNOWN_LANGUAGE,
+    CachedYouTubeTranscriptRepository,
+    encode_metadata,
+    parse_transcript_name,
+)
+from .config_service import ConfigService
+
+_BARE_VIDEO_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+
+WARM_CACHED = "cached"
+WARM_FETCHED = "fetched"
+WARM_UNAVAILABLE = "unavailable"
+WARM_FAILED = "failed"
+
+REFRESH_UPDATED = "updated"
+REFRESH_UNCHANGED = "unchanged"
+REFRESH_FAILED = "failed"
+
+REEXTRACT_UPDATED = "updated"
+REEXTRACT_UNCHANGED = "unchanged"
+REEXTRACT_SUPERSEDED = "superseded"
+REEXTRACT_FAILED = "failed"
+
+CACHED = "cached"
+UNAVAILABLE = "unavailable"
+PARTIAL = "partial"
+MISSING = "missing"
+
+
+@dataclass(frozen=True)
+class WarmResult:
+    """Counts of the outcomes of a cache warm run."""
+
+    cached: int = 0
+    fetched: int = 0
+    unavailable: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.cached + self.fetched + self.unavailable + self.failed
+
+
+@dataclass(frozen=True)
+class RefreshResult:
+    """Counts of the aged entries handled by a cache refresh run.
+
+    ``unchanged`` entries were refetched with identical content, so only
+    their write time was updated. ``deferred`` entries were aged but left
+    for a later run by the limit on the number of videos.
+    """
+
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    deferred: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.updated + self.unchanged + self.failed
+
+
+@dataclass(frozen=True)
+class ReextractResult:
+    """Counts of the archived pages handled by a re-extraction run.
+
+    ``superseded`` pages are older than the video's metadata entry, which
+    is left alone; ``failed`` pages were unreadable or yielded no metadata.
+    """
+
+    updated: int = 0
+    unchanged: int = 0
+    superseded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.updated + self.unchanged + self.superseded + self.failed
+
+
+@dataclass(frozen=True)
+class CacheMembership:
+    """What the cache index holds for one video.
+
+    ``status`` is ``cached`` (fresh transcript in a preferred language and
+    fresh metadata), ``unavailable`` (fresh negative entry and metadata),
+    ``partial`` (some entries, but not enough to serve the video) or
+    ``missing``.
+    """
+
+    video_id: str
+    status: str
+    languages: Tuple[str, ...] = ()
+    stored_at: Optional[float] = None
+    bytes: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "video_id": self.video_id,
+            "status": self.status,
+            "languages": list(self.languages),
+            "stored_at": self.stored_at,
+            "bytes": self.bytes,
+        }
+
+
+# Upper bounds of the size histogram buckets; the last bucket is unbounded.
+SIZE_BUCKETS = (1024, 16 * 1024, 256 * 1024, 4 * 1024 * 1024)
+
+
+@dataclass(frozen=True)
+class CacheReport:
+    """Usage counters together with a snapshot of the stored entries."""
+
+    counters: Dict[str, float]
+    entries: int
+    bytes: int
+    entries_by_kind: Dict[str, int]
+    size_histogram: List[Tuple[Optional[int], int]]
+    oldest: Optional[CacheEntry]
+    newest: Optional[CacheEntry]
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return self.counters["hits"] / lookups if lookups else None
+
+    @property
+    def time_saved(self) -> float:
+        """Estimated seconds saved: average fetch time per hit minus time spent serving hits."""
+
+        if not self.counters["fetches"]:
+            return 0.0
+        average_fetch = self.counters["fetch_seconds"] / self.counters["fetches"]
+        return max(0.0, self.counters["hits"] * average_fetch - self.counters["hit_seconds"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "counters": dict(self.counters),
+            "hit_ratio": self.hit_ratio,
+            "time_saved_seconds": self.time_saved,
+            "entries": {
+                "count": self.entries,
+                "bytes": self.bytes,
+                "by_kind": dict(self.entries_by_kind),
+                "size_histogram": [
+                    {"max_bytes": limit, "count": count} for limit, count in self.size_histogram
+                ],
+                "oldest": _entry_to_dict(self.oldest),
+                "newest": _entry_to_dict(self.newest),
+            },
+        }
+
+
+@dataclass(frozen=True)
+class _MembershipTTLs:
+    """Freshness limits of one membership query, read from the configuration once."""
+
+    transcript: Optional[float]
+    metadata: Optional[float]
+    negative: Optional[float]
+
+
+class _Entry(Protocol):
+    video_id: str
+    name: str
+    stored_at: float
+
+
+def _entry_to_dict(entry: Optional[CacheEntry]) -> Optional[Dict[str, Any]]:
+    if entry is None:
+        return None
+    return {"video_id": entry.video_id, "name": entry.name, "size": entry.size, "stored_at": entry.stored_at}
+
+
+def entry_kind(name: str) -> str:
+    """Classify an entry name as transcript, metadata, unavailable, tracks, history, page or legacy."""
+
+    if name.startswith(TRANSCRIPT_NAME_PREFIX):
+        return "transcript"
+    if is_history_name(name):
+        return "history"
+    if name in (METADATA_NAME, UNAVAILABLE_NAME, TRACKS_NAME, PAGE_NAME):
+        return name
+    return "legacy"
+
+
+WarmProgress = Callable[[int, int, str, str], None]
+"""Callback receiving ``(done, total, reference, outcome)`` after each video."""
+
+RefreshProgress = Callable[[int, int, str, str], None]
+"""Callback receiving ``(done, total, "video_id/name", outcome)`` after each entry."""
+
+ReextractProgress = Callable[[int, int, str, str], None]
+"""Callback receiving ``(done, total, video_id, outcome)`` after each archived page."""
+
+
+class _RateLimiter:
+    """Spaces calls to :meth:`wait` at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: Optional[float]) -> None:
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def resolve_video_reference(reference: str) -> Optional[VideoID]:
+    """Resolve a YouTube URL or a bare 11-character video ID."""
+
+    candidate = reference.strip()
+    if _BARE_VIDEO_ID.fullmatch(candidate):
+        return VideoID(candidate)
+    return extract_video_id(candidate)
+
+
+class CacheService:
+    """Runs maintenance operations against the configured cache store."""
+
+    def __init__(
+        self,
+        store: CacheStore,
+        config_service: ConfigService,
+        repository: Optional[CachedYouTubeTranscriptRepository] = None,
+        stats: Optional[CacheStatsRecorder] = None,
+        index: Optional[CacheIndex] = None,
+        rendered: Optional[RenderedOutputCache] = None,
+    ) -> None:
+        self._store = store
+        self._config_service = config_service
+        self._repository = repository
+        self._stats = stats or CacheStatsRecorder()
+        self._index = index
+        self._rendered = rendered
+        # Writers of the repository hold the same per-entry locks.
+        self._locks: KeyLocks = repository.locks if repository is not None else NullKeyLocks()
+
+    def prune(
+        self,
+        *,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ) -> PruneResult:
+        """Prune the cache, falling back to configured limits when none are given.
+
+        Rendered documents whose source entries are gone or have changed are
+        deleted first; the others count toward the limits like cache entries.
+        """
+
+        if max_bytes is None and max_age is None:
+            max_bytes = self._config_service.get_cache_max_size()
+            max_age = self._config_service.get_cache_max_age()
+        if self._rendered is not None:
+            self._rendered.prune()
+        extra = (self._rendered,) if self._rendered is not None else ()
+        return prune_cache(self._store, max_bytes=max_bytes, max_age=max_age, extra=extra)
+
+    def report(self) -> CacheReport:
+        """Summarize usage counters and the entries currently stored."""
+
+        entries = list(self._store.entries())
+        by_kind: Dict[str, int] = {}
+        buckets = [0] * (len(SIZE_BUCKETS) + 1)
+        for entry in entries:
+            kind = entry_kind(entry.name)
+            by_kind[kind] = by_kind.get(kind, 0) + 1
+            buckets[bisect_left(SIZE_BUCKETS, entry.size)] += 1
+        return CacheReport(
+            counters=self._stats.counters(),
+            entries=len(entries),
+            bytes=sum(entry.size for entry in entries),
+            entries_by_kind=by_kind,
+            size_histogram=list(zip((*SIZE_BUCKETS, None), buckets)),
+            oldest=min(entries, key=lambda entry: entry.stored_at, default=None),
+            newest=max(entries, key=lambda entry: entry.stored_at, default=None),
+        )
+
+    def reset_stats(self) -> None:
+        self._stats.reset()
+
+    def rebuild_index(self) -> int:
+        """Re-create the cache index from the stored entries."""
+
+        if self._index is None:
+            raise ValueError("Rebuilding the index requires a cache index")
+        return self._index.rebuild(entry for entry in self._store.entries() if entry.video_id != BLOB_NAMESPACE)
+
+    def has(self, video_ids: Sequence[VideoID], preferred_languages: Sequence[str]) -> List[CacheMembership]:
+        """Report what is cached for each video, answered from the cache index alone.
+
+        A video counts as cached when the transcript a retrieval would select
+        from its cached entry names is fresh in the index. The index is built
+        from the stored entries the first time it is needed.
+        """
+
+        if self._index is None:
+            raise ValueError("Membership queries require a cache index")
+        if not self._index.exists():
+            self.rebuild_index()
+        found = self._index.lookup_many(video_id.value for video_id in video_ids)
+        ttls = _MembershipTTLs(
+            transcript=self._config_service.get_transcript_ttl(),
+            metadata=self._config_service.get_metadata_ttl(),
+            negative=self._config_service.get_negative_ttl(),
+        )
+        now = time.time()
+        return [
+            self._membership(video_id.value, found[video_id.value], preferred_languages, ttls, now)
+            for video_id in video_ids
+        ]
+
+    @staticmethod
+    def _membership(
+        video_id: str, entries: List[IndexEntry], preferred_languages: Sequence[str], ttls: _MembershipTTLs, now: float
+    ) -> CacheMembership:
+        if not entries:
+            return CacheMembership(video_id=video_id, status=MISSING)
+
+        def fresh(entry: IndexEntry, ttl: Optional[float]) -> bool:
+            return ttl is None or now - entry.stored_at <= ttl
+
+        by_name = {entry.name: entry for entry in entries}
+        selected = CachedYouTubeTranscriptRepository.select_cached_transcripts(
+            video_id, list(by_name), preferred_languages
+        )
+        usable_transcript = any(name in by_name and fresh(by_name[name], ttls.transcript) for name in selected)
+        languages = []
+        metadata = unavailable = False
+        for entry in entries:
+            parsed = parse_transcript_name(entry.name)
+            if parsed is not None:
+                language_code, is_generated = parsed
+                languages.append(f"{language_code} (auto)" if is_generated else language_code)
+            elif entry.name == METADATA_NAME:
+                metadata = fresh(entry, ttls.metadata)
+            elif entry.name == UNAVAILABLE_NAME:
+                unavailable = ttls.negative is not None and fresh(entry, ttls.negative)
+
+        if metadata and usable_transcript:
+            status = CACHED
+        elif metadata and unavailable:
+            status = UNAVAILABLE
+        else:
+            status = PARTIAL
+        return CacheMembership(
+            video_id=video_id,
+            status=status,
+            languages=tuple(languages),
+            stored_at=max(entry.stored_at for entry in entries),
+            bytes=sum(entry.size for entry in entries),
+        )
+
+    def history(self, video_id: VideoID) -> List[EntryHistory]:
+        """Stored versions of every cached transcript and the metadata of ``video_id``."""
+
+        names = [*self._store.names(video_id.value, TRANSCRIPT_NAME_PREFIX), METADATA_NAME]
+        histories = (load_history(self._store, video_id.value, name) for name in names)
+        return [history for history in histories if history is not None]
+
+    def manifest(self) -> List[ManifestEntry]:
+        """List every cached entry with its content digest and write time."""
+
+        return build_manifest(self._store)
+
+    def export(self, destination: Path, *, against: Optional[Path] = None) -> SyncResult:
+        """Export entries missing from, or newer than, the manifest at ``against``."""
+
+        remote = read_manifest(against) if against is not None else None
+        return export_cache(self._store, destination, against=remote)
+
+    def import_bundle(self, source: Path) -> SyncResult:
+        """Merge an exported bundle without replacing fresher local entries."""
+
+        return import_cache(self._store, source)
+
+    def migrate(self, *, workers: int = 4, on_progress: Optional[MigrationProgress] = None) -> MigrationResult:
+        """Convert legacy pickled entries to the current formats and drop unreadable ones."""
+
+        return migrate_cache(self._store, workers=workers, on_progress=on_progress)
+
+    def verify(
+        self,
+        quarantine_dir: Path,
+        *,
+        repair: bool = False,
+        preferred_languages: Sequence[str] = (),
+        workers: int = 4,
+        on_progress: Optional[VerifyProgress] = None,
+    ) -> VerifyResult:
+        """Check every cache entry and move corrupt ones into ``quarantine_dir``.
+
+        With ``repair``, each corrupt entry is refetched in the background
+        while the scan continues; transcripts are refetched in the language
+        of the damaged entry, falling back to ``preferred_languages``.
+        """
+
+        if repair and self._repository is None:
+            raise ValueError("Repairing the cache requires a transcript repository")
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as repairs:
+            futures = []
+            submitted = set()
+            lock = threading.Lock()
+
+            def schedule(entry: CorruptEntry) -> None:
+                if entry.video_id == BLOB_NAMESPACE or entry.name == PAGE_NAME or is_history_name(entry.name):
+                    # Neither can be fetched again.
+                    return
+                key = (entry.video_id, entry.name)
+                with lock:
+                    if key in submitted:
+                        return
+                    submitted.add(key)
+                    futures.append(repairs.submit(self._repair_one, entry, list(preferred_languages)))
+
+            result = verify_cache(
+                self._store,
+                quarantine_dir,
+                workers=workers,
+                on_progress=on_progress,
+                on_corrupt=schedule if repair else None,
+            )
+            outcomes = [future.result() for future in futures]
+        return replace(result, repaired=outcomes.count(True), repair_failed=outcomes.count(False))
+
+    def _repair_one(self, entry: CorruptEntry, preferred_languages: Sequence[str]) -> bool:
+        video_id = VideoID(entry.video_id)
+        try:
+            if entry.name == METADATA_NAME:
+                bundle = self._repository.retrieve(video_id, preferred_languages, refresh_metadata=True)
+            else:
+                parsed = parse_transcript_name(entry.name)
+                languages = [parsed[0]] if parsed and parsed[0] != UNKNOWN_LANGUAGE else preferred_languages
+                bundle = self._repository.retrieve(video_id, languages, refresh_transcript=True)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not repair cache entry {entry.video_id}/{entry.name}: {exc}", file=sys.stderr)
+            return False
+        return bundle is not None
+
+    def refresh(
+        self,
+        older_than: float,
+        preferred_languages: Sequence[str],
+        *,
+        workers: int = 4,
+        limit: Optional[int] = None,
+        rate: Optional[float] = None,
+        on_progress: Optional[RefreshProgress] = None,
+    ) -> RefreshResult:
+        """Refetch transcripts, metadata and negative entries stored more than ``older_than`` seconds ago.
+
+        Videos are refreshed oldest first on ``workers`` threads, at most
+        ``limit`` of them and at most ``rate`` fetches per second. Each entry
+        is refetched in place: transcripts in their own language, negative
+        entries and metadata in the languages already cached for the video,
+        falling back to ``preferred_languages``.
+        """
+
+        if self._repository is None:
+            raise ValueError("Refreshing the cache requires a transcript repository")
+
+        started = time.monotonic()
+        cutoff = time.time() - older_than
+        by_video: Dict[str, List[_Entry]] = defaultdict(list)
+        for entry in self._refresh_candidates():
+            refetchable = entry_kind(entry.name) in ("transcript", METADATA_NAME, UNAVAILABLE_NAME)
+            aged = refetchable and entry.stored_at < cutoff
+            if aged and _BARE_VIDEO_ID.fullmatch(entry.video_id):
+                by_video[entry.video_id].append(entry)
+        videos = sorted(by_video, key=lambda video_id: min(entry.stored_at for entry in by_video[video_id]))
+        selected = videos if limit is None else videos[:limit]
+        deferred = sum(len(by_video[video_id]) for video_id in videos[len(selected) :])
+
+        total = sum(len(by_video[video_id]) for video_id in selected)
+        counts = {REFRESH_UPDATED: 0, REFRESH_UNCHANGED: 0, REFRESH_FAILED: 0}
+        done = 0
+        limiter = _RateLimiter(rate)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(self._refresh_video, video_id, by_video[video_id], list(preferred_languages), limiter)
+                for video_id in selected
+            ]
+            for future in as_completed(futures):
+                for key, outcome in future.result():
+                    done += 1
+                    counts[outcome] += 1
+                    if on_progress is not None:
+                        on_progress(done, total, key, outcome)
+
+        return RefreshResult(
+            updated=counts[REFRESH_UPDATED],
+            unchanged=counts[REFRESH_UNCHANGED],
+            failed=counts[REFRESH_FAILED],
+            deferred=deferred,
+            elapsed=time.monotonic() - started,
+        )
+
+    def _refresh_candidates(self) -> Iterable[_Entry]:
+        if self._index is not None and self._index.exists():
+            return self._index.entries()
+        return (entry for entry in self._store.entries() if entry.video_id != BLOB_NAMESPACE)
+
+    def _refresh_video(
+        self, video_id: str, entries: Sequence[_Entry], preferred_languages: Sequence[str], limiter: _RateLimiter
+    ) -> List[Tuple[str, str]]:
+        before = {entry.name: self._store.get(video_id, entry.name) for entry in entries}
+        cached_languages = []
+        for name in self._store.names(video_id, TRANSCRIPT_NAME_PREFIX):
+            parsed = parse_transcript_name(name)
+            if parsed is not None and parsed[0] != UNKNOWN_LANGUAGE and parsed[0] not in cached_languages:
+                cached_languages.append(parsed[0])
+        fallback = cached_languages or list(preferred_languages)
+
+        # Aged transcripts are fetched again track by track, so a generated
+        # track is refreshed even when a manual one would be preferred. Other
+        # entries take one retrieval in the fallback languages, and metadata
+        # rides along with it.
+        tracks: List[Tuple[str, str, bool]] = []
+        requests: Dict[Tuple[str, ...], List[str]] = {}
+        for entry in entries:
+            if entry.name == METADATA_NAME:
+                continue
+            parsed = parse_transcript_name(entry.name)
+            if parsed is not None and parsed[0] != UNKNOWN_LANGUAGE:
+                tracks.append((entry.name, *parsed))
+            else:
+                requests.setdefault(tuple(fallback), []).append(entry.name)
+        refresh_transcript = bool(requests)
+        if METADATA_NAME in before:
+            requests.setdefault(tuple(fallback), []).append(METADATA_NAME)
+
+        succeeded: Set[str] = set()
+        for name, language_code, is_generated in tracks:
+            limiter.wait()
+            if self._repository.refresh_track(VideoID(video_id), language_code, is_generated):
+                succeeded.add(name)
+        for languages, names in requests.items():
+            limiter.wait()
+            try:
+                bundle = self._repository.retrieve(
+                    VideoID(video_id),
+                    list(languages),
+                    refresh_transcript=refresh_transcript,
+                    refresh_metadata=METADATA_NAME in names,
+                )
+            except Exception as exc:  # pragma: no cover - defensive
+                print(f"Warning: Could not refresh cache entries of {video_id}: {exc}", file=sys.stderr)
+                bundle = None
+            if bundle is not None:
+                succeeded.update(names)
+
+        return [
+            (f"{video_id}/{entry.name}", self._refresh_outcome(video_id, entry, before, succeeded)) for entry in entries
+        ]
+
+    def _refresh_outcome(
+        self, video_id: str, entry: _Entry, before: Dict[str, Optional[CacheRecord]], succeeded: Set[str]
+    ) -> str:
+        after = self._store.get(video_id, entry.name)
+        if after is None:
+            # A negative entry is deleted once the transcript can be fetched.
+            return REFRESH_UPDATED if entry.name in succeeded else REFRESH_FAILED
+        if after.stored_at <= entry.stored_at:
+            return REFRESH_FAILED
+        previous = before.get(entry.name)
+        if previous is not None and bytes(previous.data) == bytes(after.data):
+            return REFRESH_UNCHANGED
+        return REFRESH_UPDATED
+
+    def reextract(self, *, workers: int = 4, on_progress: Optional[ReextractProgress] = None) -> ReextractResult:
+        """Extract metadata again from every archived watch page, without the network.
+
+        Extraction is CPU-bound, so it runs on ``workers`` processes while
+        this thread reads pages and writes the results. A metadata entry is
+        rewritten when its extraction changed, keeping the fetch time of the
+        page, and the replaced version goes to its history.
+        """
+
+        started = time.monotonic()
+        pages = [entry.video_id for entry in self._refresh_candidates() if entry.name == PAGE_NAME]
+        history_versions = self._config_service.get_history_versions()
+        counts = {REEXTRACT_UPDATED: 0, REEXTRACT_UNCHANGED: 0, REEXTRACT_SUPERSEDED: 0, REEXTRACT_FAILED: 0}
+        # Pages are archived by this machine's fetches; shared and remote tiers are not asked for them.
+        local = local_cache_store(self._store)
+        done = 0
+
+        def finish(video_id: str, outcome: str) -> None:
+            nonlocal done
+            done += 1
+            counts[outcome] += 1
+            if on_progress is not None:
+                on_progress(done, len(pages), video_id, outcome)
+
+        executor: Executor = ProcessPoolExecutor(workers) if workers > 1 else ThreadPoolExecutor(1)
+        with executor:
+            pending: Dict[Future, Tuple[str, float]] = {}
+            # Only a few pages per worker are held in memory at a time.
+            for video_id in [*pages, None]:
+                while pending and (video_id is None or len(pending) >= 4 * max(1, workers)):
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        page_video_id, page_stored_at = pending.pop(future)
+                        outcome = self._apply_reextracted(page_video_id, page_stored_at, future, history_versions)
+                        finish(page_video_id, outcome)
+                if video_id is None:
+                    break
+                record = local.get(video_id, PAGE_NAME)
+                if record is None:
+                    finish(video_id, REEXTRACT_FAILED)
+                    continue
+                pending[executor.submit(extract_archived_metadata, bytes(record.data))] = (video_id, record.stored_at)
+
+        return ReextractResult(
+            updated=counts[REEXTRACT_UPDATED],
+            unchanged=counts[REEXTRACT_UNCHANGED],
+            superseded=counts[REEXTRACT_SUPERSEDED],
+            failed=counts[REEXTRACT_FAILED],
+            elapsed=time.monotonic() - started,
+        )
+
+    def _apply_reextracted(self, video_id: str, page_stored_at: float, future: Future, history_versions: int) -> str:
+        try:
+            metadata = future.result()
+        except ValueError as exc:
+            print(f"Warning: Could not read the archived page of {video_id}: {exc}", file=sys.stderr)
+            return REEXTRACT_FAILED
+        if metadata.title is None and metadata.description is None:
+            return REEXTRACT_FAILED
+        payload = encode_metadata(metadata)
+        # As in a retrieval, the version replaced and its history are those of the local tier.
+        local = local_cache_store(self._store)
+        with self._locks.hold(f"{video_id}.metadata"):
+            current = local.get(video_id, METADATA_NAME)
+            # Metadata is stamped when its page is requested, before the page is archived, so a
+            # later stamp means it was fetched again after the page.
+            if current is not None and current.stored_at > page_stored_at:
+                return REEXTRACT_SUPERSEDED
+            if current is not None and bytes(current.data) == payload:
+                return REEXTRACT_UNCHANGED
+            self._store.put(video_id, METADATA_NAME, payload, stored_at=page_stored_at)
+            record_version(local, video_id, METADATA_NAME, current, payload, limit=history_versions)
+        return REEXTRACT_UPDATED
+
+    def warm(
+        self,
+        references: Iterable[str],
+        preferred_languages: Sequence[str],
+        *,
+        workers: int = 4,
+        on_progress: Optional[WarmProgress] = None,
+    ) -> WarmResult:
+        """Fetch every referenced video that is not already cached and fresh.
+
+        ``references`` are URLs or video IDs; blank lines and ``#`` comments
+        are ignored and each video is handled once. Unresolvable references
+        count as failures.
+        """
+
+        if self._repository is None:
+            raise ValueError("Warming the cache requires a transcript repository")
+
+        started = time.monotonic()
+        counts = {WARM_CACHED: 0, WARM_FETCHED: 0, WARM_UNAVAILABLE: 0, WARM_FAILED: 0}
+        invalid: List[str] = []
+        pending: List[Tuple[str, VideoID]] = []
+        seen = set()
+        for reference in references:
+            reference = reference.strip()
+            if not reference or reference.startswith("#"):
+                continue
+            video_id = resolve_video_reference(reference)
+            if video_id is None:
+                invalid.append(reference)
+            elif video_id not in seen:
+                seen.add(video_id)
+                pending.append((reference, video_id))
+
+        total = len(invalid) + len(pending)
+        done = 0
+        for reference in invalid:
+            print(f"Warning: Could not extract a video ID from: {reference}", file=sys.stderr)
+            done += 1
+            counts[WARM_FAILED] += 1
+            if on_progress is not None:
+                on_progress(done, total, reference, WARM_FAILED)
+
+        languages = list(preferred_languages)
+        known: Dict[str, bool] = {}
+        if self._index is not None and self._index.exists():
+            # The index settles which videos are cached without reading any entry.
+            memberships = self.has([video_id for _reference, video_id in pending], languages)
+            known = {item.video_id: item.status in (CACHED, UNAVAILABLE) for item in memberships}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(self._warm_one, video_id, languages, known.get(video_id.value)): reference
+                for reference, video_id in pending
+            }
+            for future in as_completed(futures):
+                outcome = future.result()
+                done += 1
+                counts[outcome] += 1
+                if on_progress is not None:
+                    on_progress(done, total, futures[future], outcome)
+
+        return WarmResult(
+            cached=counts[WARM_CACHED],
+            fetched=counts[WARM_FETCHED],
+            unavailable=counts[WARM_UNAVAILABLE],
+            failed=counts[WARM_FAILED],
+            elapsed=time.monotonic() - started,
+        )
+
+    def _warm_one(self, video_id: VideoID, preferred_languages: Sequence[str], cached: Optional[bool] = None) -> str:
+        try:
+            if cached is None:
+                cached = self._repository.is_cached(video_id, preferred_languages)
+            if cached:
+                return WARM_CACHED
+            bundle = self._repository.retrieve(video_id, preferred_languages)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not warm cache for {video_id.value}: {exc}", file=sys.stderr)
+            return WARM_FAILED
+        if bundle is None:
+            return WARM_FAILED
+        if bundle.transcript_unavailable:
+            return WARM_UNAVAILABLE
+        return WARM_FETCHED
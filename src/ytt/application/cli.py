@@ -3,14 +3,98 @@
 from __future__ import annotations
 
 import argparse
+import re
 
+from ..domain import CACHE_FIRST, CACHE_ONLY, FRESHNESS_POLICIES, NETWORK_FIRST
 from ..version import get_version
 
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte size such as ``500M`` or ``2G`` (binary units)."""
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*", value, flags=re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: '{value}' (expected e.g. 500M, 2G)")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def parse_duration(value: str) -> float:
+    """Parse a duration such as ``30d`` or ``12h`` into seconds."""
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", value, flags=re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: '{value}' (expected e.g. 30d, 12h)")
+    number, unit = match.groups()
+    return float(number) * _DURATION_UNITS[unit.lower() or "s"]
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{value}'")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got '{value}'")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"expected a positive number, got '{value}'")
+    return number
+
+
+def _language_list(value: str) -> list[str]:
+    languages = [lang.strip() for lang in value.split(",") if lang.strip()]
+    if not languages:
+        raise argparse.ArgumentTypeError(f"expected comma-separated language codes, got '{value}'")
+    return languages
+
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count using binary units."""
+
+    size = float(num_bytes)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{int(size)} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"  # pragma: no cover - unreachable
+
+
+def format_duration(seconds: float) -> str:
+    """Format a number of seconds as a short human readable duration."""
+
+    seconds = int(round(seconds))
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            whole, rest = divmod(seconds, size)
+            return f"{whole}{unit}" + (f" {format_duration(rest)}" if rest else "")
+    return f"{seconds}s"
+
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Fetch YouTube video transcripts or manage configuration.",
-        usage='ytt ["<youtube_url>"] | ytt config <setting> <value>',
+        usage='ytt ["<youtube_url>"] | ytt config <setting> <value> | ytt cache <command>',
     )
 
     parser.add_argument(
@@ -62,17 +146,322 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Bypass local cache and fetch transcript/metadata from YouTube.",
     )
+    fetch_parser.add_argument(
+        "--refresh-metadata",
+        action="store_true",
+        help="Bypass cached title/description only and fetch them from YouTube.",
+    )
+    fetch_parser.add_argument(
+        "--refresh-transcript",
+        action="store_true",
+        help="Bypass the cached transcript only and fetch it from YouTube.",
+    )
+    fetch_parser.add_argument(
+        "--policy",
+        choices=FRESHNESS_POLICIES,
+        default=CACHE_FIRST,
+        help=(
+            "How to weigh the cache against the network: cache-first (default), cache-only, "
+            "stale-while-revalidate (serve expired entries and refresh them in the background) "
+            "or network-first (fall back to the cache when YouTube is unreachable)."
+        ),
+    )
+    fetch_parser.add_argument(
+        "--offline",
+        dest="policy",
+        action="store_const",
+        const=CACHE_ONLY,
+        help="Never use the network; same as --policy cache-only.",
+    )
+    fetch_parser.add_argument(
+        "--languages",
+        type=_language_list,
+        default=None,
+        help="Comma-separated language codes to prefer instead of the configured ones (e.g. en,de).",
+    )
+
+    langs_parser = subparsers.add_parser(
+        "langs",
+        help="List the transcript tracks available for a video, from the cache when possible.",
+    )
+    langs_parser.add_argument("youtube_url", help="The URL or ID of the YouTube video.")
+    langs_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print one JSON object per track.",
+    )
+    langs_policy = langs_parser.add_mutually_exclusive_group()
+    langs_policy.add_argument(
+        "--refresh",
+        dest="policy",
+        action="store_const",
+        const=NETWORK_FIRST,
+        default=CACHE_FIRST,
+        help="List the tracks from YouTube even if a fresh list is cached.",
+    )
+    langs_policy.add_argument(
+        "--offline",
+        dest="policy",
+        action="store_const",
+        const=CACHE_ONLY,
+        help="Only report a cached track list, even an expired one.",
+    )
+
+    history_parser = subparsers.add_parser(
+        "history",
+        help="List the cached versions of a video's transcripts and metadata.",
+    )
+    history_parser.add_argument("youtube_url", help="The URL or ID of the YouTube video.")
+
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help="Show what changed between two cached versions of a video's transcripts and metadata.",
+    )
+    diff_parser.add_argument("youtube_url", help="The URL or ID of the YouTube video.")
+    diff_parser.add_argument(
+        "--entry",
+        help="Only compare this entry, e.g. 'metadata' or 'transcript.en.manual' (default: every entry with history).",
+    )
+    diff_parser.add_argument(
+        "--from",
+        dest="older",
+        type=_non_negative_int,
+        default=1,
+        help="Version to compare from, as numbered by 'ytt history' (default: 1, the previous version).",
+    )
+    diff_parser.add_argument(
+        "--to",
+        dest="newer",
+        type=_non_negative_int,
+        default=0,
+        help="Version to compare to (default: 0, the cached version).",
+    )
 
     config_parser = subparsers.add_parser("config", help="Configure ytt settings.")
     config_parser.add_argument(
         "setting",
-        help="The configuration setting to modify (e.g., languages).",
+        help=(
+            "The configuration setting to modify (languages, cache_backend, cache_max_size, "
+            "cache_max_age, transcript_ttl, metadata_ttl, negative_ttl, memory_cache_entries, "
+            "memory_cache_size, history_versions, page_archive, shared_cache_dir, cache_server_url)."
+        ),
     )
     config_parser.add_argument(
         "value",
         help="The value to set for the setting (e.g., 'en,es,fr').",
     )
 
+    cache_parser = subparsers.add_parser("cache", help="Inspect and maintain the local cache.")
+    cache_subparsers = cache_parser.add_subparsers(dest="cache_command", required=True)
+    prune_parser = cache_subparsers.add_parser(
+        "prune",
+        help="Evict least recently used entries (defaults to the configured limits).",
+    )
+    prune_parser.add_argument(
+        "--max-size",
+        type=parse_size,
+        help="Shrink the cache to at most this size (e.g., 500M, 2G).",
+    )
+    prune_parser.add_argument(
+        "--older-than",
+        type=parse_duration,
+        help="Remove entries not accessed within this duration (e.g., 30d, 12h).",
+    )
+
+    warm_parser = cache_subparsers.add_parser(
+        "warm",
+        help="Prefetch transcripts and metadata for a list of videos.",
+    )
+    warm_parser.add_argument(
+        "source",
+        help="File with one YouTube URL or video ID per line, or '-' to read from stdin.",
+    )
+    warm_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=4,
+        help="Number of videos to fetch concurrently (default: 4).",
+    )
+
+    refresh_parser = cache_subparsers.add_parser(
+        "refresh",
+        help="Refetch cached transcripts and metadata stored longer ago than a given age.",
+    )
+    refresh_parser.add_argument(
+        "--older-than",
+        type=parse_duration,
+        required=True,
+        help="Refresh entries fetched more than this long ago (e.g., 30d, 12h).",
+    )
+    refresh_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=4,
+        help="Number of videos to refresh concurrently (default: 4).",
+    )
+    refresh_parser.add_argument(
+        "--limit",
+        type=_positive_int,
+        help="Refresh at most this many videos, oldest first.",
+    )
+    refresh_parser.add_argument(
+        "--rate",
+        type=_positive_float,
+        default=2.0,
+        help="Maximum number of fetches per second across all workers (default: 2).",
+    )
+    refresh_parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Report every refreshed entry.",
+    )
+
+    stats_parser = cache_subparsers.add_parser(
+        "stats",
+        help="Show hit ratio, traffic and size statistics for the cache.",
+    )
+    stats_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the statistics as JSON.",
+    )
+    stats_parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Reset the usage counters after printing them.",
+    )
+
+    has_parser = cache_subparsers.add_parser(
+        "has",
+        help="Report which videos are cached, answered from the cache index.",
+    )
+    has_parser.add_argument(
+        "references",
+        nargs="+",
+        help="YouTube URLs or video IDs, or '-' to read one per line from stdin.",
+    )
+    has_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print one JSON object per video.",
+    )
+    has_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the index from the cache entries first.",
+    )
+
+    manifest_parser = cache_subparsers.add_parser(
+        "manifest",
+        help="Print the keys, content hashes and fetch times of all cached entries as JSON.",
+    )
+    manifest_parser.add_argument(
+        "--output",
+        "-o",
+        help="Write the manifest to this file instead of stdout.",
+    )
+
+    export_parser = cache_subparsers.add_parser(
+        "export",
+        help="Export cached entries into a bundle directory for another machine.",
+    )
+    export_parser.add_argument(
+        "directory",
+        help="Bundle directory; an existing bundle is updated incrementally.",
+    )
+    export_parser.add_argument(
+        "--against",
+        help="Manifest (or bundle directory) of the receiving machine; only missing or newer entries are exported.",
+    )
+
+    import_parser = cache_subparsers.add_parser(
+        "import",
+        help="Merge a bundle directory into the cache, keeping fresher local entries.",
+    )
+    import_parser.add_argument(
+        "directory",
+        help="Bundle directory created by 'ytt cache export'.",
+    )
+
+    migrate_parser = cache_subparsers.add_parser(
+        "migrate",
+        help="Convert entries in legacy cache formats and delete unreadable ones.",
+    )
+    migrate_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=4,
+        help="Number of videos to convert concurrently (default: 4).",
+    )
+    migrate_parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Report every converted or deleted entry.",
+    )
+
+    reextract_parser = cache_subparsers.add_parser(
+        "reextract",
+        help="Extract metadata again from the archived watch pages, without using the network.",
+    )
+    reextract_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=4,
+        help="Number of extraction processes (default: 4).",
+    )
+    reextract_parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Report the outcome for every archived page.",
+    )
+
+    verify_parser = cache_subparsers.add_parser(
+        "verify",
+        help="Check every cache entry and quarantine corrupt ones.",
+    )
+    verify_parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Refetch corrupt entries while the scan continues.",
+    )
+    verify_parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=4,
+        help="Number of entries to check, and videos to refetch, concurrently (default: 4).",
+    )
+    verify_parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Report every corrupt entry as it is found.",
+    )
+
+    serve_parser = cache_subparsers.add_parser(
+        "serve",
+        help="Serve a cache directory over HTTP for other machines' cache_server_url.",
+    )
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1).",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=_positive_int,
+        default=8765,
+        help="Port to listen on (default: 8765).",
+    )
+    serve_parser.add_argument(
+        "--dir",
+        dest="directory",
+        help="Directory to store served entries in (default: the local cache directory).",
+    )
+    serve_parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log every request to stderr.",
+    )
+
     subparsers.add_parser(
         "help",
         help="Show help message and exit.",
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+from pathlib import Path
+from typing import Iterable, List, Optional
 
 from ..infrastructure.config import ConfigRepository
 
@@ -18,3 +19,75 @@ class ConfigService:
 
     def set_preferred_languages(self, languages: Iterable[str]) -> None:
         self._repository.set_preferred_languages(languages)
+
+    def get_cache_backend(self) -> str:
+        return self._repository.get_cache_backend()
+
+    def set_cache_backend(self, backend: str) -> None:
+        self._repository.set_cache_backend(backend)
+
+    def get_cache_max_size(self) -> Optional[int]:
+        return self._repository.get_cache_max_size()
+
+    def set_cache_max_size(self, max_bytes: Optional[int]) -> None:
+        self._repository.set_cache_max_size(max_bytes)
+
+    def get_cache_max_age(self) -> Optional[float]:
+        return self._repository.get_cache_max_age()
+
+    def set_cache_max_age(self, max_age: Optional[float]) -> None:
+        self._repository.set_cache_max_age(max_age)
+
+    def get_transcript_ttl(self) -> Optional[float]:
+        return self._repository.get_transcript_ttl()
+
+    def set_transcript_ttl(self, ttl: Optional[float]) -> None:
+        self._repository.set_transcript_ttl(ttl)
+
+    def get_metadata_ttl(self) -> Optional[float]:
+        return self._repository.get_metadata_ttl()
+
+    def set_metadata_ttl(self, ttl: Optional[float]) -> None:
+        self._repository.set_metadata_ttl(ttl)
+
+    def get_negative_ttl(self) -> Optional[float]:
+        return self._repository.get_negative_ttl()
+
+    def set_negative_ttl(self, ttl: Optional[float]) -> None:
+        self._repository.set_negative_ttl(ttl)
+
+    def get_memory_cache_entries(self) -> int:
+        return self._repository.get_memory_cache_entries()
+
+    def set_memory_cache_entries(self, entries: Optional[int]) -> None:
+        self._repository.set_memory_cache_entries(entries)
+
+    def get_memory_cache_size(self) -> int:
+        return self._repository.get_memory_cache_size()
+
+    def set_memory_cache_size(self, max_bytes: Optional[int]) -> None:
+        self._repository.set_memory_cache_size(max_bytes)
+
+    def get_history_versions(self) -> int:
+        return self._repository.get_history_versions()
+
+    def set_history_versions(self, versions: Optional[int]) -> None:
+        self._repository.set_history_versions(versions)
+
+    def get_page_archive(self) -> str:
+        return self._repository.get_page_archive()
+
+    def set_page_archive(self, mode: str) -> None:
+        self._repository.set_page_archive(mode)
+
+    def get_shared_cache_dir(self) -> Optional[Path]:
+        return self._repository.get_shared_cache_dir()
+
+    def set_shared_cache_dir(self, path: Optional[Path]) -> None:
+        self._repository.set_shared_cache_dir(path)
+
+    def get_cache_server_url(self) -> Optional[str]:
+        return self._repository.get_cache_server_url()
+
+    def set_cache_server_url(self, url: Optional[str]) -> None:
+        self._repository.set_cache_server_url(url)
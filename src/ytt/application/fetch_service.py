@@ -3,18 +3,29 @@
 from __future__ import annotations
 
 import sys
-from typing import Callable, Optional, Sequence
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, TextIO
 
 from ..domain import (
+    CACHE_FIRST,
     TranscriptService,
     VideoID,
     VideoTranscriptBundle,
     extract_video_id,
 )
 from ..infrastructure.clipboard import ClipboardGateway
+from ..infrastructure.rendered_cache import RenderedOutputCache, render_variant
 from .config_service import ConfigService
 
 
+@dataclass(frozen=True)
+class FetchOutput:
+    """What :meth:`FetchTranscriptUseCase.output` wrote."""
+
+    transcript_unavailable: Optional[str] = None
+    rendered_hit: bool = False
+
+
 class FetchTranscriptUseCase:
     """Coordinates fetching transcripts for the CLI."""
 
@@ -24,14 +35,16 @@ class FetchTranscriptUseCase:
         config_service: ConfigService,
         clipboard: ClipboardGateway,
         extractor: Optional[Callable[[str], Optional[VideoID]]] = None,
+        rendered: Optional[RenderedOutputCache] = None,
     ) -> None:
         self._service = transcript_service
         self._config_service = config_service
         self._clipboard = clipboard
         self._extractor = extractor or extract_video_id
+        self._rendered = rendered
 
-    def _resolve_preferred_languages(self) -> Sequence[str]:
-        languages = list(self._config_service.get_preferred_languages())
+    def _resolve_preferred_languages(self, languages: Optional[Sequence[str]] = None) -> Sequence[str]:
+        languages = list(languages or self._config_service.get_preferred_languages())
         if not languages:
             print("Error: Preferred languages not set in configuration.", file=sys.stderr)
             print("Please set them using: ytt config languages <lang1>,<lang2>,...", file=sys.stderr)
@@ -62,10 +75,21 @@ class FetchTranscriptUseCase:
         show_url: bool = True,
         input_url: Optional[str] = None,
         refresh: bool = False,
+        refresh_metadata: bool = False,
+        refresh_transcript: bool = False,
+        policy: str = CACHE_FIRST,
+        languages: Optional[Sequence[str]] = None,
     ) -> Optional[VideoTranscriptBundle]:
         video_id = self._ensure_video_id(url)
-        languages = self._resolve_preferred_languages()
-        bundle = self._service.fetch(video_id, languages, refresh=refresh)
+        languages = self._resolve_preferred_languages(languages)
+        bundle = self._service.fetch(
+            video_id,
+            languages,
+            refresh=refresh,
+            refresh_metadata=refresh_metadata,
+            refresh_transcript=refresh_transcript,
+            policy=policy,
+        )
         if not bundle:
             return None
         if copy_to_clipboard:
@@ -79,6 +103,90 @@ class FetchTranscriptUseCase:
             self._clipboard.copy(lines)
         return bundle
 
+    def output(
+        self,
+        url: str,
+        stream: TextIO,
+        *,
+        copy_to_clipboard: bool = True,
+        show_title: bool = True,
+        show_description: bool = True,
+        show_url: bool = True,
+        input_url: Optional[str] = None,
+        refresh: bool = False,
+        refresh_metadata: bool = False,
+        refresh_transcript: bool = False,
+        policy: str = CACHE_FIRST,
+        languages: Optional[Sequence[str]] = None,
+    ) -> Optional[FetchOutput]:
+        """Fetch ``url`` and write the rendered document to ``stream``.
+
+        ``languages`` replaces the configured preferred languages. Text
+        streams backed by a binary buffer, like ``sys.stdout``, are written
+        through the buffer as UTF-8.
+
+        Under the ``cache-first`` policy a previously rendered document is
+        served as is while the cache entries it was rendered from are
+        unchanged and fresh; otherwise the document is rendered from the
+        retrieved bundle and kept for the next call.
+        """
+
+        video_id = self._ensure_video_id(url)
+        languages = self._resolve_preferred_languages(languages)
+        variant = render_variant(
+            languages, show_title=show_title, show_description=show_description, show_url=show_url
+        )
+        use_rendered = self._rendered is not None and policy == CACHE_FIRST
+        if use_rendered and not (refresh or refresh_metadata or refresh_transcript):
+            document = self._rendered.open(video_id, variant)
+            if document is not None:
+                with document:
+                    binary = getattr(stream, "buffer", None)
+                    if copy_to_clipboard or binary is None:
+                        data = document.read()
+                        if copy_to_clipboard:
+                            self._clipboard.copy(data.decode("utf-8").removesuffix("\n").split("\n"))
+                        self._write(stream, data)
+                    else:
+                        stream.flush()
+                        document.write_to(binary)
+                return FetchOutput(transcript_unavailable=document.transcript_unavailable, rendered_hit=True)
+
+        bundle = self._service.fetch(
+            video_id,
+            languages,
+            refresh=refresh,
+            refresh_metadata=refresh_metadata,
+            refresh_transcript=refresh_transcript,
+            policy=policy,
+        )
+        if not bundle:
+            return None
+        lines = self.render_lines(
+            bundle,
+            show_title=show_title,
+            show_description=show_description,
+            show_url=show_url,
+            input_url=input_url or url,
+        )
+        if copy_to_clipboard:
+            self._clipboard.copy(lines)
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        if use_rendered:
+            self._rendered.save(video_id, variant, bundle, data)
+        self._write(stream, data)
+        return FetchOutput(transcript_unavailable=bundle.transcript_unavailable)
+
+    @staticmethod
+    def _write(stream: TextIO, data: bytes) -> None:
+        binary = getattr(stream, "buffer", None)
+        if binary is None:
+            stream.write(data.decode("utf-8"))
+            return
+        stream.flush()
+        binary.write(data)
+        binary.flush()
+
     @staticmethod
     def render_lines(
         bundle: Optional[VideoTranscriptBundle],
@@ -112,6 +220,8 @@ class FetchTranscriptUseCase:
             lines.append("")
         lines.append("## Transcript")
         lines.append("")
+        if bundle.transcript_unavailable:
+            lines.append(bundle.transcript_unavailable)
         lines.extend(line.text for line in bundle.transcript)
         return lines
 
@@ -1,16 +1,31 @@
 """Domain layer for ytt."""
 
-from .entities import TranscriptLine, VideoMetadata, VideoTranscriptBundle
-from .services import MetadataGateway, TranscriptRepository, TranscriptService
+from .entities import TranscriptLine, TranscriptTrack, VideoMetadata, VideoTranscriptBundle
+from .services import (
+    CACHE_FIRST,
+    CACHE_ONLY,
+    FRESHNESS_POLICIES,
+    NETWORK_FIRST,
+    STALE_WHILE_REVALIDATE,
+    MetadataGateway,
+    TranscriptRepository,
+    TranscriptService,
+)
 from .value_objects import VideoID, extract_video_id
 
 __all__ = [
     "TranscriptLine",
+    "TranscriptTrack",
     "VideoMetadata",
     "VideoTranscriptBundle",
     "TranscriptService",
     "TranscriptRepository",
     "MetadataGateway",
+    "CACHE_FIRST",
+    "CACHE_ONLY",
+    "STALE_WHILE_REVALIDATE",
+    "NETWORK_FIRST",
+    "FRESHNESS_POLICIES",
     "VideoID",
     "extract_video_id",
 ]
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Sequence
 
 
 @dataclass(frozen=True)
@@ -15,10 +16,20 @@ class VideoMetadata:
 
 @dataclass(frozen=True)
 class VideoTranscriptBundle:
-    """Container that groups transcript lines with their metadata."""
+    """Container that groups transcript lines with their metadata.
 
-    transcript: list["TranscriptLine"]
+    ``transcript`` is any sequence of lines; cached bundles use a lazily
+    decoded sequence instead of a list. When the video has no usable
+    transcript, ``transcript`` is empty and ``transcript_unavailable`` says
+    why. ``sources`` names the cache entries the bundle was assembled
+    from, with their write times; it is empty unless every part of the
+    bundle was read from, or just written to, a cache.
+    """
+
+    transcript: Sequence["TranscriptLine"]
     metadata: VideoMetadata
+    transcript_unavailable: str | None = None
+    sources: tuple[tuple[str, float], ...] = field(default=(), compare=False)
 
 
 @dataclass(frozen=True)
@@ -30,5 +41,15 @@ class TranscriptLine:
     duration: float
 
 
+@dataclass(frozen=True)
+class TranscriptTrack:
+    """A transcript YouTube offers for a video, before it is fetched."""
+
+    language_code: str
+    language: str | None
+    is_generated: bool
+    is_translatable: bool = False
+
+
 Transcript = list[TranscriptLine]
 """Convenience alias representing an ordered transcript."""
@@ -5,9 +5,16 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Protocol, Sequence
 
-from .entities import VideoMetadata, VideoTranscriptBundle
+from .entities import TranscriptTrack, VideoMetadata, VideoTranscriptBundle
 from .value_objects import VideoID
 
+# Freshness policies accepted by :meth:`TranscriptRepository.retrieve`.
+CACHE_FIRST = "cache-first"
+CACHE_ONLY = "cache-only"
+STALE_WHILE_REVALIDATE = "stale-while-revalidate"
+NETWORK_FIRST = "network-first"
+FRESHNESS_POLICIES = (CACHE_FIRST, CACHE_ONLY, STALE_WHILE_REVALIDATE, NETWORK_FIRST)
+
 
 class TranscriptRepository(Protocol):
     """Port that retrieves transcripts for a video."""
@@ -18,8 +25,30 @@ class TranscriptRepository(Protocol):
         preferred_languages: Sequence[str],
         *,
         refresh: bool = False,
+        refresh_metadata: bool = False,
+        refresh_transcript: bool = False,
+        policy: str = CACHE_FIRST,
     ) -> Optional[VideoTranscriptBundle]:
-        """Return transcript bundle for ``video_id`` or ``None`` if unavailable."""
+        """Return transcript bundle for ``video_id`` or ``None`` if unavailable.
+
+        ``refresh`` bypasses every cached record, while ``refresh_metadata`` and
+        ``refresh_transcript`` bypass only the corresponding one.
+
+        ``policy`` decides how cached records and the network are weighed:
+
+        - ``cache-first`` uses cached records until they expire and fetches otherwise;
+        - ``cache-only`` never uses the network and serves expired records too;
+        - ``stale-while-revalidate`` serves expired records immediately and
+          refreshes them in the background;
+        - ``network-first`` always fetches and falls back to cached records
+          when the network fails.
+        """
+
+    def list_tracks(self, video_id: VideoID, *, policy: str = CACHE_FIRST) -> Optional[Sequence[TranscriptTrack]]:
+        """Return the transcripts YouTube offers for ``video_id``, or ``None`` if they cannot be listed.
+
+        ``policy`` is interpreted as for :meth:`retrieve`.
+        """
 
 
 class MetadataGateway(Protocol):
@@ -41,8 +70,23 @@ class TranscriptService:
         preferred_languages: Sequence[str],
         *,
         refresh: bool = False,
+        refresh_metadata: bool = False,
+        refresh_transcript: bool = False,
+        policy: str = CACHE_FIRST,
     ) -> Optional[VideoTranscriptBundle]:
         """Fetch transcript bundle using the configured repository."""
 
         languages = list(preferred_languages)
-        return self.repository.retrieve(video_id, languages, refresh=refresh)
+        return self.repository.retrieve(
+            video_id,
+            languages,
+            refresh=refresh,
+            refresh_metadata=refresh_metadata,
+            refresh_transcript=refresh_transcript,
+            policy=policy,
+        )
+
+    def tracks(self, video_id: VideoID, *, policy: str = CACHE_FIRST) -> Optional[Sequence[TranscriptTrack]]:
+        """List the transcripts available for ``video_id`` using the configured repository."""
+
+        return self.repository.list_tracks(video_id, policy=policy)
@@ -1,5 +1,7 @@
 """Infrastructure layer for ytt."""
 
+from .cache_lock import FileKeyLocks
+from .cache_store import CacheStore, FileCacheStore, SqliteCacheStore, create_cache_store
 from .config import ConfigRepository
 from .clipboard import ClipboardGateway, PyperclipClipboardGateway
 from .metadata import YouTubeMetadataGateway
@@ -11,4 +13,9 @@ __all__ = [
     "PyperclipClipboardGateway",
     "YouTubeMetadataGateway",
     "CachedYouTubeTranscriptRepository",
+    "CacheStore",
+    "FileCacheStore",
+    "SqliteCacheStore",
+    "create_cache_store",
+    "FileKeyLocks",
 ]
@@ -0,0 +1,217 @@
+"""Size- and age-bounded eviction for cache stores."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Protocol, Sequence
+
+from .cache_lock import FileKeyLocks
+from .cache_store import CacheEntry, CacheStore
+
+EVICTION_FILE_NAME = "eviction.json"
+EVICTION_STATE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class PruneResult:
+    """Summary of the entries removed by a prune run.
+
+    ``remaining_bytes`` is the size of the entries left in the cache and
+    ``oldest_access`` the last access of the least recently used of them.
+    """
+
+    entries: int = 0
+    bytes: int = 0
+    remaining_bytes: int = 0
+    oldest_access: Optional[float] = None
+
+
+class Evictable(Protocol):
+    """Files kept next to a cache store that count toward its budget."""
+
+    def entries(self) -> Iterator[CacheEntry]: ...
+
+    def delete(self, video_id: str, name: str) -> bool: ...
+
+
+def prune_cache(
+    store: CacheStore,
+    *,
+    max_bytes: Optional[int] = None,
+    max_age: Optional[float] = None,
+    now: Optional[float] = None,
+    extra: Sequence[Evictable] = (),
+) -> PruneResult:
+    """Evict entries not accessed within ``max_age`` seconds, then least recently
+    used entries until the cache fits into ``max_bytes``.
+
+    The entries of every ``extra`` store count toward the budget and are
+    evicted in the same least-recently-used order.
+    """
+
+    if max_bytes is None and max_age is None:
+        return PruneResult()
+
+    now = time.time() if now is None else now
+    owned = [(entry, store) for entry in store.entries()]
+    for evictable in extra:
+        owned.extend((entry, evictable) for entry in evictable.entries())
+    owned.sort(key=lambda item: item[0].accessed_at)
+    total_bytes = sum(entry.size for entry, _owner in owned)
+    removed_entries = 0
+    removed_bytes = 0
+    removed_from_store = False
+    oldest_access = None
+
+    for entry, owner in owned:
+        expired = max_age is not None and now - entry.accessed_at > max_age
+        over_budget = max_bytes is not None and total_bytes > max_bytes
+        if not (expired or over_budget):
+            # Entries are ordered by last access, so the rest are newer still.
+            oldest_access = entry.accessed_at
+            break
+        try:
+            deleted = owner.delete(entry.video_id, entry.name)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not evict cache entry {entry.video_id}/{entry.name}: {exc}", file=sys.stderr)
+            continue
+        total_bytes -= entry.size
+        if deleted:
+            removed_entries += 1
+            removed_bytes += entry.size
+            removed_from_store |= owner is store
+
+    if removed_from_store:
+        # Entry sizes already include their share of any content they referred to.
+        try:
+            store.collect_garbage()
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not collect unreferenced cache data: {exc}", file=sys.stderr)
+
+    return PruneResult(
+        entries=removed_entries, bytes=removed_bytes, remaining_bytes=total_bytes, oldest_access=oldest_access
+    )
+
+
+class EvictionSchedule:
+    """Decides when writes may have pushed a cache past its budget.
+
+    After a prune, the bytes left in the cache are known; every write adds
+    to that running total, and the cache is only scanned again once the
+    total exceeds ``max_bytes``, the least recently used entry it saw is
+    due to expire under ``max_age``, or ``rescan_interval`` seconds have
+    passed, which also catches writes this schedule never saw. With a
+    ``path``, the state is kept in that file and shared by all processes
+    using the cache, so a short-lived process does not start with a scan.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        path: Optional[Path] = None,
+        rescan_interval: float = 300.0,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._path = path
+        self._rescan_interval = rescan_interval
+        self._state = _EvictionState()
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        self._file_locks = FileKeyLocks(path.parent / "locks" / "eviction", stripes=1) if path else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes is not None or self._max_age is not None
+
+    def note_write(self, size: int) -> None:
+        with self._lock:
+            self._pending_bytes += size
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Whether the cache should be scanned now; adds the writes noted so far to the total."""
+
+        if not self.enabled:
+            return False
+        now = time.time() if now is None else now
+        with self._lock:
+            pending, self._pending_bytes = self._pending_bytes, 0
+        state = self._update(lambda state: replace(state, total_bytes=state.total_bytes + pending))
+        if state.scanned_at is None or now - state.scanned_at >= self._rescan_interval:
+            return True
+        if self._max_bytes is not None and state.total_bytes > self._max_bytes:
+            return True
+        return state.next_expiry is not None and now > state.next_expiry
+
+    def record(self, result: PruneResult, now: Optional[float] = None) -> None:
+        """Restart the running total from the outcome of a prune that started at ``now``."""
+
+        now = time.time() if now is None else now
+        next_expiry = None
+        if self._max_age is not None and result.oldest_access is not None:
+            next_expiry = result.oldest_access + self._max_age
+        self._update(lambda state: _EvictionState(result.remaining_bytes, now, next_expiry))
+
+    def _update(self, change: Callable[["_EvictionState"], "_EvictionState"]) -> "_EvictionState":
+        if self._path is None:
+            with self._lock:
+                self._state = change(self._state)
+                return self._state
+        try:
+            with self._file_locks.hold("eviction"):
+                state = change(self._read())
+                self._write(state)
+        except OSError as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not update eviction state {self._path}: {exc}", file=sys.stderr)
+            # Without its state the schedule scans, as it would the first time.
+            return _EvictionState()
+        return state
+
+    def _read(self) -> "_EvictionState":
+        try:
+            with open(self._path, "r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except FileNotFoundError:
+            return _EvictionState()
+        except (OSError, ValueError):
+            return _EvictionState()
+        if not isinstance(payload, dict) or payload.get("version") != EVICTION_STATE_VERSION:
+            return _EvictionState()
+        try:
+            return _EvictionState(
+                total_bytes=int(payload["total_bytes"]),
+                scanned_at=None if payload["scanned_at"] is None else float(payload["scanned_at"]),
+                next_expiry=None if payload["next_expiry"] is None else float(payload["next_expiry"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return _EvictionState()
+
+    def _write(self, state: "_EvictionState") -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_name = tempfile.mkstemp(dir=self._path.parent, prefix=f".{self._path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                json.dump({"version": EVICTION_STATE_VERSION, **asdict(state)}, handle)
+            os.replace(temp_name, self._path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+
+@dataclass(frozen=True)
+class _EvictionState:
+    total_bytes: int = 0
+    scanned_at: Optional[float] = None
+    next_expiry: Optional[float] = None
+
+
+__all__ = ["EVICTION_FILE_NAME", "Evictable", "EvictionSchedule", "PruneResult", "prune_cache"]
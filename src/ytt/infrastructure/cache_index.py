@@ -0,0 +1,226 @@
+"""Journal-backed index of the keys held by a cache store.
+
+The index answers "what is cached for this video?" from memory without
+touching the cache entries themselves. It is kept in a single text file:
+a snapshot of every key followed by appended changes, one per line::
+
+    #ytt-index	1
+    P	<video_id>	<name>	<size>	<stored_at>
+    D	<video_id>	<name>
+
+Processes append their own writes and deletes and pick up those of others
+by reading whatever was appended since they last looked. Once the journal
+is much longer than the set of live keys it is compacted into a fresh
+snapshot. The index only records changes while the file exists; it is
+created by :meth:`CacheIndex.rebuild`.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+from .cache_lock import FileKeyLocks
+
+INDEX_FILE_NAME = "index.tsv"
+INDEX_VERSION = 1
+
+_HEADER = f"#ytt-index\t{INDEX_VERSION}\n"
+
+
+class _Entry(Protocol):
+    video_id: str
+    name: str
+    size: int
+    stored_at: float
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """A cached key with the size and write time of its payload."""
+
+    video_id: str
+    name: str
+    size: int
+    stored_at: float
+
+
+class CacheIndex:
+    """In-memory view of the index file at ``path``, refreshed on every query."""
+
+    def __init__(self, path: Path, *, compact_ratio: float = 2.0, min_compact_lines: int = 1024) -> None:
+        self._path = path
+        self._compact_ratio = compact_ratio
+        self._min_compact_lines = min_compact_lines
+        self._videos: Dict[str, Dict[str, IndexEntry]] = {}
+        self._count = 0
+        self._lines = 0
+        self._offset = 0
+        self._identity: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._file_locks = FileKeyLocks(path.parent / "locks" / "index", stripes=1)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def exists(self) -> bool:
+        return self._path.exists()
+
+    def lookup(self, video_id: str) -> List[IndexEntry]:
+        """Return the indexed entries of ``video_id``, sorted by name."""
+
+        with self._lock:
+            self._refresh()
+            return sorted(self._videos.get(video_id, {}).values(), key=lambda entry: entry.name)
+
+    def lookup_many(self, video_ids: Iterable[str]) -> Dict[str, List[IndexEntry]]:
+        """Like :meth:`lookup` for many videos, reading the index file once."""
+
+        with self._lock:
+            self._refresh()
+            found = {
+                video_id: sorted(self._videos.get(video_id, {}).values(), key=lambda entry: entry.name)
+                for video_id in video_ids
+            }
+            long = self._is_long()
+        if long:
+            self._compact()
+        return found
+
+    def entries(self) -> Iterator[IndexEntry]:
+        with self._lock:
+            self._refresh()
+            snapshot = [entry for names in self._videos.values() for entry in names.values()]
+        return iter(snapshot)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    def record_put(self, video_id: str, name: str, size: int, stored_at: float) -> None:
+        self._append(f"P\t{video_id}\t{name}\t{size}\t{stored_at!r}\n")
+
+    def record_delete(self, video_id: str, name: str) -> None:
+        self._append(f"D\t{video_id}\t{name}\n")
+
+    def rebuild(self, entries: Iterable[_Entry]) -> int:
+        """Replace the index with ``entries`` and return how many were indexed."""
+
+        snapshot = [IndexEntry(entry.video_id, entry.name, int(entry.size), float(entry.stored_at)) for entry in entries]
+        with self._file_locks.hold("index"):
+            self._write_snapshot(snapshot)
+        with self._lock:
+            self._identity = None
+            self._refresh()
+        return len(snapshot)
+
+    def _append(self, line: str) -> None:
+        if not self._path.exists():
+            return
+        try:
+            with self._file_locks.hold("index"):
+                # Without O_CREAT a missing index stays missing until it is rebuilt.
+                descriptor = os.open(self._path, os.O_WRONLY | os.O_APPEND)
+                try:
+                    os.write(descriptor, line.encode("utf-8"))
+                finally:
+                    os.close(descriptor)
+        except FileNotFoundError:
+            return
+        except OSError as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not update cache index {self._path}: {exc}", file=sys.stderr)
+            return
+        # Writers do not read the index: only a process that has loaded it already
+        # catches up with the appended lines and compacts them when needed.
+        with self._lock:
+            loaded = self._identity is not None
+        if loaded:
+            self._compact()
+
+    def _is_long(self) -> bool:
+        return self._lines > max(self._min_compact_lines, self._compact_ratio * self._count)
+
+    def _compact(self) -> None:
+        """Rewrite the index as a snapshot once it is much longer than its live keys."""
+
+        try:
+            with self._file_locks.hold("index"), self._lock:
+                self._refresh()
+                if self._identity is not None and self._is_long():
+                    self._write_snapshot([entry for names in self._videos.values() for entry in names.values()])
+                    self._identity = None
+        except OSError as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not compact cache index {self._path}: {exc}", file=sys.stderr)
+
+    def _write_snapshot(self, entries: List[IndexEntry]) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_name = tempfile.mkstemp(dir=self._path.parent, prefix=f".{self._path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                handle.write(_HEADER)
+                for entry in entries:
+                    handle.write(f"P\t{entry.video_id}\t{entry.name}\t{entry.size}\t{entry.stored_at!r}\n")
+            os.replace(temp_name, self._path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+    def _refresh(self) -> None:
+        """Apply lines appended since the last refresh; reload after compaction."""
+
+        try:
+            handle = open(self._path, "rb")
+        except FileNotFoundError:
+            self._reset(None)
+            return
+        with handle:
+            stat = os.fstat(handle.fileno())
+            identity = (stat.st_dev, stat.st_ino)
+            if identity != self._identity or stat.st_size < self._offset:
+                self._reset(identity)
+            if stat.st_size == self._offset:
+                return
+            handle.seek(self._offset)
+            chunk = handle.read()
+        # A concurrent appender may not have finished its line yet.
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        for line in complete.decode("utf-8", errors="replace").splitlines():
+            self._apply(line)
+
+    def _reset(self, identity: Optional[Tuple[int, int]]) -> None:
+        self._videos = {}
+        self._count = 0
+        self._lines = 0
+        self._offset = 0
+        self._identity = identity
+
+    def _apply(self, line: str) -> None:
+        fields = line.split("\t")
+        if fields[0] == "P" and len(fields) == 5:
+            try:
+                entry = IndexEntry(fields[1], fields[2], int(fields[3]), float(fields[4]))
+            except ValueError:
+                return
+            names = self._videos.setdefault(entry.video_id, {})
+            self._count += entry.name not in names
+            names[entry.name] = entry
+        elif fields[0] == "D" and len(fields) == 3:
+            names = self._videos.get(fields[1])
+            if names is not None and names.pop(fields[2], None) is not None:
+                self._count -= 1
+                if not names:
+                    del self._videos[fields[1]]
+        else:
+            return
+        self._lines += 1
+
+
+__all__ = ["INDEX_FILE_NAME", "CacheIndex", "IndexEntry"]
@@ -0,0 +1,121 @@
+"""Advisory per-key locks that serialize cache fills across processes."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, Protocol
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+class KeyLocks(Protocol):
+    """Mutual exclusion for filling a single cache key."""
+
+    def hold(self, key: str) -> ContextManager[bool]:
+        """Hold the lock for ``key``; yields ``False`` if it could not be acquired in time."""
+
+
+class NullKeyLocks:
+    """Lock implementation that never blocks."""
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[bool]:
+        yield True
+
+
+class FileKeyLocks:
+    """``flock``-based locks stored as lock files in ``lock_dir``.
+
+    Keys are hashed onto a fixed number of stripes so the lock directory
+    stays bounded; unrelated keys occasionally share a stripe and then
+    simply wait for each other. ``flock`` locks belong to the open file, so
+    threads of one process exclude each other as well. Where ``fcntl`` is
+    unavailable, only threads of the current process are serialized.
+
+    A holder that does not release the lock within ``timeout`` seconds is
+    assumed to be stuck; waiters then proceed without it.
+    """
+
+    def __init__(
+        self,
+        lock_dir: Path,
+        *,
+        stripes: int = 256,
+        timeout: float = 60.0,
+        poll_interval: float = 0.05,
+    ) -> None:
+        self._lock_dir = lock_dir
+        self._stripes = stripes
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._thread_locks: Dict[int, threading.Lock] = {}
+        self._thread_locks_guard = threading.Lock()
+
+    @property
+    def lock_dir(self) -> Path:
+        return self._lock_dir
+
+    def path_for(self, key: str) -> Path:
+        return self._lock_dir / f"{self._stripe(key):03x}.lock"
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[bool]:
+        if fcntl is None:  # pragma: no cover - Windows
+            with self._hold_thread_lock(key) as acquired:
+                yield acquired
+            return
+
+        try:
+            self._lock_dir.mkdir(parents=True, exist_ok=True)
+            descriptor = os.open(self.path_for(key), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as exc:
+            print(f"Warning: Could not open cache lock for {key}: {exc}", file=sys.stderr)
+            yield False
+            return
+
+        try:
+            acquired = self._acquire(descriptor)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    fcntl.flock(descriptor, fcntl.LOCK_UN)
+        finally:
+            os.close(descriptor)
+
+    def _acquire(self, descriptor: int) -> bool:
+        deadline = time.monotonic() + self._timeout
+        while True:
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(self._poll_interval)
+
+    @contextmanager
+    def _hold_thread_lock(self, key: str) -> Iterator[bool]:  # pragma: no cover - Windows
+        with self._thread_locks_guard:
+            lock = self._thread_locks.setdefault(self._stripe(key), threading.Lock())
+        acquired = lock.acquire(timeout=self._timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+
+    def _stripe(self, key: str) -> int:
+        return zlib.crc32(key.encode("utf-8")) % self._stripes
+
+
+__all__ = ["FileKeyLocks", "KeyLocks", "NullKeyLocks"]
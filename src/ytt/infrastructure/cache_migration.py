@@ -0,0 +1,246 @@
+"""One-pass conversion of legacy cache entries to the current formats.
+
+Before the packed transcript format, transcript entries were pickles of a
+``{"version": 2, "transcript": [...], "metadata": {...}}`` dict, of a bare
+:class:`VideoTranscriptBundle`, or of a bare list of :class:`TranscriptLine`
+written by the original script. :func:`migrate_cache` rewrites each of them
+as a packed transcript under the same key, moves embedded titles and
+descriptions into the separate metadata entry, and deletes entries that
+cannot be read. Packed transcripts from an older format version (without
+a checksum) are re-encoded as well.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import pickle
+import sys
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..domain.entities import TranscriptLine, VideoMetadata, VideoTranscriptBundle
+from .cache_store import BLOB_NAMESPACE, CacheEntry, CacheStore
+from .transcript_codec import (
+    FORMAT_VERSION,
+    TranscriptFormatError,
+    decode_transcript,
+    encode_transcript,
+    is_packed_transcript,
+    transcript_format_version,
+)
+from .page_archive import PAGE_NAME
+from .transcript_history import is_history_name
+from .transcript_repository import (
+    METADATA_NAME,
+    TRACKS_NAME,
+    UNAVAILABLE_NAME,
+    encode_metadata,
+)
+
+LEGACY_CACHE_VERSION = 2
+
+MIGRATION_CONVERTED = "converted"
+MIGRATION_DELETED = "deleted"
+MIGRATION_UNCHANGED = "unchanged"
+
+MigrationProgress = Callable[[int, int, str, str], None]
+"""Callback receiving ``(done, total, "video_id/name", outcome)`` after each entry."""
+
+# Classes a legacy entry may reference, under any of the module paths ytt used
+# (including ``__main__`` for entries written by the script run directly).
+_LEGACY_CLASSES = {
+    "TranscriptLine": TranscriptLine,
+    "VideoMetadata": VideoMetadata,
+    "VideoTranscriptBundle": VideoTranscriptBundle,
+}
+
+
+@dataclass(frozen=True)
+class LegacyEntry:
+    """Contents recovered from a legacy pickled transcript entry."""
+
+    transcript: List[TranscriptLine]
+    metadata: Optional[VideoMetadata]
+
+
+@dataclass(frozen=True)
+class MigrationResult:
+    """Counts of the legacy entries handled by a migration run."""
+
+    converted: int = 0
+    metadata_extracted: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+    @property
+    def examined(self) -> int:
+        return self.converted + self.deleted + self.unchanged
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Only resolves the ytt entity classes legacy entries were made of."""
+
+    def find_class(self, module: str, name: str):
+        if (module in {"ytt", "__main__"} or module.startswith("ytt.")) and name in _LEGACY_CLASSES:
+            return _LEGACY_CLASSES[name]
+        if (module, name) == ("copyreg", "_reconstructor"):
+            return super().find_class(module, name)
+        if (module, name) in {("builtins", "object"), ("__builtin__", "object")}:
+            return object
+        raise pickle.UnpicklingError(f"unexpected class {module}.{name} in legacy cache entry")
+
+
+def decode_legacy_entry(data) -> Optional[LegacyEntry]:
+    """Decode a legacy pickled transcript entry, or return ``None`` if it is unusable."""
+
+    try:
+        payload = _LegacyUnpickler(io.BytesIO(bytes(data))).load()
+    except Exception:
+        return None
+
+    if isinstance(payload, VideoTranscriptBundle):
+        transcript, metadata = payload.transcript, payload.metadata
+    elif isinstance(payload, dict) and payload.get("version") == LEGACY_CACHE_VERSION:
+        transcript = payload.get("transcript")
+        metadata_dict = payload.get("metadata") or {}
+        if not isinstance(metadata_dict, dict):
+            return None
+        metadata = VideoMetadata(title=metadata_dict.get("title"), description=metadata_dict.get("description"))
+    elif isinstance(payload, list):
+        transcript, metadata = payload, None
+    else:
+        return None
+
+    if not isinstance(transcript, list) or not all(isinstance(line, TranscriptLine) for line in transcript):
+        return None
+    if metadata is not None and metadata.title is None and metadata.description is None:
+        metadata = None
+    return LegacyEntry(transcript=transcript, metadata=metadata)
+
+
+def is_migration_candidate(entry: CacheEntry) -> bool:
+    """Whether ``entry`` holds a transcript, possibly in a legacy format."""
+
+    return (
+        entry.video_id != BLOB_NAMESPACE
+        and entry.name not in (METADATA_NAME, UNAVAILABLE_NAME, TRACKS_NAME, PAGE_NAME)
+        and not is_history_name(entry.name)
+    )
+
+
+def migrate_cache(
+    store: CacheStore,
+    *,
+    workers: int = 4,
+    on_progress: Optional[MigrationProgress] = None,
+) -> MigrationResult:
+    """Convert every legacy entry in ``store`` and delete the unreadable ones.
+
+    Videos are processed concurrently; the entries of one video are handled
+    by the same worker so extracting their metadata does not race.
+    """
+
+    by_video: Dict[str, List[CacheEntry]] = defaultdict(list)
+    for entry in store.entries():
+        if is_migration_candidate(entry):
+            by_video[entry.video_id].append(entry)
+    total = sum(len(entries) for entries in by_video.values())
+    counts = {MIGRATION_CONVERTED: 0, MIGRATION_DELETED: 0, MIGRATION_UNCHANGED: 0}
+    extracted = 0
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_migrate_video, store, entries) for entries in by_video.values()]
+        for future in as_completed(futures):
+            outcomes, video_extracted = future.result()
+            extracted += video_extracted
+            for key, outcome in outcomes:
+                counts[outcome] += 1
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total, key, outcome)
+
+    return MigrationResult(
+        converted=counts[MIGRATION_CONVERTED],
+        metadata_extracted=extracted,
+        deleted=counts[MIGRATION_DELETED],
+        unchanged=counts[MIGRATION_UNCHANGED],
+    )
+
+
+def _migrate_video(store: CacheStore, entries: Sequence[CacheEntry]) -> tuple[List[tuple[str, str]], int]:
+    outcomes = []
+    extracted = 0
+    # Newest first, so the freshest embedded metadata wins.
+    for entry in sorted(entries, key=lambda item: item.stored_at, reverse=True):
+        key = f"{entry.video_id}/{entry.name}"
+        try:
+            outcome, wrote_metadata = _migrate_entry(store, entry)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not migrate cache entry {key}: {exc}", file=sys.stderr)
+            outcome, wrote_metadata = MIGRATION_UNCHANGED, False
+        extracted += wrote_metadata
+        outcomes.append((key, outcome))
+    return outcomes, extracted
+
+
+def _migrate_entry(store: CacheStore, entry: CacheEntry) -> tuple[str, bool]:
+    record = store.get(entry.video_id, entry.name)
+    if record is None:
+        return MIGRATION_UNCHANGED, False
+    if is_packed_transcript(record.data):
+        return _upgrade_packed(store, entry, record), False
+
+    legacy = decode_legacy_entry(record.data)
+    if legacy is None:
+        store.delete(entry.video_id, entry.name)
+        return MIGRATION_DELETED, False
+
+    wrote_metadata = False
+    if legacy.metadata is not None:
+        current = store.get(entry.video_id, METADATA_NAME)
+        if current is None or current.stored_at < record.stored_at or not _is_json(current.data):
+            store.put(entry.video_id, METADATA_NAME, encode_metadata(legacy.metadata), stored_at=record.stored_at)
+            wrote_metadata = True
+    store.put(entry.video_id, entry.name, encode_transcript(legacy.transcript), stored_at=record.stored_at)
+    return MIGRATION_CONVERTED, wrote_metadata
+
+
+def _upgrade_packed(store: CacheStore, entry: CacheEntry, record) -> str:
+    try:
+        if transcript_format_version(record.data) == FORMAT_VERSION:
+            return MIGRATION_UNCHANGED
+        decoded = decode_transcript(record.data)
+        payload = encode_transcript(
+            decoded.lines,
+            language=decoded.language,
+            language_code=decoded.language_code,
+            is_generated=decoded.is_generated,
+        )
+    except (TranscriptFormatError, ValueError, zlib.error):
+        store.delete(entry.video_id, entry.name)
+        return MIGRATION_DELETED
+    store.put(entry.video_id, entry.name, payload, stored_at=record.stored_at)
+    return MIGRATION_CONVERTED
+
+
+def _is_json(data) -> bool:
+    try:
+        json.loads(bytes(data))
+    except ValueError:
+        return False
+    return True
+
+
+__all__ = [
+    "LegacyEntry",
+    "MigrationProgress",
+    "MigrationResult",
+    "decode_legacy_entry",
+    "is_migration_candidate",
+    "migrate_cache",
+]
@@ -0,0 +1,111 @@
+"""Minimal reference cache server for the remote cache tier.
+
+Endpoints (names and video IDs are URL-quoted path segments)::
+
+    GET /entries/<video_id>/<name>   200 with the payload and X-Stored-At, or 404
+    PUT /entries/<video_id>/<name>   store the request body, 204
+    GET /names/<video_id>?prefix=p   200 with a JSON list of entry names
+
+The server is meant for local testing and small trusted networks: it has no
+authentication and stores whatever it is given.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .cache_store import CacheStore, is_valid_key_part
+from .cache_tiers import STORED_AT_HEADER
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class CacheServer(ThreadingHTTPServer):
+    """Threaded HTTP server exposing ``store`` over the cache tier protocol."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], store: CacheStore, *, verbose: bool = False) -> None:
+        super().__init__(address, _CacheRequestHandler)
+        self.store = store
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _CacheRequestHandler(BaseHTTPRequestHandler):
+    server: CacheServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        kind, video_id, name, query = self._parse_path()
+        if kind == "entries" and name is not None:
+            record = self.server.store.get(video_id, name)
+            if record is None:
+                self._send_empty(HTTPStatus.NOT_FOUND)
+                return
+            self._send(HTTPStatus.OK, bytes(record.data), "application/octet-stream", stored_at=record.stored_at)
+        elif kind == "names" and name is None:
+            prefix = query.get("prefix", [""])[0]
+            names = [entry for entry in self.server.store.names(video_id, prefix) if is_valid_key_part(entry)]
+            self._send(HTTPStatus.OK, json.dumps(names).encode("utf-8"), "application/json")
+        else:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+
+    def do_PUT(self) -> None:
+        kind, video_id, name, _query = self._parse_path()
+        if kind != "entries" or name is None:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._send_empty(HTTPStatus.LENGTH_REQUIRED)
+            return
+        if length < 0 or length > MAX_BODY_BYTES:
+            self._send_empty(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        data = self.rfile.read(length)
+        try:
+            stored_at = float(self.headers.get(STORED_AT_HEADER, ""))
+        except ValueError:
+            stored_at = time.time()
+        self.server.store.put(video_id, name, data, stored_at=min(stored_at, time.time()))
+        self._send_empty(HTTPStatus.NO_CONTENT)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - signature from BaseHTTPRequestHandler
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _parse_path(self) -> Tuple[Optional[str], str, Optional[str], dict]:
+        parts = urlsplit(self.path)
+        segments = [unquote(segment) for segment in parts.path.strip("/").split("/")]
+        if len(segments) not in (2, 3) or not all(is_valid_key_part(segment) for segment in segments[1:]):
+            return None, "", None, {}
+        name = segments[2] if len(segments) == 3 else None
+        return segments[0], segments[1], name, parse_qs(parts.query)
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, *, stored_at: Optional[float] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if stored_at is not None:
+            self.send_header(STORED_AT_HEADER, repr(stored_at))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status: HTTPStatus) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+__all__ = ["CacheServer", "MAX_BODY_BYTES"]
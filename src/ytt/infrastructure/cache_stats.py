@@ -0,0 +1,142 @@
+"""Persistent cache usage counters shared by all ytt processes."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .cache_lock import FileKeyLocks
+
+STATS_FILE_NAME = "stats.json"
+STATS_VERSION = 1
+
+COUNTERS = (
+    "hits",
+    "misses",
+    "refreshes",
+    "negative_hits",
+    "bytes_read",
+    "bytes_written",
+    "fetches",
+    "fetch_seconds",
+    "hit_seconds",
+)
+
+
+class CacheStatsRecorder:
+    """Accumulates counters in memory and merges them into ``path``.
+
+    Increments are cheap; pending counts are added to the file at most every
+    ``flush_interval`` seconds and when the process exits. Without a
+    ``path`` the counters only live in memory.
+    """
+
+    def __init__(self, path: Optional[Path] = None, *, flush_interval: float = 30.0) -> None:
+        self._path = path
+        self._flush_interval = flush_interval
+        self._pending: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._file_locks = FileKeyLocks(path.parent / "locks" / "stats", stripes=1) if path else None
+        if path is not None:
+            atexit.register(self.flush)
+
+    @property
+    def path(self) -> Optional[Path]:
+        return self._path
+
+    def add(self, **deltas: float) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                if name not in self._pending:
+                    raise KeyError(f"unknown cache counter: {name}")
+                self._pending[name] += delta
+            self._dirty = True
+            due = time.monotonic() - self._last_flush >= self._flush_interval
+        if due:
+            self.flush()
+
+    def counters(self) -> Dict[str, float]:
+        """Return persisted counters plus the ones not flushed yet."""
+
+        totals = self._read()
+        with self._lock:
+            for name, value in self._pending.items():
+                totals[name] += value
+        return totals
+
+    def flush(self) -> None:
+        if self._path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            pending, self._pending = self._pending, dict.fromkeys(COUNTERS, 0)
+            self._dirty = False
+            self._last_flush = time.monotonic()
+        try:
+            with self._file_locks.hold("stats"):
+                totals = self._read()
+                for name, value in pending.items():
+                    totals[name] += value
+                self._write(totals)
+        except OSError as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not update cache statistics: {exc}", file=sys.stderr)
+            with self._lock:
+                for name, value in pending.items():
+                    self._pending[name] += value
+                self._dirty = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending = dict.fromkeys(COUNTERS, 0)
+            self._dirty = False
+        if self._path is None:
+            return
+        with self._file_locks.hold("stats"):
+            try:
+                self._path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _read(self) -> Dict[str, float]:
+        totals: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+        if self._path is None:
+            return totals
+        try:
+            with open(self._path, "r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except FileNotFoundError:
+            return totals
+        except (OSError, ValueError) as exc:
+            print(f"Warning: Ignoring unreadable cache statistics {self._path}: {exc}", file=sys.stderr)
+            return totals
+        stored = payload.get("counters") if isinstance(payload, dict) else None
+        if isinstance(stored, dict):
+            for name in COUNTERS:
+                value = stored.get(name)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[name] = value
+        return totals
+
+    def _write(self, totals: Dict[str, float]) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_name = tempfile.mkstemp(dir=self._path.parent, prefix=f".{self._path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                json.dump({"version": STATS_VERSION, "counters": totals}, handle, indent=2)
+            os.replace(temp_name, self._path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+
+__all__ = ["COUNTERS", "STATS_FILE_NAME", "CacheStatsRecorder"]
@@ -0,0 +1,1095 @@
+"""Storage backends for cached transcript data."""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import mmap
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Protocol, Sequence
+
+from .cache_index import INDEX_FILE_NAME, CacheIndex
+
+FILE_BACKEND = "file"
+SQLITE_BACKEND = "sqlite"
+CACHE_BACKENDS = (FILE_BACKEND, SQLITE_BACKEND)
+
+SQLITE_FILE_NAME = "cache.sqlite3"
+REFERENCES_FILE_NAME = "references.tsv"
+
+_KEY_PART = re.compile(r"(?!\.+$)[A-Za-z0-9_.\-]{1,200}")
+
+
+# Reserved video ID under which content-addressed payloads are stored.
+BLOB_NAMESPACE = "_blob"
+# A YouTube video ID, followed by the separator of a cache file name stem.
+_YOUTUBE_ID_PREFIX = re.compile(rf"(?!{BLOB_NAMESPACE}_)[A-Za-z0-9_-]{{11}}_")
+
+
+def is_valid_key_part(value: str) -> bool:
+    """Whether ``value`` is safe as a video ID or entry name received from elsewhere."""
+
+    return _KEY_PART.fullmatch(value) is not None
+
+
+@dataclass(frozen=True)
+class CacheRecord:
+    """Raw payload stored under a cache key together with its write time."""
+
+    data: bytes | mmap.mmap
+    stored_at: float
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """Bookkeeping information about a stored entry."""
+
+    video_id: str
+    name: str
+    size: int
+    stored_at: float
+    accessed_at: float
+
+
+class CacheStore(Protocol):
+    """Key/value storage for cache payloads keyed by video ID and entry name."""
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        """Return the record stored under the key or ``None`` when absent."""
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        """Like :meth:`get`, but memory-maps the payload when the backend can."""
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        """Store ``data`` under the key, replacing any previous payload.
+
+        ``stored_at`` preserves the original write time when an entry is
+        copied between stores; it defaults to now.
+        """
+
+    def delete(self, video_id: str, name: str) -> bool:
+        """Remove the entry and report whether it existed."""
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        """List entry names stored for ``video_id`` that start with ``prefix``."""
+
+    def touch(self, video_id: str, name: str) -> None:
+        """Record that the entry was just read."""
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        """Return the write time of the entry without reading its payload, or ``None`` when absent."""
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        """Set the write time of an existing entry without rewriting its payload.
+
+        Returns whether the entry existed; ``stored_at`` defaults to now.
+        """
+
+    def entries(self) -> Iterator[CacheEntry]:
+        """Iterate over bookkeeping information for every stored entry."""
+
+    def collect_garbage(self) -> int:
+        """Remove data no entry refers to any more and return the bytes reclaimed."""
+
+
+class FileCacheStore:
+    """Stores every entry as a separate file below ``cache_dir``.
+
+    Files are sharded into ``<aa>/<b>/`` subdirectories derived from a hash
+    of the video ID, so all entries of a video share one small directory
+    and no directory grows with the size of the cache. Content-addressed
+    blobs (``BLOB_NAMESPACE``) are sharded by their name instead.
+
+    Entries from the earlier flat layout, directly inside ``cache_dir``,
+    are moved into their shard the first time they are accessed. Once a
+    store finds none left, it writes a ``LAYOUT_MARKER`` file, and from
+    then on lookups only touch the shard directories. Entries
+    written before the pickle-free cache format use the ``.pkl`` suffix;
+    they stay readable until they are rewritten or deleted.
+    """
+
+    SUFFIX = ".ytc"
+    LEGACY_SUFFIX = ".pkl"
+    TEMP_SUFFIX = ".tmp"
+    LAYOUT_MARKER = ".sharded"
+    _SUFFIXES = (SUFFIX, LEGACY_SUFFIX)
+    _SHARD = re.compile(r"[0-9a-f]{2}")
+    _SUBSHARD = re.compile(r"[0-9a-f]")
+
+    def __init__(self, cache_dir: Path) -> None:
+        self._cache_dir = cache_dir
+        # Whether flat-layout entries may remain; ``None`` until the store first looks.
+        self._flat: Optional[bool] = None
+        self._flat_lock = threading.Lock()
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    def path_for(self, video_id: str, name: str, suffix: str = SUFFIX) -> Path:
+        return self._shard_dir(video_id, name) / f"{video_id}_{name}{suffix}"
+
+    def flat_path_for(self, video_id: str, name: str, suffix: str = SUFFIX) -> Path:
+        """Location of an entry in the flat layout used before sharding."""
+
+        return self._cache_dir / f"{video_id}_{name}{suffix}"
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        for path in self._existing_paths(video_id, name):
+            try:
+                with open(path, "rb") as handle:
+                    data = handle.read()
+                    stat = os.fstat(handle.fileno())
+            except FileNotFoundError:
+                continue
+            return CacheRecord(data=data, stored_at=stat.st_mtime)
+        return None
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        for path in self._existing_paths(video_id, name):
+            try:
+                with open(path, "rb") as handle:
+                    stat = os.fstat(handle.fileno())
+                    if stat.st_size == 0:
+                        return CacheRecord(data=b"", stored_at=stat.st_mtime)
+                    mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                continue
+            return CacheRecord(data=mapped, stored_at=stat.st_mtime)
+        return None
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        path = self.path_for(video_id, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write a temporary file and rename it over the entry: concurrent
+        # readers see either the old or the new payload, never a partial one,
+        # and existing memory mappings keep the replaced inode alive.
+        descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=self.TEMP_SUFFIX)
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                handle.write(data)
+            if stored_at is not None:
+                os.utime(temp_name, (time.time(), stored_at))
+            os.replace(temp_name, path)
+        except BaseException:
+            self._unlink(Path(temp_name))
+            raise
+        # The new entry supersedes legacy and flat-layout files under the same key.
+        self._unlink(self.path_for(video_id, name, self.LEGACY_SUFFIX))
+        if self._has_flat_entries():
+            for suffix in self._SUFFIXES:
+                self._unlink(self.flat_path_for(video_id, name, suffix))
+
+    def delete(self, video_id: str, name: str) -> bool:
+        deleted = False
+        flat = self._has_flat_entries()
+        for suffix in self._SUFFIXES:
+            deleted |= self._unlink(self.path_for(video_id, name, suffix))
+            if flat:
+                deleted |= self._unlink(self.flat_path_for(video_id, name, suffix))
+        return deleted
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        stem = f"{video_id}_"
+        names = set()
+        flat = self._has_flat_entries()
+        for suffix in self._SUFFIXES:
+            pattern = glob.escape(f"{stem}{prefix}") + "*" + suffix
+            for path in self._cache_dir.glob(pattern) if flat else ():
+                name = path.name[len(stem) : -len(suffix)]
+                self._migrate(path, self.path_for(video_id, name, suffix))
+                names.add(name)
+            for directory in self._shard_dirs(video_id, prefix):
+                names.update(path.name[len(stem) : -len(suffix)] for path in directory.glob(pattern))
+        return sorted(names)
+
+    def touch(self, video_id: str, name: str) -> None:
+        for path in self._existing_paths(video_id, name):
+            try:
+                stat = path.stat()
+                os.utime(path, (time.time(), stat.st_mtime))
+            except FileNotFoundError:
+                continue
+            return
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        for path in self._existing_paths(video_id, name):
+            try:
+                return path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+        return None
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        for path in self._existing_paths(video_id, name):
+            try:
+                stat = path.stat()
+                os.utime(path, (stat.st_atime, stored_at if stored_at is not None else time.time()))
+            except FileNotFoundError:
+                continue
+            return True
+        return False
+
+    def entries(self) -> Iterator[CacheEntry]:
+        yield from self._scan_entries(self._cache_dir, shards=True)
+
+    def collect_garbage(self) -> int:
+        return 0
+
+    def _shard_dir(self, video_id: str, name: str) -> Path:
+        if video_id == BLOB_NAMESPACE and re.fullmatch(r"[0-9a-f]{3,}", name):
+            key = name
+        else:
+            key = hashlib.sha1(video_id.encode("utf-8")).hexdigest()
+        return self._cache_dir / key[:2] / key[2]
+
+    def _shard_dirs(self, video_id: str, prefix: str) -> List[Path]:
+        if video_id != BLOB_NAMESPACE or re.fullmatch(r"[0-9a-f]{3,}", prefix):
+            return [self._shard_dir(video_id, prefix)]
+        # A short blob prefix does not pin down a shard.
+        return [path for path in self._cache_dir.glob("*/*") if self._is_shard(path)]
+
+    def _existing_paths(self, video_id: str, name: str) -> Iterator[Path]:
+        """Yield candidate files for a key, moving flat-layout files into their shard."""
+
+        check_flat = self._has_flat_entries()
+        for suffix in self._SUFFIXES:
+            path = self.path_for(video_id, name, suffix)
+            if check_flat:
+                flat = self.flat_path_for(video_id, name, suffix)
+                if not path.exists() and flat.exists() and not self._migrate(flat, path):
+                    yield flat
+                    continue
+            yield path
+
+    def _has_flat_entries(self) -> bool:
+        """Whether flat-layout entries may remain, decided once per store."""
+
+        if self._flat is None:
+            with self._flat_lock:
+                if self._flat is None:
+                    self._flat = self._find_flat_entries()
+        return self._flat
+
+    def _note_flat_entry(self) -> None:
+        # Written by an older version after the marker was; look for flat files again.
+        with self._flat_lock:
+            if self._flat is not True:
+                self._flat = True
+                self._unlink(self._cache_dir / self.LAYOUT_MARKER)
+
+    def _find_flat_entries(self) -> bool:
+        marker = self._cache_dir / self.LAYOUT_MARKER
+        if marker.exists():
+            return False
+        try:
+            scanner = os.scandir(self._cache_dir)
+        except FileNotFoundError:
+            return False
+        with scanner:
+            if any(entry.name.endswith(self._SUFFIXES) and entry.is_file() for entry in scanner):
+                # Migrated key by key as they are accessed; a later process writes the marker.
+                return True
+        try:
+            marker.touch()
+        except OSError:
+            pass
+        return False
+
+    @staticmethod
+    def _migrate(source: Path, target: Path) -> bool:
+        # ``os.replace`` keeps timestamps, and a concurrent migration of the
+        # same file simply finds it gone. Read-only directories keep their
+        # flat layout.
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        return True
+
+    def _is_shard(self, path: Path) -> bool:
+        return (
+            self._SUBSHARD.fullmatch(path.name) is not None
+            and self._SHARD.fullmatch(path.parent.name) is not None
+            and path.parent.parent == self._cache_dir
+        )
+
+    def _scan_entries(self, directory: Path, *, shards: bool, depth: int = 0) -> Iterator[CacheEntry]:
+        try:
+            scanner = os.scandir(directory)
+        except FileNotFoundError:
+            return
+        with scanner:
+            for dir_entry in scanner:
+                if shards and depth < 2 and dir_entry.is_dir(follow_symlinks=False):
+                    pattern = self._SHARD if depth == 0 else self._SUBSHARD
+                    if pattern.fullmatch(dir_entry.name):
+                        yield from self._scan_entries(Path(dir_entry.path), shards=depth == 0, depth=depth + 1)
+                    continue
+                suffix = next((s for s in self._SUFFIXES if dir_entry.name.endswith(s)), None)
+                if suffix is None or not dir_entry.is_file():
+                    continue
+                if shards and depth == 0:
+                    self._note_flat_entry()
+                video_id, name = self._split_stem(dir_entry.name[: -len(suffix)])
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield CacheEntry(
+                    video_id=video_id,
+                    name=name,
+                    size=stat.st_size,
+                    stored_at=stat.st_mtime,
+                    accessed_at=max(stat.st_atime, stat.st_mtime),
+                )
+
+    @staticmethod
+    def _split_stem(stem: str) -> tuple[str, str]:
+        """Split a file name stem into its video ID and entry name."""
+
+        # Both may contain underscores: YouTube IDs, and legacy keys such as ``de_en``
+        # for several preferred languages. An 11-character YouTube ID is taken whole.
+        if _YOUTUBE_ID_PREFIX.match(stem) and len(stem) > 12:
+            return stem[:11], stem[12:]
+        # Other IDs, such as the blob namespace, end at the last underscore.
+        video_id, _, name = stem.rpartition("_")
+        return video_id, name
+
+    @staticmethod
+    def _unlink(path: Path) -> bool:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+
+class SqliteCacheStore:
+    """Stores all entries in a single SQLite database using WAL journaling."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            video_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (video_id, name)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, database_path: Path, *, timeout: float = 30.0) -> None:
+        self._database_path = database_path
+        self._timeout = timeout
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @property
+    def database_path(self) -> Path:
+        return self._database_path
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        row = self._connection().execute(
+            "SELECT payload, stored_at FROM entries WHERE video_id = ? AND name = ?",
+            (video_id, name),
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheRecord(data=bytes(row[0]), stored_at=row[1])
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        # Blobs live inside the database file and cannot be mapped individually.
+        return self.get(video_id, name)
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (video_id, name, payload, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, name, sqlite3.Binary(data), len(data), stored_at or now, now),
+            )
+
+    def delete(self, video_id: str, name: str) -> bool:
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM entries WHERE video_id = ? AND name = ?",
+                (video_id, name),
+            )
+        return cursor.rowcount > 0
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        rows = self._connection().execute(
+            "SELECT name FROM entries WHERE video_id = ? AND name >= ? AND name < ? ORDER BY name",
+            (video_id, prefix, prefix + "\U0010ffff"),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def touch(self, video_id: str, name: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "UPDATE entries SET accessed_at = ? WHERE video_id = ? AND name = ?",
+                (time.time(), video_id, name),
+            )
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        row = self._connection().execute(
+            "SELECT stored_at FROM entries WHERE video_id = ? AND name = ?",
+            (video_id, name),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                "UPDATE entries SET stored_at = ? WHERE video_id = ? AND name = ?",
+                (stored_at or time.time(), video_id, name),
+            )
+        return cursor.rowcount > 0
+
+    def entries(self) -> Iterator[CacheEntry]:
+        rows = self._connection().execute(
+            "SELECT video_id, name, size, stored_at, accessed_at FROM entries"
+        ).fetchall()
+        for row in rows:
+            yield CacheEntry(*row)
+
+    def collect_garbage(self) -> int:
+        return 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self._database_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._database_path, timeout=self._timeout)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._ensure_schema(connection)
+            self._local.connection = connection
+        return connection
+
+    def _ensure_schema(self, connection: sqlite3.Connection) -> None:
+        with self._init_lock:
+            if self._initialized:
+                return
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(self._SCHEMA)
+            self._initialized = True
+
+
+class MemoryCacheStore:
+    """In-process LRU store bounded by entry count and payload bytes.
+
+    Memory-mapped payloads are copied into ``bytes`` so that held entries
+    do not keep cache files (and their descriptors) open.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._records: "OrderedDict[tuple[str, str], CacheRecord]" = OrderedDict()
+        self._accessed_at: Dict[tuple[str, str], float] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        key = (video_id, name)
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                self._records.move_to_end(key)
+            return record
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self.get(video_id, name)
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        key = (video_id, name)
+        now = time.time()
+        payload = data if isinstance(data, bytes) else bytes(data)
+        size = len(payload)
+        with self._lock:
+            self._discard(key)
+            if size > self._max_bytes or self._max_entries <= 0:
+                return
+            self._records[key] = CacheRecord(data=payload, stored_at=stored_at or now)
+            self._accessed_at[key] = now
+            self._total_bytes += size
+            while len(self._records) > self._max_entries or self._total_bytes > self._max_bytes:
+                self._discard(next(iter(self._records)))
+
+    def delete(self, video_id: str, name: str) -> bool:
+        with self._lock:
+            return self._discard((video_id, name))
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        with self._lock:
+            return sorted(
+                name for key_video_id, name in self._records if key_video_id == video_id and name.startswith(prefix)
+            )
+
+    def touch(self, video_id: str, name: str) -> None:
+        key = (video_id, name)
+        with self._lock:
+            if key in self._records:
+                self._records.move_to_end(key)
+                self._accessed_at[key] = time.time()
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        with self._lock:
+            record = self._records.get((video_id, name))
+            return None if record is None else record.stored_at
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        key = (video_id, name)
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                return False
+            self._records[key] = CacheRecord(data=record.data, stored_at=stored_at or time.time())
+            return True
+
+    def entries(self) -> Iterator[CacheEntry]:
+        with self._lock:
+            snapshot = [
+                CacheEntry(
+                    video_id=video_id,
+                    name=name,
+                    size=len(record.data),
+                    stored_at=record.stored_at,
+                    accessed_at=self._accessed_at[(video_id, name)],
+                )
+                for (video_id, name), record in self._records.items()
+            ]
+        return iter(snapshot)
+
+    def collect_garbage(self) -> int:
+        return 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._accessed_at.clear()
+            self._total_bytes = 0
+
+    def _discard(self, key: tuple[str, str]) -> bool:
+        record = self._records.pop(key, None)
+        if record is None:
+            return False
+        self._accessed_at.pop(key, None)
+        self._total_bytes -= len(record.data)
+        return True
+
+
+class TieredCacheStore:
+    """Reads through an ordered list of stores, fastest first.
+
+    Hits in a lower tier are promoted into every tier above it; writes and
+    deletes go to all tiers. Bookkeeping (``entries``) reports the lowest,
+    most durable tier's view of each entry.
+
+    A hit in a :class:`MemoryCacheStore` tier is served only while the
+    tier below still holds the entry with the same write time, so entries
+    that another process has rewritten or deleted are read again.
+
+    Non-empty name listings are remembered for up to ``max_listings``
+    videos and ``listing_ttl`` seconds, and invalidated sooner by writes
+    and deletes made through this store, so a hot video does not rescan
+    the cache directory on every lookup. Empty listings are not
+    remembered: a miss always looks again and sees entries that another
+    process has just written.
+    """
+
+    def __init__(
+        self, tiers: Sequence[CacheStore], *, max_listings: int = 1024, listing_ttl: float = 2.0
+    ) -> None:
+        if not tiers:
+            raise ValueError("TieredCacheStore needs at least one tier")
+        self._tiers = list(tiers)
+        self._max_listings = max_listings
+        self._listing_ttl = listing_ttl
+        self._listings: "OrderedDict[tuple[str, str], tuple[float, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def tiers(self) -> List[CacheStore]:
+        return list(self._tiers)
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._read_through(video_id, name, mapped=False)
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._read_through(video_id, name, mapped=True)
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        # One write time for every tier, so memory hits can be checked against the disk.
+        stored_at = stored_at if stored_at is not None else time.time()
+        for tier in self._tiers:
+            tier.put(video_id, name, data, stored_at=stored_at)
+        self._forget_listings(video_id)
+
+    def delete(self, video_id: str, name: str) -> bool:
+        deleted = False
+        for tier in self._tiers:
+            deleted |= tier.delete(video_id, name)
+        self._forget_listings(video_id)
+        return deleted
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        key = (video_id, prefix)
+        now = time.monotonic()
+        with self._lock:
+            remembered = self._listings.get(key)
+            if remembered is not None and now - remembered[0] < self._listing_ttl:
+                self._listings.move_to_end(key)
+                return list(remembered[1])
+        names = set()
+        for tier in self._tiers:
+            names.update(tier.names(video_id, prefix))
+        listing = sorted(names)
+        with self._lock:
+            if listing and self._max_listings > 0:
+                self._listings[key] = (now, listing)
+                self._listings.move_to_end(key)
+                while len(self._listings) > self._max_listings:
+                    self._listings.popitem(last=False)
+        return list(listing)
+
+    def touch(self, video_id: str, name: str) -> None:
+        for tier in self._tiers:
+            tier.touch(video_id, name)
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        for tier in self._tiers:
+            stored_at = tier.stored_at(video_id, name)
+            if stored_at is not None:
+                return stored_at
+        return None
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        stored_at = stored_at if stored_at is not None else time.time()
+        restamped = False
+        for tier in self._tiers:
+            restamped |= tier.restamp(video_id, name, stored_at)
+        return restamped
+
+    def entries(self) -> Iterator[CacheEntry]:
+        seen: Dict[tuple[str, str], CacheEntry] = {}
+        for tier in self._tiers:
+            for entry in tier.entries():
+                seen[(entry.video_id, entry.name)] = entry
+        return iter(list(seen.values()))
+
+    def collect_garbage(self) -> int:
+        return sum(tier.collect_garbage() for tier in self._tiers)
+
+    def _forget_listings(self, video_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._listings if key[0] == video_id]:
+                del self._listings[key]
+
+    def _is_current(self, index: int, video_id: str, name: str, record: CacheRecord) -> bool:
+        """Whether the tier below ``index`` holds the entry with ``record``'s write time."""
+
+        if index + 1 >= len(self._tiers):
+            return True
+        stored_at = self._tiers[index + 1].stored_at(video_id, name)
+        # File modification times round the write time to the file system's resolution.
+        return stored_at is not None and abs(stored_at - record.stored_at) < 0.001
+
+    def _read_through(self, video_id: str, name: str, *, mapped: bool) -> Optional[CacheRecord]:
+        for index, tier in enumerate(self._tiers):
+            record = tier.get_mapped(video_id, name) if mapped else tier.get(video_id, name)
+            if record is None:
+                continue
+            if isinstance(tier, MemoryCacheStore) and not self._is_current(index, video_id, name, record):
+                tier.delete(video_id, name)
+                continue
+            for upper in self._tiers[:index]:
+                upper.put(video_id, name, record.data, stored_at=record.stored_at)
+            return record
+        return None
+
+
+class DeduplicatingCacheStore:
+    """Stores transcript payloads once, addressed by their SHA-256 digest.
+
+    Entries whose names start with one of ``prefixes`` are written as a
+    small reference to a blob kept in the wrapped store under the reserved
+    ``BLOB_VIDEO_ID``; identical payloads share one blob, unless the stored
+    blob no longer matches its digest. Writing a payload identical to the
+    one already stored under a key only updates the entry's write time.
+    Other entries pass through.
+
+    Reference counts are derived by scanning the references rather than
+    stored, so concurrent processes cannot corrupt them. :meth:`entries`
+    attributes an equal share of each blob to every entry referring to it,
+    and :meth:`collect_garbage` deletes blobs that no entry refers to once
+    they have not been used for ``grace_period`` seconds.
+
+    A scan needs the digest each reference holds. With a ``journal``, the
+    digest of every reference written is appended to that file together
+    with the reference's write time, one ``<video_id>\t<name>\t<stored_at>\t<digest>``
+    line each, so a scan in a new process only reads the references whose
+    write time differs from the journal's. The journal is shared by all
+    processes and compacted by :meth:`collect_garbage`.
+    """
+
+    BLOB_VIDEO_ID = BLOB_NAMESPACE
+    REFERENCE_MAGIC = b"YTTREF\x01"
+    _REFERENCE_SIZE = len(REFERENCE_MAGIC) + 64
+
+    def __init__(
+        self,
+        inner: CacheStore,
+        *,
+        prefixes: Sequence[str] = ("transcript.",),
+        grace_period: float = 600.0,
+        journal: Optional[Path] = None,
+    ) -> None:
+        self._inner = inner
+        self._prefixes = tuple(prefixes)
+        self._grace_period = grace_period
+        # Digest of every reference seen, keyed by entry and its write time.
+        self._digests: Dict[tuple[str, str], tuple[float, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._journal = journal
+        self._journal_offset = 0
+        self._journal_lines = 0
+        self._journal_identity: Optional[tuple[int, int]] = None
+
+    @property
+    def inner(self) -> CacheStore:
+        return self._inner
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._resolve(self._inner.get(video_id, name), mapped=False)
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._resolve(self._inner.get_mapped(video_id, name), mapped=True)
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        payload = bytes(data)
+        digest = None
+        if name.startswith(self._prefixes) and len(payload) > self._REFERENCE_SIZE:
+            digest = hashlib.sha256(payload).hexdigest()
+            if self._holds_blob(digest):
+                # Keeps a blob that is about to gain a reference out of garbage collection.
+                self._inner.touch(self.BLOB_VIDEO_ID, digest)
+            else:
+                self._inner.put(self.BLOB_VIDEO_ID, digest, payload)
+            payload = self.REFERENCE_MAGIC + digest.encode("ascii")
+        current = self._inner.get(video_id, name)
+        if not (
+            current is not None and bytes(current.data) == payload and self._inner.restamp(video_id, name, stored_at)
+        ):
+            self._inner.put(video_id, name, payload, stored_at=stored_at)
+        if digest is not None:
+            self._remember_written(video_id, name, digest)
+
+    def delete(self, video_id: str, name: str) -> bool:
+        return self._inner.delete(video_id, name)
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        return self._inner.names(video_id, prefix)
+
+    def touch(self, video_id: str, name: str) -> None:
+        self._inner.touch(video_id, name)
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        return self._inner.stored_at(video_id, name)
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        if not self._inner.restamp(video_id, name, stored_at):
+            return False
+        with self._lock:
+            known = self._digests.get((video_id, name))
+        if known is not None and known[1] is not None:
+            self._remember_written(video_id, name, known[1])
+        return True
+
+    def entries(self) -> Iterator[CacheEntry]:
+        entries, blobs, references = self._scan()
+        shares: Dict[str, int] = {}
+        for digest in references.values():
+            shares[digest] = shares.get(digest, 0) + 1
+        for entry in entries:
+            digest = references.get((entry.video_id, entry.name))
+            if digest is not None and digest in blobs:
+                entry = replace(entry, size=entry.size + blobs[digest].size // shares[digest])
+            yield entry
+        for digest, blob in blobs.items():
+            if digest not in shares:
+                yield blob
+
+    def collect_garbage(self) -> int:
+        reclaimed = self._inner.collect_garbage()
+        entries, blobs, references = self._scan()
+        self._compact_journal(entries, references)
+        referenced = set(references.values())
+        now = time.time()
+        for digest, blob in blobs.items():
+            if digest in referenced or now - blob.accessed_at < self._grace_period:
+                continue
+            if self._inner.delete(self.BLOB_VIDEO_ID, digest):
+                reclaimed += blob.size
+        return reclaimed
+
+    def _resolve(self, record: Optional[CacheRecord], *, mapped: bool) -> Optional[CacheRecord]:
+        if record is None:
+            return None
+        digest = self._reference_digest(record.data)
+        if digest is None:
+            return record
+        if mapped:
+            blob = self._inner.get_mapped(self.BLOB_VIDEO_ID, digest)
+        else:
+            blob = self._inner.get(self.BLOB_VIDEO_ID, digest)
+        if blob is None:
+            return None
+        return CacheRecord(data=blob.data, stored_at=record.stored_at)
+
+    def _holds_blob(self, digest: str) -> bool:
+        """Whether an intact blob for ``digest`` exists; a damaged one is rewritten by the caller."""
+
+        if not self._inner.names(self.BLOB_VIDEO_ID, digest):
+            return False
+        blob = self._inner.get(self.BLOB_VIDEO_ID, digest)
+        return blob is not None and hashlib.sha256(bytes(blob.data)).hexdigest() == digest
+
+    def _reference_digest(self, data) -> Optional[str]:
+        if len(data) != self._REFERENCE_SIZE or bytes(data[: len(self.REFERENCE_MAGIC)]) != self.REFERENCE_MAGIC:
+            return None
+        return bytes(data[len(self.REFERENCE_MAGIC) :]).decode("ascii")
+
+    def _scan(self) -> tuple[List[CacheEntry], Dict[str, CacheEntry], Dict[tuple[str, str], str]]:
+        entries: List[CacheEntry] = []
+        blobs: Dict[str, CacheEntry] = {}
+        references: Dict[tuple[str, str], str] = {}
+        learned: List[str] = []
+        self._read_journal()
+        for entry in self._inner.entries():
+            if entry.video_id == self.BLOB_VIDEO_ID:
+                blobs[entry.name] = entry
+                continue
+            entries.append(entry)
+            if entry.size == self._REFERENCE_SIZE and entry.name.startswith(self._prefixes):
+                digest = self._cached_digest(entry, learned)
+                if digest is not None:
+                    references[(entry.video_id, entry.name)] = digest
+        self._append_journal(learned)
+        return entries, blobs, references
+
+    def _cached_digest(self, entry: CacheEntry, learned: List[str]) -> Optional[str]:
+        key = (entry.video_id, entry.name)
+        with self._lock:
+            cached = self._digests.get(key)
+        if cached is not None and cached[0] == entry.stored_at:
+            return cached[1]
+        record = self._inner.get(entry.video_id, entry.name)
+        digest = self._reference_digest(record.data) if record is not None else None
+        with self._lock:
+            self._digests[key] = (entry.stored_at, digest)
+        if digest is not None:
+            learned.append(self._journal_line(entry.video_id, entry.name, entry.stored_at, digest))
+        return digest
+
+    def _remember_written(self, video_id: str, name: str, digest: str) -> None:
+        stored_at = self._inner.stored_at(video_id, name)
+        if stored_at is None:
+            return
+        with self._lock:
+            self._digests[(video_id, name)] = (stored_at, digest)
+        self._append_journal([self._journal_line(video_id, name, stored_at, digest)])
+
+    @staticmethod
+    def _journal_line(video_id: str, name: str, stored_at: float, digest: str) -> str:
+        return f"{video_id}\t{name}\t{stored_at!r}\t{digest}\n"
+
+    def _read_journal(self) -> None:
+        """Learn the digests appended to the journal since it was last read."""
+
+        if self._journal is None:
+            return
+        try:
+            handle = open(self._journal, "rb")
+        except FileNotFoundError:
+            return
+        with self._lock, handle:
+            stat = os.fstat(handle.fileno())
+            identity = (stat.st_dev, stat.st_ino)
+            if identity != self._journal_identity or stat.st_size < self._journal_offset:
+                self._journal_identity = identity
+                self._journal_offset = 0
+                self._journal_lines = 0
+            handle.seek(self._journal_offset)
+            chunk = handle.read()
+            # A concurrent appender may not have finished its line yet.
+            complete = chunk[: chunk.rfind(b"\n") + 1]
+            self._journal_offset += len(complete)
+            for line in complete.decode("utf-8", errors="replace").splitlines():
+                fields = line.split("\t")
+                self._journal_lines += 1
+                if len(fields) != 4 or not re.fullmatch(r"[0-9a-f]{64}", fields[3]):
+                    continue
+                try:
+                    self._digests[(fields[0], fields[1])] = (float(fields[2]), fields[3])
+                except ValueError:
+                    continue
+
+    def _append_journal(self, lines: List[str]) -> None:
+        if self._journal is None or not lines:
+            return
+        try:
+            descriptor = os.open(self._journal, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(descriptor, "".join(lines).encode("utf-8"))
+            finally:
+                os.close(descriptor)
+        except OSError:  # pragma: no cover - defensive
+            # Without the journal, the digests are read from the references again.
+            pass
+
+    def _compact_journal(self, entries: List[CacheEntry], references: Dict[tuple[str, str], str]) -> None:
+        """Rewrite the journal with only the live references once it is mostly stale."""
+
+        if self._journal is None or self._journal_lines <= max(1024, 2 * len(references)):
+            return
+        stamps = {(entry.video_id, entry.name): entry.stored_at for entry in entries}
+        lines = [
+            self._journal_line(video_id, name, stamps[video_id, name], digest)
+            for (video_id, name), digest in references.items()
+        ]
+        try:
+            descriptor, temp_name = tempfile.mkstemp(
+                dir=self._journal.parent, prefix=f".{self._journal.name}.", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                    handle.writelines(lines)
+                os.replace(temp_name, self._journal)
+            except BaseException:
+                Path(temp_name).unlink(missing_ok=True)
+                raise
+        except OSError:  # pragma: no cover - defensive
+            return
+        with self._lock:
+            # Lines appended by other processes since the scan are lost; those digests are read again.
+            self._journal_identity = None
+            self._journal_offset = 0
+            self._journal_lines = 0
+
+
+class IndexedCacheStore:
+    """Records every write and delete made through it in a :class:`CacheIndex`.
+
+    Sizes in the index are those of the payloads as written, before any
+    deduplication by the wrapped store.
+    """
+
+    def __init__(self, inner: CacheStore, index: CacheIndex) -> None:
+        self._inner = inner
+        self._index = index
+
+    @property
+    def inner(self) -> CacheStore:
+        return self._inner
+
+    @property
+    def index(self) -> CacheIndex:
+        return self._index
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._inner.get(video_id, name)
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._inner.get_mapped(video_id, name)
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        self._inner.put(video_id, name, data, stored_at=stored_at)
+        self._index.record_put(video_id, name, len(data), stored_at if stored_at is not None else time.time())
+
+    def delete(self, video_id: str, name: str) -> bool:
+        deleted = self._inner.delete(video_id, name)
+        if deleted:
+            self._index.record_delete(video_id, name)
+        return deleted
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        return self._inner.names(video_id, prefix)
+
+    def touch(self, video_id: str, name: str) -> None:
+        self._inner.touch(video_id, name)
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        return self._inner.stored_at(video_id, name)
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        stored_at = stored_at if stored_at is not None else time.time()
+        if not self._inner.restamp(video_id, name, stored_at):
+            return False
+        for entry in self._index.lookup(video_id):
+            if entry.name == name:
+                self._index.record_put(video_id, name, entry.size, stored_at)
+        return True
+
+    def entries(self) -> Iterator[CacheEntry]:
+        return self._inner.entries()
+
+    def collect_garbage(self) -> int:
+        return self._inner.collect_garbage()
+
+
+def create_cache_store(backend: str, cache_dir: Path) -> CacheStore:
+    """Build the cache store selected by ``backend`` rooted at ``cache_dir``.
+
+    Transcript payloads are deduplicated by content in either backend, and
+    writes and deletes are recorded in the index file in ``cache_dir``.
+    """
+
+    if backend == SQLITE_BACKEND:
+        store: CacheStore = DeduplicatingCacheStore(
+            SqliteCacheStore(cache_dir / SQLITE_FILE_NAME), journal=cache_dir / REFERENCES_FILE_NAME
+        )
+    elif backend == FILE_BACKEND:
+        store = DeduplicatingCacheStore(FileCacheStore(cache_dir), journal=cache_dir / REFERENCES_FILE_NAME)
+    else:
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return IndexedCacheStore(store, CacheIndex(cache_dir / INDEX_FILE_NAME))
+
+
+__all__ = [
+    "BLOB_NAMESPACE",
+    "CACHE_BACKENDS",
+    "FILE_BACKEND",
+    "REFERENCES_FILE_NAME",
+    "SQLITE_BACKEND",
+    "CacheEntry",
+    "CacheRecord",
+    "CacheStore",
+    "DeduplicatingCacheStore",
+    "FileCacheStore",
+    "IndexedCacheStore",
+    "MemoryCacheStore",
+    "SqliteCacheStore",
+    "TieredCacheStore",
+    "create_cache_store",
+]
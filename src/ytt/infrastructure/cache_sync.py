@@ -0,0 +1,258 @@
+"""Manifest-based export and import of cache entries between machines.
+
+An export bundle is a directory holding ``manifest.json`` and the payloads
+under ``objects/<sha256[:2]>/<sha256>``::
+
+    {"version": 1, "entries": [
+        {"video_id": "...", "name": "...", "sha256": "...", "stored_at": 1.0, "size": 123}
+    ]}
+
+Objects are immutable and named by content, so copying a bundle with rsync
+only transfers payloads the other side does not have yet. Entries are
+compared by ``stored_at``: an entry is only exported or imported when the
+other side lacks it or holds an older copy.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from .cache_store import CacheStore, DeduplicatingCacheStore, is_valid_key_part
+
+MANIFEST_FILE_NAME = "manifest.json"
+OBJECTS_DIR_NAME = "objects"
+MANIFEST_VERSION = 1
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+class ManifestError(ValueError):
+    """Raised when a manifest cannot be read or is malformed."""
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """A cache key together with the digest and write time of its payload."""
+
+    video_id: str
+    name: str
+    sha256: str
+    stored_at: float
+    size: int
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.video_id, self.name)
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    """Counts of the entries handled by an export or import."""
+
+    transferred: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes: int = 0
+
+
+def build_manifest(store: CacheStore, *, reuse: Iterable[ManifestEntry] = ()) -> List[ManifestEntry]:
+    """Describe every entry in ``store``.
+
+    Digests from ``reuse`` are kept for entries whose ``stored_at`` is
+    unchanged, so their payloads are not read again.
+    """
+
+    known = {entry.key: entry for entry in reuse}
+    manifest: List[ManifestEntry] = []
+    for entry in _local_entries(store):
+        previous = known.get((entry.video_id, entry.name))
+        if previous is not None and previous.stored_at == entry.stored_at:
+            manifest.append(previous)
+            continue
+        record = store.get(entry.video_id, entry.name)
+        if record is None:
+            continue
+        data = bytes(record.data)
+        manifest.append(
+            ManifestEntry(
+                video_id=entry.video_id,
+                name=entry.name,
+                sha256=hashlib.sha256(data).hexdigest(),
+                stored_at=record.stored_at,
+                size=len(data),
+            )
+        )
+    return sorted(manifest, key=lambda item: item.key)
+
+
+def read_manifest(path: Path) -> List[ManifestEntry]:
+    """Read a manifest file, or the manifest of a bundle directory."""
+
+    if path.is_dir():
+        path = path / MANIFEST_FILE_NAME
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError) as exc:
+        raise ManifestError(f"Could not read manifest {path}: {exc}") from exc
+    if not isinstance(payload, dict) or payload.get("version") != MANIFEST_VERSION:
+        raise ManifestError(f"Unsupported manifest format in {path}")
+    try:
+        entries = [
+            ManifestEntry(
+                video_id=str(item["video_id"]),
+                name=str(item["name"]),
+                sha256=str(item["sha256"]),
+                stored_at=float(item["stored_at"]),
+                size=int(item["size"]),
+            )
+            for item in payload.get("entries", [])
+        ]
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ManifestError(f"Malformed manifest entry in {path}: {exc}") from exc
+    for entry in entries:
+        if not _DIGEST.fullmatch(entry.sha256):
+            raise ManifestError(f"Malformed digest {entry.sha256!r} in {path}")
+    return entries
+
+
+def dump_manifest(entries: Iterable[ManifestEntry]) -> str:
+    return json.dumps({"version": MANIFEST_VERSION, "entries": [asdict(entry) for entry in entries]}, indent=1)
+
+
+def write_manifest(path: Path, entries: Iterable[ManifestEntry]) -> None:
+    _write_atomic(path, dump_manifest(entries).encode("utf-8"))
+
+
+def export_cache(
+    store: CacheStore,
+    destination: Path,
+    *,
+    against: Optional[Iterable[ManifestEntry]] = None,
+) -> SyncResult:
+    """Write the entries of ``store`` into the bundle at ``destination``.
+
+    Entries that ``against`` (the other machine's manifest) already holds in
+    the same or a newer version are left out. Exporting into an existing
+    bundle reuses its objects and only writes new payloads; objects no
+    longer listed are removed.
+    """
+
+    manifest_path = destination / MANIFEST_FILE_NAME
+    previous = read_manifest(manifest_path) if manifest_path.exists() else []
+    remote = {entry.key: entry.stored_at for entry in against or ()}
+
+    selected: List[ManifestEntry] = []
+    transferred = skipped = failed = written_bytes = 0
+    for entry in build_manifest(store, reuse=previous):
+        if remote.get(entry.key, float("-inf")) >= entry.stored_at:
+            skipped += 1
+            continue
+        object_path = _object_path(destination, entry.sha256)
+        if not object_path.exists():
+            record = store.get(entry.video_id, entry.name)
+            data = bytes(record.data) if record is not None else None
+            if data is None or hashlib.sha256(data).hexdigest() != entry.sha256:
+                # Changed or vanished since the manifest was built.
+                failed += 1
+                continue
+            _write_atomic(object_path, data)
+            written_bytes += len(data)
+        selected.append(entry)
+        transferred += 1
+
+    write_manifest(manifest_path, selected)
+    _remove_unlisted_objects(destination, {entry.sha256 for entry in selected})
+    return SyncResult(transferred=transferred, skipped=skipped, failed=failed, bytes=written_bytes)
+
+
+def import_cache(store: CacheStore, source: Path) -> SyncResult:
+    """Merge the bundle at ``source`` into ``store``.
+
+    Entries are only written when the store lacks them or holds an older
+    copy; they keep the ``stored_at`` recorded in the manifest. Objects
+    whose digest does not match are reported and skipped.
+    """
+
+    local = {(entry.video_id, entry.name): entry.stored_at for entry in _local_entries(store)}
+    transferred = skipped = failed = read_bytes = 0
+    for entry in read_manifest(source / MANIFEST_FILE_NAME):
+        if not (is_valid_key_part(entry.video_id) and is_valid_key_part(entry.name)):
+            print(f"Warning: Skipping invalid cache key {entry.video_id!r}/{entry.name!r}", file=sys.stderr)
+            failed += 1
+            continue
+        if entry.video_id == DeduplicatingCacheStore.BLOB_VIDEO_ID:
+            skipped += 1
+            continue
+        if local.get(entry.key, float("-inf")) >= entry.stored_at:
+            skipped += 1
+            continue
+        try:
+            data = _object_path(source, entry.sha256).read_bytes()
+        except (OSError, ValueError) as exc:
+            print(f"Warning: Missing payload for {entry.video_id}/{entry.name}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        if hashlib.sha256(data).hexdigest() != entry.sha256:
+            print(f"Warning: Corrupt payload for {entry.video_id}/{entry.name}; skipping it.", file=sys.stderr)
+            failed += 1
+            continue
+        store.put(entry.video_id, entry.name, data, stored_at=entry.stored_at)
+        transferred += 1
+        read_bytes += len(data)
+    return SyncResult(transferred=transferred, skipped=skipped, failed=failed, bytes=read_bytes)
+
+
+def _local_entries(store: CacheStore):
+    for entry in store.entries():
+        if entry.video_id != DeduplicatingCacheStore.BLOB_VIDEO_ID:
+            yield entry
+
+
+def _object_path(bundle: Path, digest: str) -> Path:
+    if not _DIGEST.fullmatch(digest):
+        raise ValueError(f"invalid object digest: {digest!r}")
+    return bundle / OBJECTS_DIR_NAME / digest[:2] / digest
+
+
+def _remove_unlisted_objects(bundle: Path, keep: set) -> None:
+    objects_dir = bundle / OBJECTS_DIR_NAME
+    if not objects_dir.is_dir():
+        return
+    for path in objects_dir.glob("*/*"):
+        if path.name not in keep:
+            path.unlink(missing_ok=True)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+__all__ = [
+    "MANIFEST_FILE_NAME",
+    "ManifestEntry",
+    "ManifestError",
+    "SyncResult",
+    "build_manifest",
+    "dump_manifest",
+    "export_cache",
+    "import_cache",
+    "read_manifest",
+    "write_manifest",
+]
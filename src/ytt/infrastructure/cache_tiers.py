@@ -0,0 +1,220 @@
+"""Shared cache tiers that sit below the local cache of a node."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+from urllib.parse import quote
+
+import requests
+
+from .cache_store import (
+    CacheEntry,
+    CacheRecord,
+    CacheStore,
+    DeduplicatingCacheStore,
+    FileCacheStore,
+    MemoryCacheStore,
+    TieredCacheStore,
+    create_cache_store,
+)
+
+STORED_AT_HEADER = "X-Stored-At"
+
+
+class ReadOnlyCacheStore:
+    """Exposes another store for reading only.
+
+    Writes, deletes and access bookkeeping are ignored, and no entries are
+    reported, so eviction never considers data this node does not own.
+    """
+
+    def __init__(self, inner: CacheStore) -> None:
+        self._inner = inner
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._inner.get(video_id, name)
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self._inner.get_mapped(video_id, name)
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        return None
+
+    def delete(self, video_id: str, name: str) -> bool:
+        return False
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        return self._inner.names(video_id, prefix)
+
+    def touch(self, video_id: str, name: str) -> None:
+        return None
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        return self._inner.stored_at(video_id, name)
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        return False
+
+    def entries(self) -> Iterator[CacheEntry]:
+        return iter(())
+
+    def collect_garbage(self) -> int:
+        return 0
+
+
+class HttpCacheStore:
+    """Cache tier backed by a cache server speaking the protocol of :mod:`.cache_server`.
+
+    ``GET``/``PUT /entries/<video_id>/<name>`` read and write payloads, with
+    the original write time in the ``X-Stored-At`` header, and
+    ``GET /names/<video_id>?prefix=`` lists entry names. The server manages
+    its own storage, so deletes and eviction bookkeeping are not forwarded.
+
+    After a connection error the tier is skipped for ``retry_after`` seconds
+    instead of slowing down every lookup.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        session: Optional[requests.Session] = None,
+        timeout: float = 5.0,
+        retry_after: float = 60.0,
+    ) -> None:
+        self._base_url = base_url.rstrip("/")
+        self._session = session or requests.Session()
+        self._timeout = timeout
+        self._retry_after = retry_after
+        self._unavailable_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    def get(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        response = self._request("GET", self._entry_url(video_id, name))
+        if response is None or response.status_code != 200:
+            return None
+        try:
+            stored_at = float(response.headers.get(STORED_AT_HEADER, ""))
+        except ValueError:
+            stored_at = time.time()
+        return CacheRecord(data=response.content, stored_at=stored_at)
+
+    def get_mapped(self, video_id: str, name: str) -> Optional[CacheRecord]:
+        return self.get(video_id, name)
+
+    def put(self, video_id: str, name: str, data: bytes, *, stored_at: Optional[float] = None) -> None:
+        headers = {STORED_AT_HEADER: repr(stored_at if stored_at is not None else time.time())}
+        response = self._request("PUT", self._entry_url(video_id, name), data=data, headers=headers)
+        if response is not None and response.status_code >= 400:
+            print(
+                f"Warning: Remote cache rejected {video_id}/{name}: HTTP {response.status_code}",
+                file=sys.stderr,
+            )
+
+    def delete(self, video_id: str, name: str) -> bool:
+        return False
+
+    def names(self, video_id: str, prefix: str = "") -> List[str]:
+        url = f"{self._base_url}/names/{quote(video_id, safe='')}"
+        response = self._request("GET", url, params={"prefix": prefix})
+        if response is None or response.status_code != 200:
+            return []
+        try:
+            names = response.json()
+        except ValueError:
+            return []
+        return sorted(name for name in names if isinstance(name, str))
+
+    def touch(self, video_id: str, name: str) -> None:
+        return None
+
+    def stored_at(self, video_id: str, name: str) -> Optional[float]:
+        # Answering would cost a request per entry; callers treat the entry as unknown.
+        return None
+
+    def restamp(self, video_id: str, name: str, stored_at: Optional[float] = None) -> bool:
+        return False
+
+    def entries(self) -> Iterator[CacheEntry]:
+        return iter(())
+
+    def collect_garbage(self) -> int:
+        return 0
+
+    def _entry_url(self, video_id: str, name: str) -> str:
+        return f"{self._base_url}/entries/{quote(video_id, safe='')}/{quote(name, safe='')}"
+
+    def _request(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
+        with self._lock:
+            if time.monotonic() < self._unavailable_until:
+                return None
+        try:
+            return self._session.request(method, url, timeout=self._timeout, **kwargs)
+        except requests.RequestException as exc:
+            with self._lock:
+                self._unavailable_until = time.monotonic() + self._retry_after
+            print(
+                f"Warning: Remote cache {self._base_url} unavailable ({exc}); "
+                f"skipping it for {self._retry_after:.0f}s.",
+                file=sys.stderr,
+            )
+            return None
+
+
+def create_cache_hierarchy(
+    backend: str,
+    cache_dir: Path,
+    *,
+    memory_entries: int = 0,
+    memory_bytes: int = 0,
+    shared_dir: Optional[Path] = None,
+    remote_url: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+) -> CacheStore:
+    """Build the ordered tiers: memory, local disk, shared directory, remote server.
+
+    Tiers that are not configured are left out; with only the local disk
+    the local store is returned as is.
+    """
+
+    tiers: List[CacheStore] = []
+    if memory_entries > 0 and memory_bytes > 0:
+        tiers.append(MemoryCacheStore(max_entries=memory_entries, max_bytes=memory_bytes))
+    local = create_cache_store(backend, cache_dir)
+    tiers.append(local)
+    if shared_dir is not None:
+        tiers.append(ReadOnlyCacheStore(DeduplicatingCacheStore(FileCacheStore(shared_dir))))
+    if remote_url:
+        tiers.append(HttpCacheStore(remote_url, session=session))
+    return tiers[0] if len(tiers) == 1 else TieredCacheStore(tiers)
+
+
+def local_cache_store(store: CacheStore) -> CacheStore:
+    """The local disk tier of a store built by :func:`create_cache_hierarchy`.
+
+    Checks that must not leave the machine, or should not see another
+    process's memory, go to this tier only.
+    """
+
+    if isinstance(store, TieredCacheStore):
+        for tier in store.tiers:
+            if not isinstance(tier, (MemoryCacheStore, ReadOnlyCacheStore, HttpCacheStore)):
+                return tier
+    return store
+
+
+__all__ = [
+    "HttpCacheStore",
+    "ReadOnlyCacheStore",
+    "STORED_AT_HEADER",
+    "create_cache_hierarchy",
+    "local_cache_store",
+]
@@ -0,0 +1,220 @@
+"""Integrity checks for cache entries, run off the retrieval path.
+
+:func:`verify_cache` reads every entry of a store on a worker pool and
+checks it against its format: packed transcripts against their checksum
+and offsets, content-addressed blobs against their digest, metadata,
+negative entries and track lists as JSON, and version histories and
+archived pages as compressed JSON. Corrupt entries are moved into a quarantine directory,
+where they can be inspected, and deleted from the store so the next
+retrieval fetches them again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from .cache_store import BLOB_NAMESPACE, CacheEntry, CacheStore
+from .page_archive import PAGE_NAME, PageFormatError, decode_page
+from .transcript_codec import (
+    FORMAT_VERSION,
+    TranscriptFormatError,
+    check_transcript,
+    is_packed_transcript,
+    transcript_format_version,
+)
+from .transcript_history import HistoryFormatError, decode_history, is_history_name
+from .transcript_repository import (
+    METADATA_NAME,
+    TRACKS_NAME,
+    TRANSCRIPT_NAME_PREFIX,
+    UNAVAILABLE_NAME,
+    UNAVAILABLE_REASONS,
+)
+
+QUARANTINE_DIR_NAME = "quarantine"
+
+VERIFY_OK = "ok"
+VERIFY_LEGACY = "legacy"
+VERIFY_CORRUPT = "corrupt"
+
+VerifyProgress = Callable[[int, int, str, str], None]
+"""Callback receiving ``(done, total, "video_id/name", outcome)`` after each entry."""
+
+
+@dataclass(frozen=True)
+class CorruptEntry:
+    """An entry that failed verification, and where its payload was moved."""
+
+    video_id: str
+    name: str
+    reason: str
+    quarantined_to: Optional[Path] = None
+
+
+@dataclass(frozen=True)
+class VerifyResult:
+    """Outcome of a verification run.
+
+    ``legacy`` counts entries in formats that carry no checksum; ``ytt cache
+    migrate`` converts them. ``repaired`` and ``repair_failed`` count the
+    refetches of corrupt entries, when a repair was requested.
+    """
+
+    ok: int = 0
+    legacy: int = 0
+    corrupt: Tuple[CorruptEntry, ...] = ()
+    repaired: int = 0
+    repair_failed: int = 0
+
+    @property
+    def examined(self) -> int:
+        return self.ok + self.legacy + len(self.corrupt)
+
+
+def check_entry(video_id: str, name: str, data) -> Tuple[str, Optional[str]]:
+    """Classify a payload as ok, legacy or corrupt; the second item says why it is corrupt."""
+
+    if video_id == BLOB_NAMESPACE:
+        if hashlib.sha256(bytes(data)).hexdigest() != name:
+            return VERIFY_CORRUPT, "content does not match its digest"
+        return VERIFY_OK, None
+    if is_history_name(name):
+        try:
+            decode_history(data)
+        except HistoryFormatError as exc:
+            return VERIFY_CORRUPT, str(exc)
+        return VERIFY_OK, None
+    if name == PAGE_NAME:
+        try:
+            decode_page(data)
+        except PageFormatError as exc:
+            return VERIFY_CORRUPT, str(exc)
+        return VERIFY_OK, None
+    if name in (METADATA_NAME, UNAVAILABLE_NAME, TRACKS_NAME):
+        try:
+            payload = json.loads(bytes(data))
+        except ValueError as exc:
+            return VERIFY_CORRUPT, f"invalid JSON: {exc}"
+        if not isinstance(payload, dict) or not isinstance(payload.get("version"), int):
+            return VERIFY_CORRUPT, "not a versioned JSON object"
+        if name == UNAVAILABLE_NAME and payload.get("reason") not in UNAVAILABLE_REASONS:
+            return VERIFY_CORRUPT, f"unknown reason {payload.get('reason')!r}"
+        return VERIFY_OK, None
+    if not is_packed_transcript(data):
+        if name.startswith(TRANSCRIPT_NAME_PREFIX):
+            return VERIFY_CORRUPT, "not a packed transcript"
+        # Pickles under the old preferred-language keys, left to ``ytt cache migrate``.
+        return VERIFY_LEGACY, None
+    try:
+        check_transcript(data)
+    except TranscriptFormatError as exc:
+        return VERIFY_CORRUPT, str(exc)
+    if transcript_format_version(data) < FORMAT_VERSION:
+        return VERIFY_LEGACY, None
+    return VERIFY_OK, None
+
+
+def verify_cache(
+    store: CacheStore,
+    quarantine_dir: Path,
+    *,
+    workers: int = 4,
+    on_progress: Optional[VerifyProgress] = None,
+    on_corrupt: Optional[Callable[[CorruptEntry], None]] = None,
+) -> VerifyResult:
+    """Check every entry in ``store`` and quarantine the corrupt ones.
+
+    ``on_corrupt`` is called from the worker that found the entry, right
+    after it was removed from the store.
+    """
+
+    entries = list(store.entries())
+    counts = {VERIFY_OK: 0, VERIFY_LEGACY: 0}
+    corrupt: List[CorruptEntry] = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(_verify_entry, store, quarantine_dir, entry, on_corrupt): entry for entry in entries
+        }
+        for future in as_completed(futures):
+            entry = futures[future]
+            outcome, found = future.result()
+            if found is not None:
+                corrupt.append(found)
+            elif outcome in counts:
+                counts[outcome] += 1
+            done += 1
+            if on_progress is not None:
+                on_progress(done, len(entries), f"{entry.video_id}/{entry.name}", outcome)
+
+    corrupt.sort(key=lambda item: (item.video_id, item.name))
+    return VerifyResult(ok=counts[VERIFY_OK], legacy=counts[VERIFY_LEGACY], corrupt=tuple(corrupt))
+
+
+def quarantine_entry(store: CacheStore, quarantine_dir: Path, video_id: str, name: str, data) -> Optional[Path]:
+    """Move a payload into ``quarantine_dir`` and delete the entry from ``store``."""
+
+    path = None
+    if data is not None:
+        path = quarantine_dir / video_id / f"{name}.{time.time_ns()}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                handle.write(bytes(data))
+            os.replace(temp_name, path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+    store.delete(video_id, name)
+    return path
+
+
+def _verify_entry(
+    store: CacheStore,
+    quarantine_dir: Path,
+    entry: CacheEntry,
+    on_corrupt: Optional[Callable[[CorruptEntry], None]],
+) -> Tuple[str, Optional[CorruptEntry]]:
+    record = store.get(entry.video_id, entry.name)
+    if record is None:
+        if entry.name not in store.names(entry.video_id, entry.name):
+            # Deleted or evicted since the scan started.
+            return VERIFY_OK, None
+        outcome, reason = VERIFY_CORRUPT, "payload is missing"
+        data = None
+    else:
+        data = record.data
+        outcome, reason = check_entry(entry.video_id, entry.name, data)
+    if outcome != VERIFY_CORRUPT:
+        return outcome, None
+
+    try:
+        path = quarantine_entry(store, quarantine_dir, entry.video_id, entry.name, data)
+    except OSError as exc:
+        print(f"Warning: Could not quarantine cache entry {entry.video_id}/{entry.name}: {exc}", file=sys.stderr)
+        path = None
+    found = CorruptEntry(entry.video_id, entry.name, reason or "corrupt", path)
+    if on_corrupt is not None:
+        on_corrupt(found)
+    return outcome, found
+
+
+__all__ = [
+    "QUARANTINE_DIR_NAME",
+    "CorruptEntry",
+    "VerifyProgress",
+    "VerifyResult",
+    "check_entry",
+    "quarantine_entry",
+    "verify_cache",
+]
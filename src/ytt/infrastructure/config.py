@@ -5,14 +5,24 @@ from __future__ import annotations
 import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Optional
 
 from appdirs import user_config_dir
 
+from .cache_store import CACHE_BACKENDS, FILE_BACKEND
+from .page_archive import ARCHIVE_MODES, ARCHIVE_OFF
+
 CONFIG_DIR_NAME = "ytt"
 CONFIG_FILE_NAME = "config.json"
 CACHE_DIR_NAME = "cache"
 
+DEFAULT_TRANSCRIPT_TTL = 365 * 86400.0
+DEFAULT_METADATA_TTL = 7 * 86400.0
+DEFAULT_NEGATIVE_TTL = 86400.0
+DEFAULT_MEMORY_CACHE_ENTRIES = 256
+DEFAULT_MEMORY_CACHE_SIZE = 64 * 1024 * 1024
+DEFAULT_HISTORY_VERSIONS = 10
+
 
 class ConfigRepository:
     """Handles reading and writing the user configuration."""
@@ -65,3 +75,150 @@ class ConfigRepository:
         config = self.load()
         config["preferred_languages"] = [lang.strip() for lang in languages if lang and lang.strip()]
         self.save(config)
+
+    def get_cache_backend(self) -> str:
+        backend = self.load().get("cache_backend", FILE_BACKEND)
+        if backend not in CACHE_BACKENDS:
+            print(
+                f"Warning: Unknown cache backend '{backend}' in config. Using '{FILE_BACKEND}'.",
+                file=sys.stderr,
+            )
+            return FILE_BACKEND
+        return backend
+
+    def set_cache_backend(self, backend: str) -> None:
+        if backend not in CACHE_BACKENDS:
+            raise ValueError(f"Unknown cache backend: {backend}")
+        config = self.load()
+        config["cache_backend"] = backend
+        self.save(config)
+
+    def get_cache_max_size(self) -> Optional[int]:
+        value = self._get_limit("cache_max_size")
+        return int(value) if value is not None else None
+
+    def set_cache_max_size(self, max_bytes: Optional[int]) -> None:
+        self._set_limit("cache_max_size", max_bytes)
+
+    def get_cache_max_age(self) -> Optional[float]:
+        return self._get_limit("cache_max_age")
+
+    def set_cache_max_age(self, max_age: Optional[float]) -> None:
+        self._set_limit("cache_max_age", max_age)
+
+    def get_transcript_ttl(self) -> Optional[float]:
+        return self._get_ttl("transcript_ttl", DEFAULT_TRANSCRIPT_TTL)
+
+    def set_transcript_ttl(self, ttl: Optional[float]) -> None:
+        self._set_ttl("transcript_ttl", ttl)
+
+    def get_metadata_ttl(self) -> Optional[float]:
+        return self._get_ttl("metadata_ttl", DEFAULT_METADATA_TTL)
+
+    def set_metadata_ttl(self, ttl: Optional[float]) -> None:
+        self._set_ttl("metadata_ttl", ttl)
+
+    def get_negative_ttl(self) -> Optional[float]:
+        return self._get_ttl("negative_ttl", DEFAULT_NEGATIVE_TTL)
+
+    def set_negative_ttl(self, ttl: Optional[float]) -> None:
+        # ``None`` disables negative caching altogether.
+        self._set_ttl("negative_ttl", ttl)
+
+    def get_memory_cache_entries(self) -> int:
+        return int(self._get_budget("memory_cache_entries", DEFAULT_MEMORY_CACHE_ENTRIES))
+
+    def set_memory_cache_entries(self, entries: Optional[int]) -> None:
+        self._set_limit("memory_cache_entries", entries)
+
+    def get_memory_cache_size(self) -> int:
+        return int(self._get_budget("memory_cache_size", DEFAULT_MEMORY_CACHE_SIZE))
+
+    def set_memory_cache_size(self, max_bytes: Optional[int]) -> None:
+        self._set_limit("memory_cache_size", max_bytes)
+
+    def get_history_versions(self) -> int:
+        return int(self._get_budget("history_versions", DEFAULT_HISTORY_VERSIONS))
+
+    def set_history_versions(self, versions: Optional[int]) -> None:
+        self._set_limit("history_versions", versions)
+
+    def get_page_archive(self) -> str:
+        mode = self.load().get("page_archive", ARCHIVE_OFF)
+        if mode not in ARCHIVE_MODES:
+            print(f"Warning: Unknown page archive mode '{mode}' in config. Using '{ARCHIVE_OFF}'.", file=sys.stderr)
+            return ARCHIVE_OFF
+        return mode
+
+    def set_page_archive(self, mode: str) -> None:
+        if mode not in ARCHIVE_MODES:
+            raise ValueError(f"Unknown page archive mode: {mode}")
+        config = self.load()
+        config["page_archive"] = mode
+        self.save(config)
+
+    def get_shared_cache_dir(self) -> Optional[Path]:
+        value = self._get_text("shared_cache_dir")
+        return Path(value).expanduser() if value is not None else None
+
+    def set_shared_cache_dir(self, path: Optional[Path]) -> None:
+        self._set_value("shared_cache_dir", str(path) if path is not None else None)
+
+    def get_cache_server_url(self) -> Optional[str]:
+        return self._get_text("cache_server_url")
+
+    def set_cache_server_url(self, url: Optional[str]) -> None:
+        self._set_value("cache_server_url", url)
+
+    def _get_ttl(self, key: str, default: float) -> Optional[float]:
+        config = self.load()
+        if key not in config:
+            return default
+        if config[key] is None:
+            return None
+        return self._get_limit(key) or default
+
+    def _set_ttl(self, key: str, ttl: Optional[float]) -> None:
+        # ``None`` is stored explicitly and means "never expires".
+        config = self.load()
+        config[key] = ttl
+        self.save(config)
+
+    def _get_limit(self, key: str) -> Optional[float]:
+        value = self.load().get(key)
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            print(f"Warning: Ignoring invalid '{key}' value in config: {value!r}", file=sys.stderr)
+            return None
+        return value
+
+    def _get_budget(self, key: str, default: int) -> float:
+        # Unlike limits, budgets may be zero (disabled) and fall back to a default.
+        value = self.load().get(key)
+        if value is None:
+            return default
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            print(f"Warning: Ignoring invalid '{key}' value in config: {value!r}", file=sys.stderr)
+            return default
+        return value
+
+    def _get_text(self, key: str) -> Optional[str]:
+        value = self.load().get(key)
+        if value is None:
+            return None
+        if not isinstance(value, str) or not value.strip():
+            print(f"Warning: Ignoring invalid '{key}' value in config: {value!r}", file=sys.stderr)
+            return None
+        return value.strip()
+
+    def _set_limit(self, key: str, value: Optional[float]) -> None:
+        self._set_value(key, value)
+
+    def _set_value(self, key: str, value: Any) -> None:
+        config = self.load()
+        if value is None:
+            config.pop(key, None)
+        else:
+            config[key] = value
+        self.save(config)
@@ -6,6 +6,7 @@ import json
 import re
 import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from html import unescape
 from typing import Optional
 
@@ -15,6 +16,7 @@ from defusedxml import ElementTree as ET
 from ..domain.entities import VideoMetadata
 from ..domain.services import MetadataGateway
 from ..domain.value_objects import VideoID
+from .page_archive import ArchivedPage, WatchPageArchive, decode_page
 
 
 _USER_AGENT = (
@@ -38,10 +40,15 @@ _YOUTUBE_DESCRIPTION_CORE_PHRASES = (
 
 @dataclass
 class YouTubeMetadataGateway(MetadataGateway):
-    """Fetches video metadata by scraping the YouTube watch page."""
+    """Fetches video metadata by scraping the YouTube watch page.
+
+    With an ``archive``, every downloaded page is stored so its metadata can
+    be extracted again later without the network; see :meth:`extract_page`.
+    """
 
     session: Optional[requests.Session] = None
     timeout: float = 10.0
+    archive: Optional[WatchPageArchive] = None
 
     def __post_init__(self) -> None:
         if self.session is None:
@@ -61,6 +68,21 @@ class YouTubeMetadataGateway(MetadataGateway):
         html = response.text
         player_response = self._extract_json_object(html, "ytInitialPlayerResponse")
         initial_data = self._extract_json_object(html, "ytInitialData")
+        if self.archive is not None:
+            self.archive.save(video_id.value, html, player_response, initial_data)
+        return self._extract(player_response, initial_data, html)
+
+    def extract_page(self, page: ArchivedPage) -> VideoMetadata:
+        """Extract metadata from an archived page, as :meth:`fetch` would from the live one."""
+
+        if page.html is None:
+            return self._extract(page.player_response, page.initial_data, "")
+        html = page.html
+        player_response = self._extract_json_object(html, "ytInitialPlayerResponse")
+        initial_data = self._extract_json_object(html, "ytInitialData")
+        return self._extract(player_response, initial_data, html)
+
+    def _extract(self, player_response: Optional[dict], initial_data: Optional[dict], html: str) -> VideoMetadata:
         title = self._extract_title(player_response, html)
         description = self._extract_description(player_response, initial_data, html)
         return VideoMetadata(title=title, description=description)
@@ -225,4 +247,19 @@ class YouTubeMetadataGateway(MetadataGateway):
         return re.sub(r"[^a-z0-9 ]", "", lowered).strip()
 
 
-__all__ = ["YouTubeMetadataGateway"]
+def extract_archived_metadata(data: bytes) -> VideoMetadata:
+    """Extract metadata from an archived page payload; runs in ``ytt cache reextract`` worker processes.
+
+    Raises :class:`~ytt.infrastructure.page_archive.PageFormatError` for an unusable payload.
+    """
+
+    return _page_extractor().extract_page(decode_page(data))
+
+
+@lru_cache(maxsize=1)
+def _page_extractor() -> YouTubeMetadataGateway:
+    # One gateway per worker process: extraction never touches the network or the gateway's session.
+    return YouTubeMetadataGateway()
+
+
+__all__ = ["YouTubeMetadataGateway", "extract_archived_metadata"]
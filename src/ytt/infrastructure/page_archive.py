@@ -0,0 +1,123 @@
+"""Archive of fetched watch pages, for re-running metadata extraction offline.
+
+With archiving enabled, :class:`YouTubeMetadataGateway` stores every watch
+page it downloads in the cache store under the ``page`` entry of the
+video, next to the metadata extracted from it. Two modes are supported:
+
+``html``
+    the whole page, so any later improvement to the extraction applies;
+``json``
+    only the ``ytInitialPlayerResponse`` and ``ytInitialData`` objects,
+    a fraction of the size, without the ``<head>`` fallbacks.
+
+The payload is ``YTTPAGE\\x01`` followed by zlib-compressed JSON. Pages are
+evicted with the rest of the cache; ``ytt cache reextract`` reads them back.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+from .cache_store import CacheStore
+
+PAGE_NAME = "page"
+PAGE_ARCHIVE_VERSION = 1
+
+ARCHIVE_OFF = "off"
+ARCHIVE_HTML = "html"
+ARCHIVE_JSON = "json"
+ARCHIVE_MODES = (ARCHIVE_OFF, ARCHIVE_HTML, ARCHIVE_JSON)
+
+_MAGIC = b"YTTPAGE\x01"
+
+
+class PageFormatError(ValueError):
+    """Raised when a payload is not a valid archived page."""
+
+
+@dataclass(frozen=True)
+class ArchivedPage:
+    """A watch page as archived: the HTML, or only its embedded JSON objects."""
+
+    mode: str
+    html: Optional[str] = None
+    player_response: Optional[dict] = None
+    initial_data: Optional[dict] = None
+
+
+def encode_page(page: ArchivedPage) -> bytes:
+    payload = {"version": PAGE_ARCHIVE_VERSION, "mode": page.mode}
+    if page.mode == ARCHIVE_HTML:
+        payload["html"] = page.html
+    else:
+        payload["player_response"] = page.player_response
+        payload["initial_data"] = page.initial_data
+    return _MAGIC + zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_page(data) -> ArchivedPage:
+    """Decode an archived page, raising :class:`PageFormatError` if it is unusable."""
+
+    raw = bytes(data)
+    if not raw.startswith(_MAGIC):
+        raise PageFormatError("not an archived page")
+    try:
+        payload = json.loads(zlib.decompress(raw[len(_MAGIC) :]))
+    except (zlib.error, ValueError) as exc:
+        raise PageFormatError(f"unreadable archived page: {exc}") from exc
+    if not isinstance(payload, dict) or payload.get("version") != PAGE_ARCHIVE_VERSION:
+        raise PageFormatError("not a versioned page object")
+    mode = payload.get("mode")
+    if mode == ARCHIVE_HTML and isinstance(payload.get("html"), str):
+        return ArchivedPage(mode, html=payload["html"])
+    if mode == ARCHIVE_JSON:
+        player_response, initial_data = payload.get("player_response"), payload.get("initial_data")
+        if all(value is None or isinstance(value, dict) for value in (player_response, initial_data)):
+            return ArchivedPage(mode, player_response=player_response, initial_data=initial_data)
+    raise PageFormatError(f"invalid page in mode {mode!r}")
+
+
+class WatchPageArchive:
+    """Stores watch pages in ``store`` in one of the :data:`ARCHIVE_MODES` other than ``off``."""
+
+    def __init__(self, store: CacheStore, mode: str = ARCHIVE_HTML) -> None:
+        if mode not in (ARCHIVE_HTML, ARCHIVE_JSON):
+            raise ValueError(f"Unknown page archive mode: {mode}")
+        self._store = store
+        self._mode = mode
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    def save(
+        self, video_id: str, html: str, player_response: Optional[dict], initial_data: Optional[dict]
+    ) -> bool:
+        if self._mode == ARCHIVE_HTML:
+            page = ArchivedPage(ARCHIVE_HTML, html=html)
+        else:
+            page = ArchivedPage(ARCHIVE_JSON, player_response=player_response, initial_data=initial_data)
+        try:
+            self._store.put(video_id, PAGE_NAME, encode_page(page))
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not archive the watch page of {video_id}: {exc}", file=sys.stderr)
+            return False
+        return True
+
+
+__all__ = [
+    "ARCHIVE_HTML",
+    "ARCHIVE_JSON",
+    "ARCHIVE_MODES",
+    "ARCHIVE_OFF",
+    "PAGE_NAME",
+    "ArchivedPage",
+    "PageFormatError",
+    "WatchPageArchive",
+    "decode_page",
+    "encode_page",
+]
@@ -0,0 +1,289 @@
+"""Cache of fully rendered transcript documents.
+
+A rendered document is the exact output of ``ytt fetch`` for one video, set
+of preferred languages and combination of render flags. It is kept in its
+own file below the cache directory, after a one-line header naming the
+cache entries it was rendered from and their write times::
+
+    #ytt-rendered	1	{"sources": {...}, "transcripts": [...], "unavailable": null}
+    <document>
+
+A document is only served while every source entry still exists with the
+same write time and is fresh under its TTL, and while the video's cached
+transcripts are the same ones as when it was rendered; otherwise it is
+deleted and rendered again. Serving a document does not decode a single
+cache entry: it takes a few ``stat`` calls and one ``sendfile``. Give it
+the local tier of a tiered store, so these checks never leave the machine.
+
+Documents count toward the cache size budget: they are listed by
+:meth:`RenderedOutputCache.entries` and evicted with the cache entries in
+least-recently-used order.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Sequence
+
+from ..domain.entities import VideoTranscriptBundle
+from ..domain.value_objects import VideoID
+from .cache_eviction import EvictionSchedule
+from .cache_stats import CacheStatsRecorder
+from .cache_store import CacheEntry, CacheStore
+from .transcript_repository import METADATA_NAME, TRACKS_NAME, TRANSCRIPT_NAME_PREFIX, UNAVAILABLE_NAME
+
+RENDERED_DIR_NAME = "rendered"
+RENDER_VERSION = 1
+
+_MAGIC = b"#ytt-rendered\t1\t"
+_SUFFIX = ".txt"
+# File timestamps round-trip through nanoseconds, so write times are compared with a tolerance.
+_STAMP_TOLERANCE = 1e-3
+
+
+def render_variant(
+    preferred_languages: Sequence[str], *, show_title: bool, show_description: bool, show_url: bool
+) -> str:
+    """Key of a rendered document among those of one video."""
+
+    key = json.dumps([RENDER_VERSION, list(preferred_languages), show_title, show_description, show_url])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class RenderedDocument:
+    """An open rendered document; use it as a context manager."""
+
+    def __init__(self, handle: BinaryIO, offset: int, length: int, transcript_unavailable: Optional[str]) -> None:
+        self._handle = handle
+        self._offset = offset
+        self._length = length
+        self.transcript_unavailable = transcript_unavailable
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    def read(self) -> bytes:
+        self._handle.seek(self._offset)
+        return self._handle.read(self._length)
+
+    def write_to(self, stream: BinaryIO) -> None:
+        """Copy the document to ``stream``, with ``sendfile`` when both ends allow it."""
+
+        stream.flush()
+        try:
+            out_fd = stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            out_fd = None
+        if out_fd is not None and hasattr(os, "sendfile"):
+            offset, remaining = self._offset, self._length
+            try:
+                while remaining > 0:
+                    sent = os.sendfile(out_fd, self._handle.fileno(), offset, remaining)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    remaining -= sent
+                return
+            except OSError:
+                if offset != self._offset:
+                    raise
+                # Not supported for this pair of files; fall back to copying.
+        self._handle.seek(self._offset)
+        shutil.copyfileobj(self._handle, stream)
+        stream.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "RenderedDocument":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RenderedOutputCache:
+    """Stores rendered documents in ``directory``, validated against ``store``."""
+
+    def __init__(
+        self,
+        directory: Path,
+        store: CacheStore,
+        *,
+        transcript_ttl: Optional[float] = None,
+        metadata_ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        stats: Optional[CacheStatsRecorder] = None,
+        eviction: Optional[EvictionSchedule] = None,
+    ) -> None:
+        self._directory = directory
+        self._store = store
+        self._transcript_ttl = transcript_ttl
+        self._metadata_ttl = metadata_ttl
+        # As in the repository, ``None`` means negative entries are not cached.
+        self._negative_ttl = negative_ttl
+        self._stats = stats or CacheStatsRecorder()
+        # Documents written count toward the running total of the cache budget.
+        self._eviction = eviction
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def path_for(self, video_id: str, variant: str) -> Path:
+        shard = hashlib.sha1(video_id.encode("utf-8")).hexdigest()[:2]
+        return self._directory / shard / f"{video_id}.{variant}{_SUFFIX}"
+
+    def open(self, video_id: VideoID, variant: str) -> Optional[RenderedDocument]:
+        """Return the rendered document if it is still valid, counting it as a cache hit."""
+
+        started = time.perf_counter()
+        path = self.path_for(video_id.value, variant)
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            header = self._read_header(handle)
+            if header is None or not self._is_current(video_id.value, header):
+                handle.close()
+                self._unlink(path)
+                return None
+            offset = handle.tell()
+            stat = os.fstat(handle.fileno())
+            length = stat.st_size - offset
+        except BaseException:
+            handle.close()
+            raise
+        try:
+            # Marks the document as recently used for eviction.
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:  # pragma: no cover - read-only cache
+            pass
+        self._stats.add(hits=1, hit_seconds=time.perf_counter() - started, bytes_read=length)
+        return RenderedDocument(handle, offset, length, header.get("unavailable"))
+
+    def save(self, video_id: VideoID, variant: str, bundle: VideoTranscriptBundle, document: bytes) -> bool:
+        """Store ``document`` as rendered from ``bundle``; bundles without sources are not stored."""
+
+        if not bundle.sources:
+            return False
+        header = {
+            "sources": dict(bundle.sources),
+            "transcripts": self._store.names(video_id.value, TRANSCRIPT_NAME_PREFIX),
+            "unavailable": bundle.transcript_unavailable,
+        }
+        path = self.path_for(video_id.value, variant)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as handle:
+                    handle.write(_MAGIC + json.dumps(header).encode("utf-8") + b"\n")
+                    handle.write(document)
+                os.replace(temp_name, path)
+            except BaseException:
+                Path(temp_name).unlink(missing_ok=True)
+                raise
+        except OSError as exc:
+            print(f"Warning: Could not save rendered output for {video_id.value}: {exc}", file=sys.stderr)
+            return False
+        if self._eviction is not None:
+            self._eviction.note_write(len(document))
+        return True
+
+    def entries(self) -> Iterator[CacheEntry]:
+        """Stored documents, named by their variant, for eviction."""
+
+        for path in self._paths():
+            video_id, _, variant = path.name[: -len(_SUFFIX)].partition(".")
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield CacheEntry(
+                video_id=video_id,
+                name=variant,
+                size=stat.st_size,
+                stored_at=stat.st_mtime,
+                accessed_at=max(stat.st_atime, stat.st_mtime),
+            )
+
+    def delete(self, video_id: str, variant: str) -> bool:
+        return self._unlink(self.path_for(video_id, variant))
+
+    def prune(self) -> int:
+        """Delete documents whose source entries changed, expired or were evicted; return how many."""
+
+        removed = 0
+        for path in self._paths():
+            video_id = path.name.split(".", 1)[0]
+            try:
+                with open(path, "rb") as handle:
+                    header = self._read_header(handle)
+            except FileNotFoundError:
+                continue
+            if header is None or not self._is_current(video_id, header):
+                removed += self._unlink(path)
+        return removed
+
+    def _paths(self) -> Iterator[Path]:
+        return self._directory.glob(f"*/*{_SUFFIX}")
+
+    def _read_header(self, handle: BinaryIO) -> Optional[Dict]:
+        line = handle.readline()
+        if not line.startswith(_MAGIC) or not line.endswith(b"\n"):
+            return None
+        try:
+            header = json.loads(line[len(_MAGIC) :])
+        except ValueError:
+            return None
+        if not isinstance(header, dict) or not isinstance(header.get("sources"), dict):
+            return None
+        return header
+
+    def _is_current(self, video_id: str, header: Dict) -> bool:
+        now = time.time()
+        for name, stored_at in header["sources"].items():
+            ttl = self._ttl_for(name)
+            if ttl is False or not isinstance(stored_at, (int, float)):
+                return False
+            if ttl is not None and now - stored_at > ttl:
+                return False
+            current = self._store.stored_at(video_id, name)
+            if current is None or abs(current - stored_at) > _STAMP_TOLERANCE:
+                return False
+        return self._store.names(video_id, TRANSCRIPT_NAME_PREFIX) == header.get("transcripts")
+
+    def _ttl_for(self, name: str):
+        """TTL of an entry, or ``False`` when such entries are not cached at all."""
+
+        if name in (METADATA_NAME, TRACKS_NAME):
+            return self._metadata_ttl
+        if name == UNAVAILABLE_NAME:
+            return False if self._negative_ttl is None else self._negative_ttl
+        return self._transcript_ttl
+
+    @staticmethod
+    def _unlink(path: Path) -> bool:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+
+__all__ = [
+    "RENDERED_DIR_NAME",
+    "RenderedDocument",
+    "RenderedOutputCache",
+    "render_variant",
+]
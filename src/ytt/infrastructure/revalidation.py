@@ -0,0 +1,64 @@
+"""Background refreshes for the ``stale-while-revalidate`` policy."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from typing import List, Sequence
+
+from ..domain.value_objects import VideoID
+
+# Runs the CLI without relying on the ``ytt`` script being on PATH.
+_ENTRY_POINT = "import sys, ytt; sys.argv[0] = 'ytt'; ytt.main()"
+
+
+def revalidation_command(video_id: VideoID, preferred_languages: Sequence[str] = ()) -> List[str]:
+    """Command line that refreshes the expired cache entries of ``video_id`` for ``preferred_languages``.
+
+    Without languages the child uses the configured ones.
+    """
+
+    command = [
+        sys.executable,
+        "-c",
+        _ENTRY_POINT,
+        "fetch",
+        f"https://www.youtube.com/watch?v={video_id.value}",
+        "--no-copy",
+        "--policy",
+        "cache-first",
+    ]
+    if preferred_languages:
+        command += ["--languages", ",".join(preferred_languages)]
+    return command
+
+
+def spawn_revalidation(video_id: VideoID, preferred_languages: Sequence[str] = ()) -> None:
+    """Refresh ``video_id`` in a detached process that outlives the caller.
+
+    The child selects the transcript for the caller's ``preferred_languages``,
+    which may differ from the configured ones.
+
+    The child uses the ``cache-first`` policy, so it only fetches entries
+    that are still expired when it runs; concurrent children for the same
+    video wait on the cache lock and then find fresh entries. Its output is
+    discarded.
+    """
+
+    options = {}
+    if os.name == "nt":  # pragma: no cover - Windows
+        options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        options["start_new_session"] = True
+    subprocess.Popen(
+        revalidation_command(video_id, preferred_languages),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        **options,
+    )
+
+
+__all__ = ["revalidation_command", "spawn_revalidation"]
@@ -0,0 +1,326 @@
+"""Compact, pickle-free binary format for cached transcripts.
+
+Layout (all integers and floats little-endian)::
+
+    magic        4 bytes   b"YTTC"
+    version      uint16
+    reserved     uint16
+    header_size  uint32
+    header       JSON (language, language_code, is_generated, count, text_size, crc32)
+    padding      up to an 8-byte boundary
+    starts       count x float64
+    durations    count x float64
+    offsets      (count + 1) x uint32, byte offsets into the decompressed text
+    text         zlib-compressed UTF-8 text of all lines concatenated
+
+``crc32`` covers everything after the padding. :func:`decode_transcript`
+checks it when asked to ``verify``, as the cache does on every load and
+:func:`check_transcript` (``ytt cache verify``) does; without it, only the
+arrays and the text size are checked against the header, and damage in the
+text is only noticed when a line is first read. Version 3 payloads lack
+``crc32``; they are still decoded and are rewritten by ``ytt cache migrate``.
+
+Start times, durations and offsets are read in place from the buffer, which
+may be a memory-mapped cache file; the text blob is decompressed on first
+access and individual lines are only turned into :class:`TranscriptLine`
+objects when they are indexed.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Sequence, overload
+
+from ..domain.entities import TranscriptLine
+
+MAGIC = b"YTTC"
+FORMAT_VERSION = 4
+# Oldest version that is still decoded; it carries no checksum.
+MIN_FORMAT_VERSION = 3
+
+_PREAMBLE = struct.Struct("<4sHHI")
+_ALIGNMENT = 8
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class TranscriptFormatError(ValueError):
+    """Raised when a payload is not a valid packed transcript."""
+
+
+@dataclass(frozen=True)
+class DecodedTranscript:
+    """Packed transcript lines together with the track they came from."""
+
+    lines: "PackedTranscript"
+    language: Optional[str]
+    language_code: Optional[str]
+    is_generated: bool
+
+
+class _CompressedText:
+    """Compressed text blob shared by a transcript and the windows cut from it."""
+
+    __slots__ = ("_compressed", "_text")
+
+    def __init__(self, compressed) -> None:
+        self._compressed = compressed
+        self._text: Optional[bytes] = None
+
+    def get(self) -> bytes:
+        if self._text is None:
+            try:
+                self._text = zlib.decompress(self._compressed)
+            except zlib.error as exc:
+                raise TranscriptFormatError(f"corrupt text: {exc}") from exc
+        return self._text
+
+
+class PackedTranscript(Sequence[TranscriptLine]):
+    """Read-only, lazily materialized view over packed transcript arrays.
+
+    The arrays may live in a memory-mapped cache file. Index slices and
+    :meth:`between` return further views sharing the same buffers, so only
+    the lines that are actually accessed become :class:`TranscriptLine`
+    objects.
+    """
+
+    __slots__ = ("_starts", "_durations", "_offsets", "_text", "_begin", "_end")
+
+    def __init__(self, starts, durations, offsets, compressed_text, *, _window=None) -> None:
+        self._starts = starts
+        self._durations = durations
+        self._offsets = offsets
+        self._text = (
+            compressed_text if isinstance(compressed_text, _CompressedText) else _CompressedText(compressed_text)
+        )
+        self._begin, self._end = _window or (0, len(starts))
+
+    def __len__(self) -> int:
+        return self._end - self._begin
+
+    @overload
+    def __getitem__(self, index: int) -> TranscriptLine: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[TranscriptLine]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            begin, end, step = index.indices(len(self))
+            if step != 1:
+                return [self._line(self._begin + position) for position in range(begin, end, step)]
+            return self._window(self._begin + begin, self._begin + max(begin, end))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return self._line(self._begin + index)
+
+    def __iter__(self) -> Iterator[TranscriptLine]:
+        for position in range(self._begin, self._end):
+            yield self._line(position)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"PackedTranscript({len(self)} lines)"
+
+    def __reduce__(self):
+        # Buffers are not picklable; fall back to a plain list of lines.
+        return (list, (list(self),))
+
+    @property
+    def starts(self) -> Sequence[float]:
+        return self._starts[self._begin : self._end]
+
+    @property
+    def durations(self) -> Sequence[float]:
+        return self._durations[self._begin : self._end]
+
+    def between(self, start: float, end: float) -> "PackedTranscript":
+        """Return the lines spoken between ``start`` and ``end`` seconds.
+
+        Includes lines starting in ``[start, end)`` plus the line that is
+        still in progress at ``start``. Only the start-time array is read.
+        """
+
+        begin = bisect_right(self._starts, start, self._begin, self._end)
+        if begin > self._begin and self._starts[begin - 1] + self._durations[begin - 1] > start:
+            begin -= 1
+        stop = bisect_left(self._starts, end, begin, self._end)
+        return self._window(begin, stop)
+
+    def _window(self, begin: int, end: int) -> "PackedTranscript":
+        return PackedTranscript(
+            self._starts, self._durations, self._offsets, self._text, _window=(begin, end)
+        )
+
+    def _line(self, position: int) -> TranscriptLine:
+        text = self._text.get()[self._offsets[position] : self._offsets[position + 1]]
+        return TranscriptLine(
+            text=text.decode("utf-8"),
+            start=self._starts[position],
+            duration=self._durations[position],
+        )
+
+
+def is_packed_transcript(data) -> bool:
+    return bytes(data[: len(MAGIC)]) == MAGIC
+
+
+def encode_transcript(
+    lines: Iterable[TranscriptLine],
+    *,
+    language: Optional[str] = None,
+    language_code: Optional[str] = None,
+    is_generated: bool = False,
+    compression_level: int = 6,
+) -> bytes:
+    """Serialize ``lines`` into the packed transcript format."""
+
+    starts = array("d")
+    durations = array("d")
+    offsets = array("I", [0])
+    text = bytearray()
+    for line in lines:
+        starts.append(float(line.start))
+        durations.append(float(line.duration))
+        text += line.text.encode("utf-8")
+        offsets.append(len(text))
+
+    if not _LITTLE_ENDIAN:  # pragma: no cover - big-endian hosts
+        for values in (starts, durations, offsets):
+            values.byteswap()
+    body = (
+        starts.tobytes(),
+        durations.tobytes(),
+        offsets.tobytes(),
+        zlib.compress(bytes(text), compression_level),
+    )
+    checksum = 0
+    for chunk in body:
+        checksum = zlib.crc32(chunk, checksum)
+
+    header = json.dumps(
+        {
+            "language": language,
+            "language_code": language_code,
+            "is_generated": bool(is_generated),
+            "count": len(starts),
+            "text_size": len(text),
+            "crc32": checksum,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    padding = -(_PREAMBLE.size + len(header)) % _ALIGNMENT
+
+    return b"".join((_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header)), header, b"\0" * padding, *body))
+
+
+def transcript_format_version(data) -> int:
+    """Return the format version of a packed transcript payload."""
+
+    buffer = memoryview(data)
+    if len(buffer) < _PREAMBLE.size:
+        raise TranscriptFormatError("payload too short")
+    magic, version, _reserved, _header_size = _PREAMBLE.unpack_from(buffer)
+    if magic != MAGIC:
+        raise TranscriptFormatError("not a packed transcript")
+    return version
+
+
+def decode_transcript(data, *, verify: bool = False) -> DecodedTranscript:
+    """Decode a packed transcript without copying its numeric arrays.
+
+    Raises :class:`TranscriptFormatError` when the payload is malformed or,
+    with ``verify``, when its checksum does not match.
+    """
+
+    buffer = memoryview(data)
+    version = transcript_format_version(buffer)
+    if not MIN_FORMAT_VERSION <= version <= FORMAT_VERSION:
+        raise TranscriptFormatError(f"unsupported packed transcript version {version}")
+    _magic, _version, _reserved, header_size = _PREAMBLE.unpack_from(buffer)
+
+    header_end = _PREAMBLE.size + header_size
+    try:
+        header = json.loads(bytes(buffer[_PREAMBLE.size : header_end]))
+        count = int(header["count"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise TranscriptFormatError(f"invalid header: {exc}") from exc
+
+    position = header_end + (-header_end % _ALIGNMENT)
+    if verify and version >= 4 and zlib.crc32(buffer[position:]) != header.get("crc32"):
+        raise TranscriptFormatError("checksum mismatch")
+    starts, position = _read_array(buffer, position, "d", count)
+    durations, position = _read_array(buffer, position, "d", count)
+    offsets, position = _read_array(buffer, position, "I", count + 1)
+    if offsets[0] != 0 or offsets[count] != header.get("text_size", offsets[count]):
+        raise TranscriptFormatError("offsets do not match header")
+
+    return DecodedTranscript(
+        lines=PackedTranscript(starts, durations, offsets, buffer[position:]),
+        language=header.get("language"),
+        language_code=header.get("language_code"),
+        is_generated=bool(header.get("is_generated")),
+    )
+
+
+def check_transcript(data) -> None:
+    """Decode every part of a packed transcript, raising on any damage.
+
+    Beyond :func:`decode_transcript`, this verifies the checksum,
+    decompresses the text and checks it against the offsets, which also
+    catches damage in version 3 payloads that carry no checksum.
+    """
+
+    buffer = memoryview(data)
+    decoded = decode_transcript(buffer, verify=True)
+    lines = decoded.lines
+    text = lines._text.get()
+    offsets = lines._offsets
+    if len(offsets) and (offsets[0] != 0 or offsets[-1] != len(text)):
+        raise TranscriptFormatError("text does not match offsets")
+    if any(offsets[index] > offsets[index + 1] for index in range(len(offsets) - 1)):
+        raise TranscriptFormatError("offsets out of order")
+    try:
+        text.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise TranscriptFormatError(f"invalid text: {exc}") from exc
+
+
+def _read_array(buffer: memoryview, position: int, typecode: str, count: int):
+    itemsize = array(typecode).itemsize
+    end = position + itemsize * count
+    if end > len(buffer):
+        raise TranscriptFormatError("payload truncated")
+    chunk = buffer[position:end]
+    if _LITTLE_ENDIAN:
+        return chunk.cast(typecode), end
+    values = array(typecode, chunk.tobytes())  # pragma: no cover - big-endian hosts
+    values.byteswap()  # pragma: no cover - big-endian hosts
+    return values, end  # pragma: no cover - big-endian hosts
+
+
+__all__ = [
+    "FORMAT_VERSION",
+    "DecodedTranscript",
+    "PackedTranscript",
+    "TranscriptFormatError",
+    "check_transcript",
+    "decode_transcript",
+    "encode_transcript",
+    "is_packed_transcript",
+    "transcript_format_version",
+]
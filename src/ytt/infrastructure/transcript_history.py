@@ -0,0 +1,284 @@
+"""Bounded, delta-compressed history of cached transcripts and metadata.
+
+When a transcript or metadata entry is overwritten with different
+content, the version it replaces is kept in a history entry stored next to
+it under the name ``history.<entry name>``. Versions are sequences of
+units, one per transcript line (start, duration and text) or per title
+and description line, and each older version is stored as a reverse delta
+against the one after it::
+
+    ["=", 0, 120]            copy units 0..119 of the newer version
+    ["+", [[12.5, 3.0, "…"]]] insert units only the older version has
+
+The history payload is a zlib-compressed JSON object with the newest delta
+first and a digest of the current entry's units, so a history left behind
+by an entry that was evicted and fetched again is recognised and started
+over rather than applied to the wrong base. History is only written when an
+entry changes; reads never touch it.
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from .cache_store import CacheRecord, CacheStore
+from .transcript_codec import TranscriptFormatError, decode_transcript, is_packed_transcript
+
+HISTORY_NAME_PREFIX = "history."
+HISTORY_VERSION = 1
+DEFAULT_HISTORY_LIMIT = 10
+
+KIND_TRANSCRIPT = "transcript"
+KIND_METADATA = "metadata"
+
+_MAGIC = b"YTTHIST\x01"
+
+Unit = Tuple
+"""A transcript line as ``(start, duration, text)`` or a metadata line as ``(field, text)``."""
+
+
+class HistoryFormatError(ValueError):
+    """Raised when a payload is not a valid history entry."""
+
+
+@dataclass(frozen=True)
+class Version:
+    """One version of an entry and when it was written."""
+
+    stored_at: float
+    units: Tuple[Unit, ...]
+
+
+@dataclass(frozen=True)
+class EntryHistory:
+    """The current version of an entry followed by its older versions, newest first.
+
+    ``detached`` is set when a history exists but no longer matches the
+    current entry, so its older versions cannot be rebuilt.
+    """
+
+    name: str
+    kind: str
+    versions: Tuple[Version, ...]
+    detached: bool = False
+
+
+def history_name(name: str) -> str:
+    return HISTORY_NAME_PREFIX + name
+
+
+def is_history_name(name: str) -> bool:
+    return name.startswith(HISTORY_NAME_PREFIX)
+
+
+def versioned_units(data) -> Optional[Tuple[str, Tuple[Unit, ...]]]:
+    """Return ``(kind, units)`` for a transcript or metadata payload, or ``None``."""
+
+    if is_packed_transcript(data):
+        try:
+            # Every line is materialized, so the whole payload is read anyway.
+            lines = decode_transcript(data, verify=True).lines
+            units = tuple((line.start, line.duration, line.text) for line in lines)
+        except (TranscriptFormatError, ValueError, zlib.error):
+            return None
+        return KIND_TRANSCRIPT, units
+    try:
+        payload = json.loads(bytes(data))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or "title" not in payload:
+        return None
+    units: List[Unit] = []
+    if payload.get("title") is not None:
+        units.append(("title", str(payload["title"])))
+    if payload.get("description") is not None:
+        units.extend(("description", line) for line in str(payload["description"]).split("\n"))
+    return KIND_METADATA, tuple(units)
+
+
+def make_delta(newer: Sequence[Unit], older: Sequence[Unit]) -> List[list]:
+    """Operations that rebuild ``older`` from ``newer``."""
+
+    delta: List[list] = []
+    matcher = difflib.SequenceMatcher(None, newer, older, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append(["=", i1, i2])
+        elif j2 > j1:
+            delta.append(["+", [list(unit) for unit in older[j1:j2]]])
+    return delta
+
+
+def apply_delta(newer: Sequence[Unit], delta: Sequence[list]) -> Tuple[Unit, ...]:
+    older: List[Unit] = []
+    for operation in delta:
+        if operation[0] == "=":
+            older.extend(newer[operation[1] : operation[2]])
+        elif operation[0] == "+":
+            older.extend(tuple(unit) for unit in operation[1])
+        else:
+            raise HistoryFormatError(f"unknown delta operation {operation[0]!r}")
+    return tuple(older)
+
+
+def encode_history(payload: dict) -> bytes:
+    return _MAGIC + zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_history(data) -> dict:
+    """Decode a history payload, raising :class:`HistoryFormatError` if it is unusable."""
+
+    raw = bytes(data)
+    if not raw.startswith(_MAGIC):
+        raise HistoryFormatError("not a history entry")
+    try:
+        payload = json.loads(zlib.decompress(raw[len(_MAGIC) :]))
+    except (zlib.error, ValueError) as exc:
+        raise HistoryFormatError(f"unreadable history: {exc}") from exc
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != HISTORY_VERSION
+        or not isinstance(payload.get("versions"), list)
+    ):
+        raise HistoryFormatError("not a versioned history object")
+    return payload
+
+
+def record_version(
+    store: CacheStore,
+    video_id: str,
+    name: str,
+    previous: Optional[CacheRecord],
+    data: bytes,
+    *,
+    limit: int = DEFAULT_HISTORY_LIMIT,
+) -> bool:
+    """Add the version ``previous`` held to the history of ``name`` if ``data`` differs from it.
+
+    Returns whether the history was written.
+    """
+
+    if limit <= 0 or previous is None or bytes(previous.data) == bytes(data):
+        return False
+    old = versioned_units(previous.data)
+    new = versioned_units(data)
+    if old is None or new is None or old[0] != new[0] or old[1] == new[1]:
+        return False
+    kind, new_units = new
+    old_units = old[1]
+
+    versions: list = []
+    existing = store.get(video_id, history_name(name))
+    if existing is not None:
+        try:
+            payload = decode_history(existing.data)
+        except HistoryFormatError:
+            payload = None
+        # Older deltas apply to the version being replaced; anything else is a stale chain.
+        if payload is not None and payload.get("kind") == kind and payload.get("base") == _digest(old_units):
+            versions = payload["versions"]
+    versions.insert(0, {"stored_at": previous.stored_at, "delta": make_delta(new_units, old_units)})
+    payload = {"version": HISTORY_VERSION, "kind": kind, "base": _digest(new_units), "versions": versions[:limit]}
+    store.put(video_id, history_name(name), encode_history(payload))
+    return True
+
+
+def load_history(store: CacheStore, video_id: str, name: str) -> Optional[EntryHistory]:
+    """Rebuild every stored version of ``name``, or return ``None`` if the entry is not cached."""
+
+    current = store.get(video_id, name)
+    if current is None:
+        return None
+    decoded = versioned_units(current.data)
+    if decoded is None:
+        return None
+    kind, units = decoded
+    versions = [Version(current.stored_at, units)]
+    record = store.get(video_id, history_name(name))
+    if record is None:
+        return EntryHistory(name, kind, tuple(versions))
+    try:
+        payload = decode_history(record.data)
+        if payload.get("kind") != kind or payload.get("base") != _digest(units):
+            return EntryHistory(name, kind, tuple(versions), detached=True)
+        for item in payload["versions"]:
+            units = apply_delta(units, item["delta"])
+            versions.append(Version(float(item["stored_at"]), units))
+    except (HistoryFormatError, KeyError, IndexError, TypeError, ValueError):
+        return EntryHistory(name, kind, tuple(versions), detached=True)
+    return EntryHistory(name, kind, tuple(versions))
+
+
+def render_units(kind: str, units: Sequence[Unit]) -> List[str]:
+    """Lines of a version as shown by ``ytt diff``."""
+
+    if kind == KIND_METADATA:
+        return [f"# {unit[1]}" if unit[0] == "title" else unit[1] for unit in units]
+    return [f"[{_timestamp(unit[0])}] {' '.join(str(unit[2]).split())}" for unit in units]
+
+
+def diff_versions(history: EntryHistory, older: int, newer: int) -> List[str]:
+    """Unified diff between two versions of ``history``, indexed newest first."""
+
+    before, after = history.versions[older], history.versions[newer]
+    return list(
+        difflib.unified_diff(
+            render_units(history.kind, before.units),
+            render_units(history.kind, after.units),
+            fromfile=f"{history.name} @ {_stamp(before.stored_at)}",
+            tofile=f"{history.name} @ {_stamp(after.stored_at)}",
+            lineterm="",
+        )
+    )
+
+
+def change_counts(newer: Sequence[Unit], older: Sequence[Unit]) -> Tuple[int, int]:
+    """Return ``(added, removed)`` units going from ``older`` to ``newer``."""
+
+    matcher = difflib.SequenceMatcher(None, older, newer, autojunk=False)
+    added = removed = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            removed += i2 - i1
+            added += j2 - j1
+    return added, removed
+
+
+def _digest(units: Sequence[Unit]) -> str:
+    encoded = json.dumps([list(unit) for unit in units], separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _timestamp(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def _stamp(stored_at: float) -> str:
+    return datetime.fromtimestamp(stored_at).strftime("%Y-%m-%d %H:%M")
+
+
+__all__ = [
+    "DEFAULT_HISTORY_LIMIT",
+    "HISTORY_NAME_PREFIX",
+    "EntryHistory",
+    "HistoryFormatError",
+    "Version",
+    "apply_delta",
+    "change_counts",
+    "decode_history",
+    "diff_versions",
+    "history_name",
+    "is_history_name",
+    "load_history",
+    "make_delta",
+    "record_version",
+    "render_units",
+]
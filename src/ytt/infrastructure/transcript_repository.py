@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
-import pickle
+import json
+import mmap
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
 from pathlib import Path
-from typing import Iterable, Optional, Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 from youtube_transcript_api import (
     NoTranscriptFound,
@@ -13,19 +19,197 @@ from youtube_transcript_api import (
     YouTubeTranscriptApi,
 )
 
-from ..domain.entities import TranscriptLine, VideoMetadata, VideoTranscriptBundle
-from ..domain.services import MetadataGateway, TranscriptRepository
+from ..domain.entities import TranscriptLine, TranscriptTrack, VideoMetadata, VideoTranscriptBundle
+from ..domain.services import (
+    CACHE_FIRST,
+    CACHE_ONLY,
+    FRESHNESS_POLICIES,
+    NETWORK_FIRST,
+    STALE_WHILE_REVALIDATE,
+    MetadataGateway,
+    TranscriptRepository,
+)
 from ..domain.value_objects import VideoID
+from .cache_eviction import EVICTION_FILE_NAME, Evictable, EvictionSchedule, prune_cache
+from .cache_lock import FileKeyLocks, KeyLocks, NullKeyLocks
+from .cache_stats import CacheStatsRecorder
+from .cache_store import CacheRecord, CacheStore, FileCacheStore
+from .cache_tiers import local_cache_store
+from .transcript_codec import (
+    TranscriptFormatError,
+    decode_transcript,
+    encode_transcript,
+    is_packed_transcript,
+)
+from .transcript_history import record_version
+
+
+TRANSCRIPT_NAME_PREFIX = "transcript."
+METADATA_NAME = "metadata"
+UNAVAILABLE_NAME = "unavailable"
+TRACKS_NAME = "tracks"
+UNKNOWN_LANGUAGE = "und"
+LOCK_DIR_NAME = "locks"
+
+# Watch pages requested alongside transcripts on a miss, across all retrieving threads.
+_METADATA_WORKERS = 8
+
+TRANSCRIPTS_DISABLED = "disabled"
+NO_TRANSCRIPT = "not_found"
+UNAVAILABLE_REASONS = {
+    TRANSCRIPTS_DISABLED: "Transcript unavailable: transcripts are disabled for this video.",
+    NO_TRANSCRIPT: "Transcript unavailable: this video has no transcript.",
+}
+
+
+def parse_transcript_name(name: str) -> Optional[Tuple[str, bool]]:
+    """Return ``(language_code, is_generated)`` for a transcript entry name."""
+
+    if not name.startswith(TRANSCRIPT_NAME_PREFIX):
+        return None
+    language_code, _, kind = name[len(TRANSCRIPT_NAME_PREFIX) :].rpartition(".")
+    if not language_code or kind not in {"manual", "generated"}:
+        return None
+    return language_code, kind == "generated"
+
+
+class _NetworkUsage:
+    """Counts the network requests made while serving one retrieval.
+
+    Requests may overlap; ``seconds`` is the time during which at least one
+    of them was in flight.
+    """
+
+    def __init__(self) -> None:
+        self.fetches = 0
+        self.seconds = 0.0
+        self._active = 0
+        self._since = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self) -> Iterator[None]:
+        with self._lock:
+            if self._active == 0:
+                self._since = time.perf_counter()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.fetches += 1
+                self._active -= 1
+                if self._active == 0:
+                    self.seconds += time.perf_counter() - self._since
+
+
+class _TranscriptUnavailable(Exception):
+    """Raised when YouTube reports that a video has no usable transcript."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class _CacheHit(NamedTuple):
+    bundle: VideoTranscriptBundle
+    stored_at: float
+
+
+@dataclass(frozen=True)
+class _CachedTranscript:
+    """Stand-in for an API transcript describing a cached entry."""
+
+    language_code: str
+    is_generated: bool
+    cache_name: str
+
+
+class _CachedTranscriptList(list):
+    """Cached transcripts or tracks exposing the ``TranscriptList`` subset used for selection."""
+
+    def __init__(self, video_id: str, transcripts: Iterable[_CachedTranscript | TranscriptTrack]) -> None:
+        super().__init__(transcripts)
+        self.video_id = video_id
+
+    @classmethod
+    def from_names(cls, video_id: str, names: Iterable[str]) -> "_CachedTranscriptList":
+        transcripts = []
+        for name in names:
+            parsed = parse_transcript_name(name)
+            if parsed is not None:
+                transcripts.append(
+                    _CachedTranscript(language_code=parsed[0], is_generated=parsed[1], cache_name=name)
+                )
+        return cls(video_id, transcripts)
+
+    def find_generated_transcript(self, language_codes: Sequence[str]) -> _CachedTranscript:
+        for language_code in language_codes:
+            for transcript in self:
+                if transcript.is_generated and transcript.language_code == language_code:
+                    return transcript
+        raise NoTranscriptFound(self.video_id, language_codes, self)
 
 
 class CachedYouTubeTranscriptRepository(TranscriptRepository):
     """Repository that stores transcripts locally and falls back to the API."""
 
-    CACHE_VERSION = 2
+    METADATA_CACHE_VERSION = 1
+    NEGATIVE_CACHE_VERSION = 1
+    TRACKS_CACHE_VERSION = 1
 
-    def __init__(self, cache_dir: Path, metadata_gateway: MetadataGateway) -> None:
-        self._cache_dir = cache_dir
+    def __init__(
+        self,
+        cache: CacheStore | Path,
+        metadata_gateway: MetadataGateway,
+        *,
+        max_cache_bytes: Optional[int] = None,
+        max_cache_age: Optional[float] = None,
+        transcript_ttl: Optional[float] = None,
+        metadata_ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        transcript_api: Optional[YouTubeTranscriptApi] = None,
+        locks: Optional[KeyLocks] = None,
+        stats: Optional[CacheStatsRecorder] = None,
+        revalidate: Optional[Callable[[VideoID, Sequence[str]], None]] = None,
+        history_versions: int = 0,
+        eviction: Optional[EvictionSchedule] = None,
+        evictable: Sequence[Evictable] = (),
+    ) -> None:
+        eviction_state = None
+        if isinstance(cache, Path):
+            if locks is None:
+                locks = FileKeyLocks(cache / LOCK_DIR_NAME)
+            eviction_state = cache / EVICTION_FILE_NAME
+            cache = FileCacheStore(cache)
+        self._store = cache
         self._metadata_gateway = metadata_gateway
+        self._max_cache_bytes = max_cache_bytes
+        self._max_cache_age = max_cache_age
+        # Writes only scan the cache for eviction once they may have exceeded its budget; pass
+        # ``eviction`` to share the running total with other writers such as the rendered-output cache.
+        self._eviction = eviction or EvictionSchedule(
+            max_bytes=max_cache_bytes, max_age=max_cache_age, path=eviction_state
+        )
+        # Files next to the store that are evicted with it.
+        self._evictable = tuple(evictable)
+        self._transcript_ttl = transcript_ttl
+        self._metadata_ttl = metadata_ttl
+        # Unlike the other TTLs, ``None`` disables negative caching.
+        self._negative_ttl = negative_ttl
+        self._transcript_api = transcript_api
+        self._locks = locks or NullKeyLocks()
+        self._stats = stats or CacheStatsRecorder()
+        # Refreshes a video whose expired entries were served; see ``stale-while-revalidate``.
+        self._revalidate = revalidate
+        self._revalidating: Set[Tuple[str, Tuple[str, ...]]] = set()
+        # Earlier versions kept per transcript and metadata entry; 0 keeps none.
+        self._history_versions = history_versions
+        self._warned_legacy = False
+        # Entries read or written by the retrieval running on each thread.
+        self._served = threading.local()
+        self._metadata_executor: Optional[ThreadPoolExecutor] = None
+        self._metadata_executor_lock = threading.Lock()
 
     def retrieve(
         self,
@@ -33,89 +217,653 @@ class CachedYouTubeTranscriptRepository(TranscriptRepository):
         preferred_languages: Sequence[str],
         *,
         refresh: bool = False,
+        refresh_metadata: bool = False,
+        refresh_transcript: bool = False,
+        policy: str = CACHE_FIRST,
     ) -> Optional[VideoTranscriptBundle]:
-        cache_path = self._cache_path(video_id, preferred_languages)
+        if policy not in FRESHNESS_POLICIES:
+            raise ValueError(f"Unknown freshness policy: {policy}")
+        refresh = refresh or policy == NETWORK_FIRST
+        refresh_metadata = refresh or refresh_metadata
+        refresh_transcript = refresh or refresh_transcript
+        network = _NetworkUsage()
+        started = time.perf_counter()
+        bundle = None
+        sources: Dict[str, float] = {}
+        self._served.sources = sources
+        try:
+            bundle = self._retrieve(
+                video_id,
+                preferred_languages,
+                network,
+                refresh_metadata=refresh_metadata,
+                refresh_transcript=refresh_transcript,
+                policy=policy,
+            )
+            if bundle is not None and METADATA_NAME in sources and len(sources) > 1:
+                bundle = replace(bundle, sources=tuple(sorted(sources.items())))
+            return bundle
+        finally:
+            self._served.sources = None
+            self._record_retrieval(
+                network,
+                elapsed=time.perf_counter() - started,
+                refreshed=refresh_metadata or refresh_transcript,
+                negative_hit=bundle is not None and bundle.transcript_unavailable is not None,
+                missed=bundle is None,
+            )
 
-        if not refresh and cache_path.exists():
-            cached = self._load_cache(cache_path)
+    def _retrieve(
+        self,
+        video_id: VideoID,
+        preferred_languages: Sequence[str],
+        network: "_NetworkUsage",
+        *,
+        refresh_metadata: bool,
+        refresh_transcript: bool,
+        policy: str = CACHE_FIRST,
+    ) -> Optional[VideoTranscriptBundle]:
+        # Offline and stale-while-revalidate reads accept expired entries and
+        # collect their names in ``stale``.
+        stale: Optional[Set[str]] = set() if policy in (CACHE_ONLY, STALE_WHILE_REVALIDATE) else None
+        offline = policy == CACHE_ONLY
+        wrote_cache = False
+        unavailable = None
+        cached = None
+        metadata = None
+        pending_metadata: Optional[Future] = None
+        if not refresh_transcript:
+            cached = self._read_cached_selection(video_id, preferred_languages, stale=stale)
+            if cached is None:
+                unavailable = self._read_unavailable(video_id, stale=stale)
+
+        if cached is None and unavailable is None and offline:
+            print(f"Error: No cached transcript for {video_id.value} (offline).", file=sys.stderr)
+            return None
+        try:
+            if cached is None and unavailable is None:
+                written_after = time.time() if refresh_transcript else None
+                with self._locks.hold(f"{video_id.value}.transcript"):
+                    # Another process may have fetched the transcript while we waited.
+                    cached = self._read_cached_selection(video_id, preferred_languages, written_after=written_after)
+                    if cached is None:
+                        unavailable = self._read_unavailable(video_id, written_after=written_after)
+                    if cached is None and unavailable is None:
+                        if not refresh_metadata:
+                            metadata = self._read_metadata(video_id, stale=stale)
+                        if metadata is None:
+                            # Request the watch page while the transcript is listed and fetched.
+                            pending_metadata = self._start_metadata_fetch(
+                                video_id, network, refresh_metadata=refresh_metadata, policy=policy
+                            )
+                        try:
+                            with network.timed():
+                                transcript_data = self._fetch_from_api(video_id, preferred_languages)
+                        except _TranscriptUnavailable as exc:
+                            unavailable = exc.reason
+                            wrote_cache |= self._save_unavailable(video_id, unavailable)
+                        else:
+                            if transcript_data is None and policy == NETWORK_FIRST:
+                                cached = self._read_cached_selection(video_id, preferred_languages, stale=set())
+                                if cached is not None:
+                                    print(
+                                        f"Warning: Serving the cached transcript of {video_id.value}.", file=sys.stderr
+                                    )
+                            if transcript_data is None and cached is None:
+                                return None
+                            if transcript_data is not None:
+                                transcript = self._to_transcript(transcript_data)
+                                wrote_cache |= self._save_transcript(video_id, transcript, transcript_data)
+                                self._delete(video_id, UNAVAILABLE_NAME)
             if cached is not None:
-                return cached
+                transcript = cached.bundle.transcript
+            elif unavailable is not None:
+                transcript = []
+
+            if pending_metadata is not None:
+                metadata, saved = pending_metadata.result()
+                pending_metadata = None
+                wrote_cache |= saved
+            elif metadata is None and not refresh_metadata:
+                metadata = self._read_metadata(video_id, stale=stale)
+        finally:
+            if pending_metadata is not None and not pending_metadata.cancel():
+                # The retrieval gave up early, outside the lock; wait so the request is not left running.
+                wait([pending_metadata])
+        if metadata is None and offline:
+            metadata = VideoMetadata(title=None, description=None)
+        if metadata is None:
+            metadata, saved = self._fetch_metadata(video_id, network, refresh_metadata=refresh_metadata, policy=policy)
+            wrote_cache |= saved
+
+        if wrote_cache:
+            self._evict()
+        if stale and policy == STALE_WHILE_REVALIDATE:
+            self._schedule_revalidation(video_id, preferred_languages)
+        return VideoTranscriptBundle(
+            transcript=transcript,
+            metadata=metadata,
+            transcript_unavailable=UNAVAILABLE_REASONS[unavailable] if unavailable else None,
+        )
+
+    def _fetch_metadata(
+        self, video_id: VideoID, network: "_NetworkUsage", *, refresh_metadata: bool, policy: str
+    ) -> Tuple[VideoMetadata, bool]:
+        """Fetch and cache the metadata of ``video_id``; return it and whether it was written."""
+
+        requested_at = time.time()
+        with self._locks.hold(f"{video_id.value}.metadata"):
+            # Another process may have fetched the metadata while we waited.
+            metadata = self._read_metadata(video_id, written_after=requested_at if refresh_metadata else None)
+            if metadata is not None:
+                return metadata, False
+            # Stamped with the request time, so a watch page archived by this fetch is
+            # never older than the metadata extracted from it; see ``ytt cache reextract``.
+            fetched_at = time.time()
+            with network.timed():
+                metadata = self._metadata_gateway.fetch(video_id)
+            saved = self._save_metadata(video_id, metadata, stored_at=fetched_at)
+            if policy == NETWORK_FIRST and metadata.title is None and metadata.description is None:
+                metadata = self._read_metadata(video_id, stale=set()) or metadata
+            return metadata, saved
+
+    def _start_metadata_fetch(
+        self, video_id: VideoID, network: "_NetworkUsage", *, refresh_metadata: bool, policy: str
+    ) -> Future:
+        """Run :meth:`_fetch_metadata` on a background thread, on behalf of the calling retrieval.
+
+        The caller must not wait for the result while holding a lock.
+        """
+
+        with self._metadata_executor_lock:
+            if self._metadata_executor is None:
+                self._metadata_executor = ThreadPoolExecutor(
+                    max_workers=_METADATA_WORKERS, thread_name_prefix="ytt-metadata"
+                )
+        sources = getattr(self._served, "sources", None)
 
-        transcript_data = self._fetch_from_api(video_id, preferred_languages)
-        if transcript_data is not None:
-            transcript = self._to_transcript(transcript_data)
-            metadata = self._metadata_gateway.fetch(video_id)
-            bundle = VideoTranscriptBundle(
-                transcript=transcript, metadata=metadata
+        def fetch() -> Tuple[VideoMetadata, bool]:
+            self._served.sources = sources
+            try:
+                return self._fetch_metadata(video_id, network, refresh_metadata=refresh_metadata, policy=policy)
+            finally:
+                self._served.sources = None
+
+        return self._metadata_executor.submit(fetch)
+
+    @property
+    def locks(self) -> KeyLocks:
+        """Per-entry locks held around each read-compare-write of the cache."""
+
+        return self._locks
+
+    def close(self) -> None:
+        """Stop the metadata worker threads once the fetches already submitted have finished."""
+
+        with self._metadata_executor_lock:
+            executor, self._metadata_executor = self._metadata_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def list_tracks(self, video_id: VideoID, *, policy: str = CACHE_FIRST) -> Optional[List[TranscriptTrack]]:
+        """Return the transcripts YouTube offers for ``video_id``, from the cache while it is fresh.
+
+        Listing from the network caches the list, as every transcript fetch
+        does. A video whose transcripts are disabled has no tracks.
+        """
+
+        if policy not in FRESHNESS_POLICIES:
+            raise ValueError(f"Unknown freshness policy: {policy}")
+        network = _NetworkUsage()
+        started = time.perf_counter()
+        tracks = None
+        # Expired lists are only served without the network, and are not revalidated.
+        accept_stale = policy in (CACHE_ONLY, STALE_WHILE_REVALIDATE)
+        try:
+            if policy != NETWORK_FIRST:
+                tracks = self._read_tracks(video_id, stale=set() if accept_stale else None)
+            if tracks is None and policy == CACHE_ONLY:
+                print(f"Error: No cached track list for {video_id.value} (offline).", file=sys.stderr)
+                return None
+            if tracks is None:
+                tracks = self._list_tracks_from_api(video_id, network)
+            if tracks is None and policy == NETWORK_FIRST:
+                tracks = self._read_tracks(video_id, stale=set())
+            return tracks
+        finally:
+            self._record_retrieval(
+                network,
+                elapsed=time.perf_counter() - started,
+                refreshed=policy == NETWORK_FIRST,
+                negative_hit=False,
+                missed=tracks is None,
             )
-            self._save_cache(cache_path, bundle)
-            return bundle
-        return None
 
-    def _cache_path(self, video_id: VideoID, preferred_languages: Sequence[str]) -> Path:
+    def _list_tracks_from_api(self, video_id: VideoID, network: "_NetworkUsage") -> Optional[List[TranscriptTrack]]:
+        with self._locks.hold(f"{video_id.value}.transcript"):
+            try:
+                with network.timed():
+                    transcript_api = self._transcript_api or YouTubeTranscriptApi()
+                    transcript_list = list(transcript_api.list(video_id.value))
+            except TranscriptsDisabled:
+                print(f"Error: Transcripts are disabled for video ID: {video_id.value}", file=sys.stderr)
+                return []
+            except Exception as exc:  # pragma: no cover - defensive
+                print(f"Error: Could not list transcripts for video ID: {video_id.value}: {exc}", file=sys.stderr)
+                return None
+        tracks = self._to_tracks(transcript_list)
+        self._save_tracks(video_id, tracks)
+        return tracks
+
+    def refresh_track(self, video_id: VideoID, language_code: str, is_generated: bool) -> bool:
+        """Fetch the transcript track ``(language_code, is_generated)`` again and cache it.
+
+        Unlike :meth:`retrieve`, which picks a track by preference, this
+        rewrites exactly the given entry. Returns whether it was saved.
+        """
+
+        network = _NetworkUsage()
+        started = time.perf_counter()
+        saved = False
+        try:
+            with self._locks.hold(f"{video_id.value}.transcript"):
+                try:
+                    with network.timed():
+                        transcript_api = self._transcript_api or YouTubeTranscriptApi()
+                        transcript_list = list(transcript_api.list(video_id.value))
+                        self._save_tracks(video_id, self._to_tracks(transcript_list))
+                        track = next(
+                            (
+                                transcript
+                                for transcript in transcript_list
+                                if transcript.language_code == language_code
+                                and bool(transcript.is_generated) == is_generated
+                            ),
+                            None,
+                        )
+                        if track is None:
+                            kind = "generated" if is_generated else "manual"
+                            print(
+                                f"Error: No {kind} transcript in {language_code} for video ID: {video_id.value}",
+                                file=sys.stderr,
+                            )
+                            return False
+                        transcript_data = track.fetch()
+                except TranscriptsDisabled:
+                    print(f"Error: Transcripts are disabled for video ID: {video_id.value}", file=sys.stderr)
+                    return False
+                except Exception as exc:  # pragma: no cover - defensive
+                    print(f"Error: Could not fetch a transcript for video ID: {video_id.value}: {exc}", file=sys.stderr)
+                    return False
+                saved = self._save_transcript(video_id, self._to_transcript(transcript_data), track)
+            if saved:
+                self._evict()
+            return saved
+        finally:
+            self._record_retrieval(network, elapsed=time.perf_counter() - started, refreshed=True, negative_hit=False)
+
+    def is_cached(self, video_id: VideoID, preferred_languages: Sequence[str]) -> bool:
+        """Return whether :meth:`retrieve` would be served entirely from fresh cache entries."""
+
+        cached = self._read_cached_selection(video_id, preferred_languages)
+        if cached is None and self._read_unavailable(video_id, report=False) is None:
+            return False
+        return self._read_metadata(video_id) is not None
+
+    @staticmethod
+    def _transcript_cache_name(language_code: str, is_generated: bool) -> str:
+        kind = "generated" if is_generated else "manual"
+        return f"{TRANSCRIPT_NAME_PREFIX}{language_code}.{kind}"
+
+    @staticmethod
+    def _legacy_cache_name(preferred_languages: Sequence[str]) -> str:
         languages = sorted({lang.lower() for lang in preferred_languages if lang})
-        lang_key = "_".join(languages) if languages else "any"
-        return self._cache_dir / f"{video_id.value}_{lang_key}.pkl"
+        return "_".join(languages) if languages else "any"
 
-    def _load_cache(self, cache_path: Path) -> Optional[VideoTranscriptBundle]:
+    def _read_cached_selection(
+        self,
+        video_id: VideoID,
+        preferred_languages: Sequence[str],
+        *,
+        written_after: Optional[float] = None,
+        stale: Optional[Set[str]] = None,
+    ) -> Optional[_CacheHit]:
+        """Select among cached transcripts exactly as a fresh listing would.
+
+        A cached transcript is only used when it matches one of the preferred
+        languages (or no preference is set); otherwise the network may offer a
+        better match. Entries written under the old preferred-language keys
+        are consulted last. With ``written_after``, only entries stored since
+        then count as hits. With ``stale``, expired entries count as hits too
+        and their names are added to it.
+
+        While the video's track list is cached and fresh, the selection runs
+        against it instead, so the cached transcript is used whenever it is
+        the one a fresh listing would pick, in any language.
+        """
+
+        for cache_name in self.cached_transcript_names(video_id, preferred_languages):
+            cached = self._read_cache(video_id, cache_name, written_after=written_after, stale=stale)
+            if cached is not None:
+                return cached
+        return None
+
+    def cached_transcript_names(self, video_id: VideoID, preferred_languages: Sequence[str]) -> List[str]:
+        """Return the transcript entries a retrieval would read, in the order it tries them.
+
+        Only the track list is read, never a transcript.
+        """
+
+        tracks = self._read_tracks(video_id)
+        if tracks is None:
+            try:
+                names = self._store.names(video_id.value, TRANSCRIPT_NAME_PREFIX)
+            except Exception as exc:  # pragma: no cover - defensive
+                print(f"Warning: Error listing cache entries for {video_id.value}: {exc}. Fetching again.", file=sys.stderr)
+                names = []
+            return self.select_cached_transcripts(video_id.value, names, preferred_languages)
+
+        candidates = []
         try:
-            with open(cache_path, "rb") as handle:
-                payload = pickle.load(handle)
-        except pickle.UnpicklingError:
-            print(f"Warning: Could not unpickle cache file {cache_path}. Fetching again.", file=sys.stderr)
+            track_list = _CachedTranscriptList(video_id.value, tracks)
+            selected = self._find_transcript_object(track_list, preferred_languages)
+        except NoTranscriptFound:
+            selected = None
+        if selected is not None:
+            candidates.append(self._transcript_cache_name(selected.language_code, selected.is_generated))
+        candidates.append(self._legacy_cache_name(preferred_languages))
+        return candidates
+
+    @classmethod
+    def select_cached_transcripts(
+        cls, video_id: str, names: Sequence[str], preferred_languages: Sequence[str]
+    ) -> List[str]:
+        """Pick from cached entry ``names`` alone what a retrieval without a track list would read.
+
+        Without the track list a preference can only be served by a cached
+        transcript in a preferred language, then by the legacy entry.
+        """
+
+        candidates = []
+        cached_list = _CachedTranscriptList.from_names(video_id, names)
+        if cached_list:
+            try:
+                selected = cls._find_transcript_object(cached_list, preferred_languages)
+            except NoTranscriptFound:
+                selected = None
+            if selected is not None and (not preferred_languages or selected.language_code in preferred_languages):
+                candidates.append(selected.cache_name)
+        candidates.append(cls._legacy_cache_name(preferred_languages))
+        return candidates
+
+    def _read_cache(
+        self,
+        video_id: VideoID,
+        cache_name: str,
+        *,
+        written_after: Optional[float] = None,
+        stale: Optional[Set[str]] = None,
+    ) -> Optional[_CacheHit]:
+        record = self._get_fresh_record(video_id, cache_name, self._transcript_ttl, mapped=True, stale=stale)
+        if record is None or (written_after is not None and record.stored_at < written_after):
             return None
-        except FileNotFoundError:
-            print(f"Warning: Cache file not found {cache_path} despite check. Fetching again.", file=sys.stderr)
+        bundle = self._load_cache(record.data)
+        if bundle is None:
             return None
-        except Exception as exc:  # pragma: no cover - defensive
-            print(f"Warning: Error reading cache file {cache_path}: {exc}. Fetching again.", file=sys.stderr)
+        self._record_access(video_id, cache_name)
+        return _CacheHit(bundle=bundle, stored_at=record.stored_at)
+
+    def _read_metadata(
+        self, video_id: VideoID, *, written_after: Optional[float] = None, stale: Optional[Set[str]] = None
+    ) -> Optional[VideoMetadata]:
+        record = self._get_fresh_record(video_id, METADATA_NAME, self._metadata_ttl, stale=stale)
+        if record is None or (written_after is not None and record.stored_at < written_after):
+            return None
+        try:
+            payload = json.loads(record.data)
+        except ValueError:
+            print(f"Warning: Could not decode cached metadata for {video_id.value}. Fetching again.", file=sys.stderr)
+            return None
+        if not isinstance(payload, dict) or payload.get("version") != self.METADATA_CACHE_VERSION:
             return None
+        self._record_access(video_id, METADATA_NAME)
+        return VideoMetadata(title=payload.get("title"), description=payload.get("description"))
 
-        if isinstance(payload, VideoTranscriptBundle):
-            return payload
+    def _read_tracks(self, video_id: VideoID, *, stale: Optional[Set[str]] = None) -> Optional[List[TranscriptTrack]]:
+        """Return the cached track list of ``video_id``; it expires with the metadata TTL."""
 
-        if isinstance(payload, dict):
-            version = payload.get("version")
-            transcript = payload.get("transcript")
-            metadata_dict = payload.get("metadata", {})
-            if version == self.CACHE_VERSION and isinstance(transcript, list):
-                metadata = VideoMetadata(
-                    title=metadata_dict.get("title"),
-                    description=metadata_dict.get("description"),
+        record = self._get_fresh_record(video_id, TRACKS_NAME, self._metadata_ttl, stale=stale)
+        if record is None:
+            return None
+        try:
+            payload = json.loads(record.data)
+            if not isinstance(payload, dict) or payload.get("version") != self.TRACKS_CACHE_VERSION:
+                return None
+            return [
+                TranscriptTrack(
+                    language_code=str(track["language_code"]),
+                    language=track.get("language"),
+                    is_generated=bool(track["is_generated"]),
+                    is_translatable=bool(track.get("is_translatable", False)),
                 )
-                bundle = VideoTranscriptBundle(
-                    transcript=transcript,
-                    metadata=metadata,
+                for track in payload["tracks"]
+            ]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def _read_unavailable(
+        self,
+        video_id: VideoID,
+        *,
+        written_after: Optional[float] = None,
+        report: bool = True,
+        stale: Optional[Set[str]] = None,
+    ) -> Optional[str]:
+        """Return the cached reason why ``video_id`` has no transcript, if any."""
+
+        if self._negative_ttl is None:
+            return None
+        record = self._get_fresh_record(video_id, UNAVAILABLE_NAME, self._negative_ttl, stale=stale)
+        if record is None or (written_after is not None and record.stored_at < written_after):
+            return None
+        try:
+            payload = json.loads(record.data)
+        except ValueError:
+            return None
+        if not isinstance(payload, dict) or payload.get("version") != self.NEGATIVE_CACHE_VERSION:
+            return None
+        reason = payload.get("reason")
+        if reason not in UNAVAILABLE_REASONS:
+            return None
+        if report:
+            print(
+                f"Error: {UNAVAILABLE_REASONS[reason]} ({video_id.value}, cached; use --refresh to check again)",
+                file=sys.stderr,
+            )
+        return reason
+
+    def _record_retrieval(
+        self, network: "_NetworkUsage", *, elapsed: float, refreshed: bool, negative_hit: bool, missed: bool = False
+    ) -> None:
+        if network.fetches == 0 and missed:
+            # Only offline retrievals miss without trying the network.
+            self._stats.add(misses=1)
+            return
+        if network.fetches == 0:
+            self._stats.add(hits=1, hit_seconds=elapsed, negative_hits=int(negative_hit))
+            return
+        self._stats.add(
+            fetches=network.fetches,
+            fetch_seconds=network.seconds,
+            **{"refreshes" if refreshed else "misses": 1},
+        )
+
+    def _get_fresh_record(
+        self,
+        video_id: VideoID,
+        cache_name: str,
+        ttl: Optional[float],
+        *,
+        mapped: bool = False,
+        stale: Optional[Set[str]] = None,
+    ) -> Optional[CacheRecord]:
+        """Read an entry younger than ``ttl``; with ``stale``, older ones are returned and noted there."""
+
+        try:
+            if mapped:
+                record = self._store.get_mapped(video_id.value, cache_name)
+            else:
+                record = self._store.get(video_id.value, cache_name)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Error reading cache entry {video_id.value}/{cache_name}: {exc}. Fetching again.", file=sys.stderr)
+            return None
+        if record is None:
+            return None
+        if not self._is_fresh(record.stored_at, ttl):
+            if stale is None:
+                return None
+            stale.add(cache_name)
+        self._stats.add(bytes_read=len(record.data))
+        self._note_source(cache_name, record.stored_at)
+        return record
+
+    def _note_source(self, cache_name: str, stored_at: Optional[float]) -> None:
+        """Record an entry the current retrieval used; ``None`` records its deletion."""
+
+        sources = getattr(self._served, "sources", None)
+        if sources is None:
+            return
+        if stored_at is None:
+            sources.pop(cache_name, None)
+        else:
+            sources[cache_name] = stored_at
+
+    def _schedule_revalidation(self, video_id: VideoID, preferred_languages: Sequence[str]) -> None:
+        """Start refreshing ``video_id`` in the background, once per video, languages and repository."""
+
+        key = (video_id.value, tuple(preferred_languages))
+        if self._revalidate is None or key in self._revalidating:
+            return
+        self._revalidating.add(key)
+        try:
+            self._revalidate(video_id, preferred_languages)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not start refreshing {video_id.value} in the background: {exc}", file=sys.stderr)
+
+    @staticmethod
+    def _is_fresh(stored_at: float, ttl: Optional[float]) -> bool:
+        return ttl is None or time.time() - stored_at <= ttl
+
+    def _record_access(self, video_id: VideoID, cache_name: str) -> None:
+        try:
+            self._store.touch(video_id.value, cache_name)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not update access time of cache entry {video_id.value}/{cache_name}: {exc}", file=sys.stderr)
+
+    def _evict(self) -> None:
+        now = time.time()
+        if not self._eviction.due(now):
+            return
+        try:
+            result = prune_cache(
+                self._store,
+                max_bytes=self._max_cache_bytes,
+                max_age=self._max_cache_age,
+                now=now,
+                extra=self._evictable,
+            )
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not prune cache: {exc}", file=sys.stderr)
+            return
+        self._eviction.record(result, now)
+
+    def _load_cache(self, data: bytes | mmap.mmap) -> Optional[VideoTranscriptBundle]:
+        if not is_packed_transcript(data):
+            # Pickled entries from before the packed format are converted by
+            # ``ytt cache migrate``; until then they are treated as misses.
+            if not self._warned_legacy:
+                self._warned_legacy = True
+                print(
+                    "Warning: The cache holds entries in a legacy format; run `ytt cache migrate` to convert them. "
+                    "Fetching again.",
+                    file=sys.stderr,
                 )
-                return bundle
+            return None
+        try:
+            # Verified here: lines are read lazily, long after a damaged entry could be refetched.
+            decoded = decode_transcript(data, verify=True)
+        except TranscriptFormatError as exc:
+            print(f"Warning: Could not decode cache entry ({exc}). Fetching again.", file=sys.stderr)
+            return None
+        return VideoTranscriptBundle(
+            transcript=decoded.lines,
+            metadata=VideoMetadata(title=None, description=None),
+        )
 
-        if isinstance(payload, list) and all(
-            isinstance(item, TranscriptLine) for item in payload
-        ):
-            metadata = VideoMetadata(title=None, description=None)
-            return VideoTranscriptBundle(transcript=payload, metadata=metadata)
+    def _save_transcript(self, video_id: VideoID, transcript: Sequence[TranscriptLine], source) -> bool:
+        language_code = getattr(source, "language_code", None) or UNKNOWN_LANGUAGE
+        is_generated = bool(getattr(source, "is_generated", False))
+        cache_name = self._transcript_cache_name(language_code, is_generated)
+        payload = encode_transcript(
+            transcript,
+            language=getattr(source, "language", None),
+            language_code=language_code,
+            is_generated=is_generated,
+        )
+        return self._put(video_id, cache_name, payload)
 
-        return None
+    def _save_metadata(self, video_id: VideoID, metadata: VideoMetadata, *, stored_at: Optional[float] = None) -> bool:
+        if metadata.title is None and metadata.description is None:
+            # Most likely a failed lookup; try again next time instead of caching it.
+            return False
+        return self._put(video_id, METADATA_NAME, encode_metadata(metadata), stored_at=stored_at)
+
+    def _save_tracks(self, video_id: VideoID, tracks: Sequence[TranscriptTrack]) -> bool:
+        payload = {"version": self.TRACKS_CACHE_VERSION, "tracks": [asdict(track) for track in tracks]}
+        return self._put(video_id, TRACKS_NAME, json.dumps(payload).encode("utf-8"))
 
-    def _save_cache(self, cache_path: Path, bundle: VideoTranscriptBundle) -> None:
-        try:
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(cache_path, "wb") as handle:
-                payload = {
-                    "version": self.CACHE_VERSION,
-                    "transcript": bundle.transcript,
-                    "metadata": {
-                        "title": bundle.metadata.title,
-                        "description": bundle.metadata.description,
-                    },
-                }
-                pickle.dump(payload, handle)
+    def _save_unavailable(self, video_id: VideoID, reason: str) -> bool:
+        if self._negative_ttl is None:
+            return False
+        payload = {"version": self.NEGATIVE_CACHE_VERSION, "reason": reason}
+        return self._put(video_id, UNAVAILABLE_NAME, json.dumps(payload).encode("utf-8"))
+
+    def _delete(self, video_id: VideoID, cache_name: str) -> None:
+        try:
+            self._store.delete(video_id.value, cache_name)
         except Exception as exc:  # pragma: no cover - defensive
-            print(f"Warning: Could not save transcript to cache file {cache_path}: {exc}", file=sys.stderr)
+            print(f"Warning: Could not delete cache entry {video_id.value}/{cache_name}: {exc}", file=sys.stderr)
+        self._note_source(cache_name, None)
+
+    def _put(self, video_id: VideoID, cache_name: str, data: bytes, *, stored_at: Optional[float] = None) -> bool:
+        stored_at = stored_at if stored_at is not None else time.time()
+        # Callers hold the entry's lock, so the version read here is the one being replaced.
+        # History is kept by the local tier alone: a shared or remote copy is not our predecessor.
+        versioned = self._history_versions > 0 and (
+            cache_name.startswith(TRANSCRIPT_NAME_PREFIX) or cache_name == METADATA_NAME
+        )
+        local = local_cache_store(self._store)
+        previous = local.get(video_id.value, cache_name) if versioned else None
+        try:
+            self._store.put(video_id.value, cache_name, data, stored_at=stored_at)
+        except Exception as exc:  # pragma: no cover - defensive
+            print(f"Warning: Could not save cache entry {video_id.value}/{cache_name}: {exc}", file=sys.stderr)
+            return False
+        self._stats.add(bytes_written=len(data))
+        self._eviction.note_write(len(data))
+        self._note_source(cache_name, stored_at)
+        if previous is not None:
+            try:
+                record_version(local, video_id.value, cache_name, previous, data, limit=self._history_versions)
+            except Exception as exc:  # pragma: no cover - defensive
+                print(f"Warning: Could not record history of {video_id.value}/{cache_name}: {exc}", file=sys.stderr)
+        return True
 
     def _fetch_from_api(self, video_id: VideoID, preferred_languages: Sequence[str]) -> Optional[Iterable[dict]]:
         try:
-            transcript_list = YouTubeTranscriptApi().list(video_id.value)
+            transcript_api = self._transcript_api or YouTubeTranscriptApi()
+            transcript_list = transcript_api.list(video_id.value)
+            self._save_tracks(video_id, self._to_tracks(transcript_list))
             transcript_object = self._find_transcript_object(transcript_list, preferred_languages)
             if transcript_object is None:
                 print(
@@ -130,8 +878,10 @@ class CachedYouTubeTranscriptRepository(TranscriptRepository):
                 f"Error: No transcript found for video ID: {video_id.value} (tried languages: {', '.join(languages)})",
                 file=sys.stderr,
             )
+            raise _TranscriptUnavailable(NO_TRANSCRIPT)
         except TranscriptsDisabled:
             print(f"Error: Transcripts are disabled for video ID: {video_id.value}", file=sys.stderr)
+            raise _TranscriptUnavailable(TRANSCRIPTS_DISABLED)
         except Exception as exc:  # pragma: no cover - defensive
             print(f"An unexpected error occurred during API fetch: {exc}", file=sys.stderr)
         return None
@@ -146,7 +896,7 @@ class CachedYouTubeTranscriptRepository(TranscriptRepository):
         if manual_transcripts and preferred_languages:
             for lang in preferred_languages:
                 for transcript in manual_transcripts:
-                    if transcript.language == lang:
+                    if transcript.language_code == lang:
                         return transcript
 
         if preferred_languages:
@@ -162,7 +912,21 @@ class CachedYouTubeTranscriptRepository(TranscriptRepository):
         if generated_transcripts:
             return generated_transcripts[0]
 
-        raise NoTranscriptFound("No suitable transcript found in the list.")
+        raise NoTranscriptFound(
+            getattr(transcript_list, "video_id", ""), preferred_languages, transcript_list
+        )
+
+    @staticmethod
+    def _to_tracks(transcript_list: Iterable) -> list[TranscriptTrack]:
+        return [
+            TranscriptTrack(
+                language_code=getattr(transcript, "language_code", None) or UNKNOWN_LANGUAGE,
+                language=getattr(transcript, "language", None),
+                is_generated=bool(getattr(transcript, "is_generated", False)),
+                is_translatable=bool(getattr(transcript, "is_translatable", False)),
+            )
+            for transcript in transcript_list
+        ]
 
     @staticmethod
     def _to_transcript(entries: Iterable) -> list[TranscriptLine]:
@@ -173,3 +937,14 @@ class CachedYouTubeTranscriptRepository(TranscriptRepository):
             duration = float(entry.duration)
             transcript.append(TranscriptLine(text=text, start=start, duration=duration))
         return transcript
+
+
+def encode_metadata(metadata: VideoMetadata) -> bytes:
+    """Serialise ``metadata`` as a metadata cache entry."""
+
+    payload = {
+        "version": CachedYouTubeTranscriptRepository.METADATA_CACHE_VERSION,
+        "title": metadata.title,
+        "description": metadata.description,
+    }
+    return json.dumps(payload).encode("utf-8")
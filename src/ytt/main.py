@@ -2,23 +2,60 @@
 
 from __future__ import annotations
 
+import argparse
+import json
 import sys
+from datetime import datetime
+from pathlib import Path
 from typing import List
 
 import pyperclip
 
-from .application import ConfigService, FetchTranscriptUseCase, build_parser
+from .application import CacheService, ConfigService, FetchTranscriptUseCase, build_parser
+from .application.cache_service import CACHED, UNAVAILABLE, CacheReport, resolve_video_reference
+from .application.cli import format_duration, format_size, parse_duration, parse_size
 from .domain import TranscriptService, extract_video_id
 from .infrastructure import (
     CachedYouTubeTranscriptRepository,
     ClipboardGateway,
     ConfigRepository,
+    FileKeyLocks,
     PyperclipClipboardGateway,
     YouTubeMetadataGateway,
+    create_cache_store,
 )
+from .infrastructure.cache_eviction import EVICTION_FILE_NAME, EvictionSchedule
+from .infrastructure.cache_index import INDEX_FILE_NAME, CacheIndex
+from .infrastructure.cache_server import CacheServer
+from .infrastructure.cache_stats import STATS_FILE_NAME, CacheStatsRecorder
+from .infrastructure.cache_store import CACHE_BACKENDS, CacheEntry, CacheStore
+from .infrastructure.cache_sync import ManifestError, dump_manifest, write_manifest
+from .infrastructure.cache_tiers import create_cache_hierarchy, local_cache_store
+from .infrastructure.cache_verify import QUARANTINE_DIR_NAME
+from .infrastructure.page_archive import ARCHIVE_MODES, ARCHIVE_OFF, WatchPageArchive
+from .infrastructure.rendered_cache import RENDERED_DIR_NAME, RenderedOutputCache
+from .infrastructure.transcript_history import EntryHistory, change_counts, diff_versions
+from .infrastructure.revalidation import spawn_revalidation
+from .infrastructure.transcript_repository import LOCK_DIR_NAME, TRANSCRIPT_NAME_PREFIX, parse_transcript_name
 
-_COMMANDS = {"fetch", "config", "help"}
+_COMMANDS = {"fetch", "langs", "history", "diff", "config", "cache", "help"}
 _GLOBAL_FLAGS = {"-h", "--help", "-V", "--version"}
+_CONFIG_SETTINGS = (
+    "languages",
+    "cache_backend",
+    "cache_max_size",
+    "cache_max_age",
+    "transcript_ttl",
+    "metadata_ttl",
+    "negative_ttl",
+    "memory_cache_entries",
+    "memory_cache_size",
+    "history_versions",
+    "page_archive",
+    "shared_cache_dir",
+    "cache_server_url",
+)
+_UNSET_VALUES = {"", "none", "off"}
 _FETCH_FLAGS = {
     "--no-copy",
     "--no-title",
@@ -26,7 +63,12 @@ _FETCH_FLAGS = {
     "--no-url",
     "--no-metadata",
     "--refresh",
+    "--refresh-metadata",
+    "--refresh-transcript",
+    "--offline",
 }
+# Top-level fetch options that take a value.
+_FETCH_OPTIONS = {"--policy", "--languages"}
 
 
 def _read_clipboard_youtube_url_or_exit(parser, clipboard: ClipboardGateway) -> str:
@@ -53,7 +95,15 @@ def _read_clipboard_youtube_url_or_exit(parser, clipboard: ClipboardGateway) ->
 
 
 def _is_top_level_fetch_flag_invocation(argv: List[str]) -> bool:
-    return bool(argv) and all(arg in _FETCH_FLAGS for arg in argv)
+    index = 0
+    while index < len(argv):
+        if argv[index] in _FETCH_OPTIONS:
+            index += 2
+        elif argv[index] in _FETCH_FLAGS or argv[index].partition("=")[0] in _FETCH_OPTIONS:
+            index += 1
+        else:
+            return False
+    return bool(argv)
 
 
 def _prepare_args(argv: List[str], clipboard: ClipboardGateway):
@@ -72,6 +122,370 @@ def _prepare_args(argv: List[str], clipboard: ClipboardGateway):
     return parser, args
 
 
+def _apply_config_setting(config_service: ConfigService, setting: str, value: str) -> None:
+    try:
+        if setting == "languages":
+            languages = [lang.strip() for lang in value.split(",") if lang.strip()]
+            config_service.set_preferred_languages(languages)
+        elif setting == "cache_backend":
+            backend = value.strip().lower()
+            if backend not in CACHE_BACKENDS:
+                raise ValueError(f"Unknown cache backend '{value}'. Supported: {', '.join(CACHE_BACKENDS)}.")
+            config_service.set_cache_backend(backend)
+        elif setting == "cache_max_size":
+            unset = value.strip().lower() in _UNSET_VALUES
+            config_service.set_cache_max_size(None if unset else parse_size(value))
+        elif setting == "cache_max_age":
+            unset = value.strip().lower() in _UNSET_VALUES
+            config_service.set_cache_max_age(None if unset else parse_duration(value))
+        elif setting == "transcript_ttl":
+            unset = value.strip().lower() in _UNSET_VALUES
+            config_service.set_transcript_ttl(None if unset else parse_duration(value))
+        elif setting == "metadata_ttl":
+            unset = value.strip().lower() in _UNSET_VALUES
+            config_service.set_metadata_ttl(None if unset else parse_duration(value))
+        elif setting == "negative_ttl":
+            unset = value.strip().lower() in _UNSET_VALUES
+            config_service.set_negative_ttl(None if unset else parse_duration(value))
+        elif setting == "memory_cache_entries":
+            unset = value.strip().lower() in _UNSET_VALUES
+            entries = None if unset else int(value)
+            if entries is not None and entries < 0:
+                raise ValueError("memory_cache_entries must not be negative.")
+            config_service.set_memory_cache_entries(entries)
+        elif setting == "memory_cache_size":
+            unset = value.strip().lower() in _UNSET_VALUES
+            config_service.set_memory_cache_size(None if unset else parse_size(value))
+        elif setting == "history_versions":
+            unset = value.strip().lower() in _UNSET_VALUES
+            versions = None if unset else int(value)
+            if versions is not None and versions < 0:
+                raise ValueError("history_versions must not be negative.")
+            config_service.set_history_versions(versions)
+        elif setting == "page_archive":
+            mode = value.strip().lower()
+            if mode not in ARCHIVE_MODES:
+                raise ValueError(f"Unknown page archive mode '{value}'. Supported: {', '.join(ARCHIVE_MODES)}.")
+            config_service.set_page_archive(mode)
+        elif setting == "shared_cache_dir":
+            unset = value.strip().lower() in _UNSET_VALUES
+            path = None if unset else Path(value.strip()).expanduser()
+            if path is not None and not path.is_dir():
+                raise ValueError(f"Shared cache directory '{path}' does not exist.")
+            config_service.set_shared_cache_dir(path)
+        elif setting == "cache_server_url":
+            unset = value.strip().lower() in _UNSET_VALUES
+            url = None if unset else value.strip()
+            if url is not None and not url.startswith(("http://", "https://")):
+                raise ValueError("cache_server_url must start with http:// or https://.")
+            config_service.set_cache_server_url(url)
+        else:
+            raise ValueError(
+                f"Unknown config setting '{setting}'. Supported: {', '.join(_CONFIG_SETTINGS)}."
+            )
+    except (ValueError, argparse.ArgumentTypeError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+def _read_references(source: str) -> List[str]:
+    if source == "-":
+        return sys.stdin.read().splitlines()
+    try:
+        with open(source, "r", encoding="utf-8") as handle:
+            return handle.read().splitlines()
+    except OSError as exc:
+        print(f"Error: Could not read {source}: {exc}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+def _warm_cache(cache_service: CacheService, config_service: ConfigService, source: str, *, workers: int) -> None:
+    languages = config_service.get_preferred_languages()
+    if not languages:
+        print("Error: Preferred languages not set in configuration.", file=sys.stderr)
+        print("Please set them using: ytt config languages <lang1>,<lang2>,...", file=sys.stderr)
+        raise SystemExit(1)
+
+    def report(done: int, total: int, reference: str, outcome: str) -> None:
+        print(f"[{done}/{total}] {outcome}: {reference}", file=sys.stderr)
+
+    result = cache_service.warm(_read_references(source), languages, workers=workers, on_progress=report)
+    print(
+        f"Warmed {result.total} videos in {result.elapsed:.1f}s: {result.cached} already cached, "
+        f"{result.fetched} fetched, {result.unavailable} unavailable, {result.failed} failed."
+    )
+    if result.failed:
+        raise SystemExit(1)
+
+
+def _refresh_cache(cache_service: CacheService, config_service: ConfigService, args) -> None:
+    def report(done: int, total: int, key: str, outcome: str) -> None:
+        if args.verbose:
+            print(f"[{done}/{total}] {outcome}: {key}", file=sys.stderr)
+
+    result = cache_service.refresh(
+        args.older_than,
+        config_service.get_preferred_languages(),
+        workers=args.workers,
+        limit=args.limit,
+        rate=args.rate,
+        on_progress=report,
+    )
+    summary = (
+        f"Refreshed {result.total} cache entries in {result.elapsed:.1f}s: {result.updated} updated, "
+        f"{result.unchanged} unchanged, {result.failed} failed."
+    )
+    if result.deferred:
+        summary += f" {result.deferred} more left for a later run."
+    print(summary)
+    if result.failed:
+        raise SystemExit(1)
+
+
+def _reextract_cache(cache_service: CacheService, *, workers: int, verbose: bool) -> None:
+    def report(done: int, total: int, video_id: str, outcome: str) -> None:
+        if verbose:
+            print(f"[{done}/{total}] {outcome}: {video_id}", file=sys.stderr)
+
+    result = cache_service.reextract(workers=workers, on_progress=report)
+    print(
+        f"Re-extracted {result.total} archived pages in {result.elapsed:.1f}s: {result.updated} updated, "
+        f"{result.unchanged} unchanged, {result.superseded} superseded by newer metadata, {result.failed} failed."
+    )
+    if result.failed:
+        raise SystemExit(1)
+
+
+def _report_membership(cache_service: CacheService, config_service: ConfigService, args) -> None:
+    references: List[str] = []
+    for reference in args.references:
+        references.extend(_read_references("-") if reference == "-" else [reference])
+    video_ids = []
+    for reference in references:
+        reference = reference.strip()
+        if not reference or reference.startswith("#"):
+            continue
+        video_id = resolve_video_reference(reference)
+        if video_id is None:
+            print(f"Error: Could not extract a video ID from: {reference}", file=sys.stderr)
+            raise SystemExit(1)
+        video_ids.append(video_id)
+
+    if args.rebuild:
+        count = cache_service.rebuild_index()
+        print(f"Indexed {count} cache entries.", file=sys.stderr)
+    memberships = cache_service.has(video_ids, config_service.get_preferred_languages())
+    for membership in memberships:
+        if args.json:
+            print(json.dumps(membership.to_dict()))
+        else:
+            print("\t".join((membership.video_id, membership.status, ",".join(membership.languages))).rstrip())
+    if any(membership.status not in (CACHED, UNAVAILABLE) for membership in memberships):
+        raise SystemExit(1)
+
+
+def _sync_cache(cache_service: CacheService, args) -> None:
+    try:
+        if args.cache_command == "manifest":
+            entries = cache_service.manifest()
+            if args.output:
+                write_manifest(Path(args.output).expanduser(), entries)
+                print(f"Wrote manifest of {len(entries)} entries to {args.output}.", file=sys.stderr)
+            else:
+                print(dump_manifest(entries))
+            return
+        if args.cache_command == "export":
+            against = Path(args.against).expanduser() if args.against else None
+            result = cache_service.export(Path(args.directory).expanduser(), against=against)
+            verb = "Exported"
+        else:
+            result = cache_service.import_bundle(Path(args.directory).expanduser())
+            verb = "Imported"
+    except (ManifestError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        raise SystemExit(1)
+    print(
+        f"{verb} {result.transferred} entries ({format_size(result.bytes)}); "
+        f"{result.skipped} already up to date, {result.failed} failed."
+    )
+    if result.failed:
+        raise SystemExit(1)
+
+
+def _migrate_cache(cache_service: CacheService, *, workers: int, verbose: bool) -> None:
+    def report(done: int, total: int, key: str, outcome: str) -> None:
+        if verbose and outcome != "unchanged":
+            print(f"[{done}/{total}] {outcome}: {key}", file=sys.stderr)
+
+    result = cache_service.migrate(workers=workers, on_progress=report)
+    print(
+        f"Examined {result.examined} cache entries: {result.converted} converted "
+        f"({result.metadata_extracted} with metadata), {result.deleted} unreadable deleted, "
+        f"{result.unchanged} already current."
+    )
+
+
+def _verify_cache(cache_service: CacheService, config_service: ConfigService, cache_dir: Path, args) -> None:
+    def report(done: int, total: int, key: str, outcome: str) -> None:
+        if args.verbose and outcome == "corrupt":
+            print(f"[{done}/{total}] {outcome}: {key}", file=sys.stderr)
+
+    result = cache_service.verify(
+        cache_dir / QUARANTINE_DIR_NAME,
+        repair=args.repair,
+        preferred_languages=config_service.get_preferred_languages(),
+        workers=args.workers,
+        on_progress=report,
+    )
+    for entry in result.corrupt:
+        print(f"{entry.video_id}/{entry.name}: {entry.reason}")
+    summary = (
+        f"Verified {result.examined} cache entries: {result.ok} ok, {len(result.corrupt)} corrupt, "
+        f"{result.legacy} in legacy formats."
+    )
+    if result.corrupt:
+        summary += f" Corrupt entries were moved to {cache_dir / QUARANTINE_DIR_NAME}."
+    if args.repair:
+        summary += f" Repaired {result.repaired}, {result.repair_failed} failed."
+    print(summary, file=sys.stderr)
+    if result.legacy:
+        print("Run `ytt cache migrate` to convert entries in legacy formats.", file=sys.stderr)
+    if result.corrupt and (not args.repair or result.repair_failed):
+        raise SystemExit(1)
+
+
+def _serve_cache(config_service: ConfigService, directory: Path, *, host: str, port: int, verbose: bool) -> None:
+    store = create_cache_store(config_service.get_cache_backend(), directory)
+    try:
+        server = CacheServer((host, port), store, verbose=verbose)
+    except OSError as exc:
+        print(f"Error: Could not listen on {host}:{port}: {exc}", file=sys.stderr)
+        raise SystemExit(1)
+    print(f"Serving {directory} at {server.url} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _show_tracks(transcript_service: TranscriptService, cache_store: CacheStore, args) -> None:
+    video_id = resolve_video_reference(args.youtube_url)
+    if video_id is None:
+        print(f"Error: Could not extract a video ID from: {args.youtube_url}", file=sys.stderr)
+        raise SystemExit(1)
+    tracks = transcript_service.tracks(video_id, policy=args.policy)
+    if tracks is None:
+        raise SystemExit(1)
+    if not tracks:
+        print(f"Error: No transcripts are available for {video_id.value}.", file=sys.stderr)
+        raise SystemExit(1)
+    cached = {parse_transcript_name(name) for name in cache_store.names(video_id.value, TRANSCRIPT_NAME_PREFIX)}
+    for track in tracks:
+        is_cached = (track.language_code, track.is_generated) in cached
+        kind = "generated" if track.is_generated else "manual"
+        if args.json:
+            print(
+                json.dumps(
+                    {
+                        "language_code": track.language_code,
+                        "language": track.language,
+                        "kind": kind,
+                        "translatable": track.is_translatable,
+                        "cached": is_cached,
+                    }
+                )
+            )
+        else:
+            fields = (
+                track.language_code,
+                track.language or "",
+                kind,
+                "translatable" if track.is_translatable else "",
+                "cached" if is_cached else "",
+            )
+            print("\t".join(fields).rstrip())
+
+
+def _load_histories(cache_service: CacheService, reference: str) -> List[EntryHistory]:
+    video_id = resolve_video_reference(reference)
+    if video_id is None:
+        print(f"Error: Could not extract a video ID from: {reference}", file=sys.stderr)
+        raise SystemExit(1)
+    histories = cache_service.history(video_id)
+    if not histories:
+        print(f"Error: Nothing is cached for {video_id.value}.", file=sys.stderr)
+        raise SystemExit(1)
+    return histories
+
+
+def _show_history(cache_service: CacheService, args) -> None:
+    for history in _load_histories(cache_service, args.youtube_url):
+        print(history.name)
+        versions = history.versions
+        for number, version in enumerate(versions):
+            stored_at = datetime.fromtimestamp(version.stored_at).strftime("%Y-%m-%d %H:%M")
+            line = f"  {number:>2}  {stored_at}  {len(version.units)} lines"
+            if number + 1 < len(versions):
+                added, removed = change_counts(version.units, versions[number + 1].units)
+                line += f"  (+{added} -{removed})"
+            print(line)
+        if history.detached:
+            print("  earlier versions no longer match this entry and cannot be shown")
+
+
+def _show_diff(cache_service: CacheService, args) -> None:
+    histories = _load_histories(cache_service, args.youtube_url)
+    if args.entry is not None:
+        histories = [history for history in histories if history.name == args.entry]
+        if not histories:
+            print(f"Error: No cache entry named '{args.entry}'.", file=sys.stderr)
+            raise SystemExit(1)
+    compared = 0
+    for history in histories:
+        if max(args.older, args.newer) >= len(history.versions):
+            continue
+        compared += 1
+        for line in diff_versions(history, args.older, args.newer):
+            print(line)
+    if not compared:
+        print(
+            f"Error: No cached entry has a version {max(args.older, args.newer)}; see `ytt history`.",
+            file=sys.stderr,
+        )
+        raise SystemExit(1)
+
+
+def _format_entry(entry: CacheEntry) -> str:
+    stored_at = datetime.fromtimestamp(entry.stored_at).strftime("%Y-%m-%d %H:%M")
+    return f"{entry.video_id}/{entry.name} ({stored_at})"
+
+
+def _format_cache_report(report: CacheReport) -> List[str]:
+    counters = report.counters
+    hit_ratio = "n/a" if report.hit_ratio is None else f"{report.hit_ratio:.1%}"
+    lines = [
+        f"Lookups: {int(counters['hits'] + counters['misses'] + counters['refreshes'])} "
+        f"(hits {int(counters['hits'])}, misses {int(counters['misses'])}, "
+        f"refreshes {int(counters['refreshes'])}); hit ratio {hit_ratio}",
+        f"Negative hits: {int(counters['negative_hits'])}",
+        f"Read {format_size(int(counters['bytes_read']))}, wrote {format_size(int(counters['bytes_written']))}",
+        f"Network fetches: {int(counters['fetches'])} ({format_duration(counters['fetch_seconds'])})",
+        f"Time saved: ~{format_duration(report.time_saved)}",
+        "",
+    ]
+    kinds = ", ".join(f"{kind} {count}" for kind, count in sorted(report.entries_by_kind.items()))
+    lines.append(f"Entries: {report.entries}" + (f" ({kinds})" if kinds else "") + f", {format_size(report.bytes)}")
+    for limit, count in report.size_histogram:
+        label = f"<= {format_size(limit)}" if limit is not None else "larger"
+        lines.append(f"  {label:>12}: {count}")
+    if report.oldest is not None and report.newest is not None:
+        lines.append(f"Oldest: {_format_entry(report.oldest)}")
+        lines.append(f"Newest: {_format_entry(report.newest)}")
+    return lines
+
+
 def main() -> None:
     argv = sys.argv[1:]
     clipboard = PyperclipClipboardGateway()
@@ -79,50 +493,123 @@ def main() -> None:
 
     config_repository = ConfigRepository()
     config_service = ConfigService(config_repository)
-    metadata_gateway = YouTubeMetadataGateway()
-    transcript_repository = CachedYouTubeTranscriptRepository(
+    cache_store = create_cache_hierarchy(
+        config_service.get_cache_backend(),
         config_repository.cache_dir,
+        shared_dir=config_service.get_shared_cache_dir(),
+        remote_url=config_service.get_cache_server_url(),
+    )
+    page_archive = config_service.get_page_archive()
+    metadata_gateway = YouTubeMetadataGateway(
+        archive=WatchPageArchive(cache_store, page_archive) if page_archive != ARCHIVE_OFF else None
+    )
+    cache_stats = CacheStatsRecorder(config_repository.cache_dir / STATS_FILE_NAME)
+    eviction = EvictionSchedule(
+        max_bytes=config_service.get_cache_max_size(),
+        max_age=config_service.get_cache_max_age(),
+        path=config_repository.cache_dir / EVICTION_FILE_NAME,
+    )
+    rendered_cache = RenderedOutputCache(
+        config_repository.cache_dir / RENDERED_DIR_NAME,
+        local_cache_store(cache_store),
+        transcript_ttl=config_service.get_transcript_ttl(),
+        metadata_ttl=config_service.get_metadata_ttl(),
+        negative_ttl=config_service.get_negative_ttl(),
+        stats=cache_stats,
+        eviction=eviction,
+    )
+    transcript_repository = CachedYouTubeTranscriptRepository(
+        cache_store,
         metadata_gateway,
+        max_cache_bytes=config_service.get_cache_max_size(),
+        max_cache_age=config_service.get_cache_max_age(),
+        transcript_ttl=config_service.get_transcript_ttl(),
+        metadata_ttl=config_service.get_metadata_ttl(),
+        negative_ttl=config_service.get_negative_ttl(),
+        locks=FileKeyLocks(config_repository.cache_dir / LOCK_DIR_NAME),
+        stats=cache_stats,
+        revalidate=spawn_revalidation,
+        history_versions=config_service.get_history_versions(),
+        eviction=eviction,
+        evictable=(rendered_cache,),
     )
     transcript_service = TranscriptService(transcript_repository)
     fetch_use_case = FetchTranscriptUseCase(
         transcript_service,
         config_service,
         clipboard,
+        rendered=rendered_cache,
     )
 
     if args.command == "help":
         parser.print_help()
         sys.exit(0)
-    elif args.command == "config":
-        if args.setting.lower() == "languages":
-            languages = [lang.strip() for lang in args.value.split(",") if lang.strip()]
-            config_service.set_preferred_languages(languages)
+    elif args.command == "langs":
+        _show_tracks(transcript_service, cache_store, args)
+    elif args.command in ("history", "diff"):
+        cache_service = CacheService(cache_store, config_service)
+        if args.command == "history":
+            _show_history(cache_service, args)
         else:
-            print(f"Error: Unknown config setting '{args.setting}'. Only 'languages' is supported.", file=sys.stderr)
-            raise SystemExit(1)
+            _show_diff(cache_service, args)
+    elif args.command == "config":
+        _apply_config_setting(config_service, args.setting.lower(), args.value)
+    elif args.command == "cache":
+        cache_service = CacheService(
+            cache_store,
+            config_service,
+            transcript_repository,
+            cache_stats,
+            CacheIndex(config_repository.cache_dir / INDEX_FILE_NAME),
+            rendered_cache,
+        )
+        if args.cache_command == "prune":
+            result = cache_service.prune(max_bytes=args.max_size, max_age=args.older_than)
+            print(f"Reclaimed {format_size(result.bytes)} from {result.entries} cache entries.")
+        elif args.cache_command == "warm":
+            _warm_cache(cache_service, config_service, args.source, workers=args.workers)
+        elif args.cache_command == "refresh":
+            _refresh_cache(cache_service, config_service, args)
+        elif args.cache_command == "reextract":
+            _reextract_cache(cache_service, workers=args.workers, verbose=args.verbose)
+        elif args.cache_command == "stats":
+            report = cache_service.report()
+            if args.json:
+                print(json.dumps(report.to_dict(), indent=2))
+            else:
+                print("\n".join(_format_cache_report(report)))
+            if args.reset:
+                cache_service.reset_stats()
+        elif args.cache_command == "has":
+            _report_membership(cache_service, config_service, args)
+        elif args.cache_command in ("manifest", "export", "import"):
+            _sync_cache(cache_service, args)
+        elif args.cache_command == "migrate":
+            _migrate_cache(cache_service, workers=args.workers, verbose=args.verbose)
+        elif args.cache_command == "verify":
+            _verify_cache(cache_service, config_service, config_repository.cache_dir, args)
+        elif args.cache_command == "serve":
+            directory = Path(args.directory).expanduser() if args.directory else config_repository.cache_dir
+            _serve_cache(config_service, directory, host=args.host, port=args.port, verbose=args.verbose)
     elif args.command == "fetch":
         show_title = not (args.no_title or args.no_metadata)
         show_description = not (args.no_description or args.no_metadata)
         show_url = not (args.no_url or args.no_metadata)
-        bundle = fetch_use_case.execute(
+        output = fetch_use_case.output(
             args.youtube_url,
+            sys.stdout,
             copy_to_clipboard=not args.no_copy,
             show_title=show_title,
             show_description=show_description,
             show_url=show_url,
             input_url=args.youtube_url,
             refresh=args.refresh,
+            refresh_metadata=args.refresh_metadata,
+            refresh_transcript=args.refresh_transcript,
+            policy=args.policy,
+            languages=args.languages,
         )
-        if bundle:
-            FetchTranscriptUseCase.render(
-                bundle,
-                show_title=show_title,
-                show_description=show_description,
-                show_url=show_url,
-                input_url=args.youtube_url,
-            )
-        else:
+        if not output or output.transcript_unavailable:
             raise SystemExit(1)
     else:  # pragma: no cover - defensive guard
         parser.print_help(sys.stderr)
@@ -0,0 +1,76 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ytt
+from ytt.domain.entities import TranscriptLine
+from ytt.infrastructure.cache_store import create_cache_store
+from ytt.infrastructure.transcript_codec import encode_transcript
+
+
+@pytest.fixture
+def config_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    monkeypatch.setattr(ytt, "_shared_repository", None)
+    return tmp_path
+
+
+def test_api_functions_share_one_repository_until_config_changes(config_home):
+    first = ytt._transcript_repository()
+    assert ytt._transcript_repository() is first
+    executor = ThreadPoolExecutor(max_workers=1)
+    first._metadata_executor = executor
+
+    ytt.save_config({"memory_cache_entries": 8})
+    rebuilt = ytt._transcript_repository()
+
+    assert rebuilt is not first
+    # The replaced repository's metadata threads are shut down.
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+    assert rebuilt._metadata_gateway is first._metadata_gateway
+    assert rebuilt._transcript_api is first._transcript_api
+
+
+def _put_entries(store, text):
+    lines = [TranscriptLine(text=text, start=0.0, duration=1.0)]
+    store.put(
+        "dQw4w9WgXcQ",
+        "transcript.en.manual",
+        encode_transcript(lines, language="English", language_code="en", is_generated=False),
+    )
+    store.put(
+        "dQw4w9WgXcQ",
+        "metadata",
+        json.dumps({"version": 1, "title": "Title", "description": "Text"}).encode("utf-8"),
+    )
+    return lines
+
+
+def test_api_serves_hot_entries_from_memory(config_home, monkeypatch):
+    repository = ytt._transcript_repository()
+    lines = _put_entries(repository._store, "hello")
+    local = repository._store.tiers[1]
+
+    def unreadable(video_id, name):
+        raise AssertionError(f"read {video_id}/{name} from disk")
+
+    monkeypatch.setattr(local, "get", unreadable)
+    monkeypatch.setattr(local, "get_mapped", unreadable)
+
+    bundle = ytt.get_video_bundle("dQw4w9WgXcQ", ["en"])
+
+    assert bundle.metadata.title == "Title"
+    assert list(bundle.transcript) == lines
+
+
+def test_api_memory_tier_sees_entries_rewritten_by_another_process(config_home):
+    repository = ytt._transcript_repository()
+    _put_entries(repository._store, "hello")
+    assert [line.text for line in ytt.get_video_bundle("dQw4w9WgXcQ", ["en"]).transcript] == ["hello"]
+
+    other = create_cache_store(ytt._config_repository().get_cache_backend(), ytt.get_cache_dir())
+    lines = _put_entries(other, "rewritten")
+
+    assert list(ytt.get_video_bundle("dQw4w9WgXcQ", ["en"]).transcript) == lines
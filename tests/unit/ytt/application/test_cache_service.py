@@ -0,0 +1,298 @@
+from contextlib import contextmanager
+
+from youtube_transcript_api import FetchedTranscript, FetchedTranscriptSnippet, TranscriptsDisabled
+
+from ytt.application.cache_service import CacheService, resolve_video_reference
+from ytt.domain.entities import VideoMetadata
+from ytt.domain.value_objects import VideoID
+from ytt.infrastructure.cache_index import INDEX_FILE_NAME, CacheIndex
+from ytt.infrastructure.cache_store import MemoryCacheStore, TieredCacheStore, create_cache_store
+from ytt.infrastructure.page_archive import ARCHIVE_JSON, ArchivedPage, encode_page
+from ytt.infrastructure.transcript_history import load_history
+from ytt.infrastructure.transcript_repository import CachedYouTubeTranscriptRepository
+
+
+class StubMetadataGateway:
+    def fetch(self, video_id):
+        return VideoMetadata(title=f"title {video_id.value}", description="description")
+
+
+class StubTranscriptApi:
+    def __init__(self):
+        self.listed = []
+
+    def list(self, video_id):
+        self.listed.append(video_id)
+        if video_id == "disabled000":
+            raise TranscriptsDisabled(video_id)
+        return [StubTranscript(video_id)]
+
+
+class StubTranscript:
+    language = "English"
+    language_code = "en"
+    is_generated = False
+
+    def __init__(self, video_id):
+        self.video_id = video_id
+
+    def fetch(self):
+        return FetchedTranscript(
+            snippets=[FetchedTranscriptSnippet(text=self.video_id, start=0.0, duration=1.0)],
+            video_id=self.video_id,
+            language=self.language,
+            language_code=self.language_code,
+            is_generated=self.is_generated,
+        )
+
+
+def test_resolve_video_reference_accepts_urls_and_bare_ids():
+    assert resolve_video_reference(" dQw4w9WgXcQ ") == VideoID("dQw4w9WgXcQ")
+    assert resolve_video_reference("https://youtu.be/dQw4w9WgXcQ") == VideoID("dQw4w9WgXcQ")
+    assert resolve_video_reference("not a video") is None
+
+
+def test_warm_fetches_missing_videos_and_skips_fresh_ones(tmp_path):
+    api = StubTranscriptApi()
+    repository = CachedYouTubeTranscriptRepository(
+        tmp_path, StubMetadataGateway(), negative_ttl=3600, transcript_api=api
+    )
+    service = CacheService(repository._store, config_service=None, repository=repository)
+    repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"])
+    progress = []
+
+    result = service.warm(
+        [
+            "# research list",
+            "aaaaaaaaaaa",
+            "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+            "",
+            "bbbbbbbbbbb",
+            "https://youtu.be/disabled000",
+            "not a video",
+        ],
+        ["en"],
+        workers=3,
+        on_progress=lambda *event: progress.append(event),
+    )
+
+    assert (result.cached, result.fetched, result.unavailable, result.failed) == (1, 1, 1, 1)
+    assert sorted(api.listed) == ["aaaaaaaaaaa", "bbbbbbbbbbb", "disabled000"]
+    assert len(progress) == result.total == 4
+    assert progress[-1][:2] == (4, 4)
+
+    rerun = service.warm(["aaaaaaaaaaa", "bbbbbbbbbbb", "disabled000"], ["en"])
+    assert (rerun.cached, rerun.fetched) == (3, 0)
+
+
+def test_report_summarizes_entries_and_counters(tmp_path):
+    repository = CachedYouTubeTranscriptRepository(
+        tmp_path, StubMetadataGateway(), negative_ttl=3600, transcript_api=StubTranscriptApi()
+    )
+    service = CacheService(repository._store, config_service=None, stats=repository._stats)
+    repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"])
+    repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"])
+    repository.retrieve(VideoID("disabled000"), ["en"])
+    repository._store.put("bbbbbbbbbbb", "en", b"x" * 20_000)
+
+    report = service.report()
+
+    assert report.entries == 6
+    assert report.entries_by_kind == {"transcript": 1, "metadata": 2, "unavailable": 1, "tracks": 1, "legacy": 1}
+    assert dict(report.size_histogram)[256 * 1024] == 1
+    assert report.newest.video_id == "bbbbbbbbbbb"
+    assert report.hit_ratio == 1 / 3
+    payload = report.to_dict()
+    assert payload["entries"]["count"] == 6
+    assert payload["counters"]["hits"] == 1
+
+
+class StubConfigService:
+    def get_transcript_ttl(self):
+        return 3600.0
+
+    def get_metadata_ttl(self):
+        return 3600.0
+
+    def get_negative_ttl(self):
+        return 3600.0
+
+    def get_history_versions(self):
+        return 5
+
+
+def test_has_answers_from_the_index_and_warm_trusts_it(tmp_path):
+    api = StubTranscriptApi()
+    repository = CachedYouTubeTranscriptRepository(
+        create_cache_store("file", tmp_path), StubMetadataGateway(), negative_ttl=3600, transcript_api=api
+    )
+    index = CacheIndex(tmp_path / INDEX_FILE_NAME)
+    service = CacheService(repository._store, StubConfigService(), repository=repository, index=index)
+    repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"])
+
+    def unexpected_read(*args, **kwargs):
+        raise AssertionError("membership should be answered from the index")
+
+    store_get = repository._store.get
+    repository._store.get = unexpected_read
+    statuses = service.has([VideoID("aaaaaaaaaaa"), VideoID("bbbbbbbbbbb")], ["en"])
+    assert [(item.status, item.languages) for item in statuses] == [("cached", ("en",)), ("missing", ())]
+    # The index holds no track list, so a German preference is not known to be served by English.
+    assert service.has([VideoID("aaaaaaaaaaa")], ["de"])[0].status == "partial"
+    repository._store.get = store_get
+
+    repository.retrieve(VideoID("disabled000"), ["en"])
+    repository._store.put("ccccccccccc", "metadata", b"{}", stored_at=0.0)
+    statuses = service.has([VideoID("disabled000"), VideoID("ccccccccccc")], ["en"])
+    assert [item.status for item in statuses] == ["unavailable", "partial"]
+
+    def unexpected_check(*args, **kwargs):
+        raise AssertionError("warm should not read cached entries")
+
+    repository.is_cached = unexpected_check
+    result = service.warm(["aaaaaaaaaaa", "disabled000"], ["en"])
+    assert (result.cached, result.fetched) == (2, 0)
+
+
+def test_verify_quarantines_corrupt_entries_and_repairs_them(tmp_path):
+    api = StubTranscriptApi()
+    store = create_cache_store("file", tmp_path)
+    repository = CachedYouTubeTranscriptRepository(store, StubMetadataGateway(), transcript_api=api)
+    service = CacheService(store, config_service=None, repository=repository)
+    repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"])
+    repository.retrieve(VideoID("bbbbbbbbbbb"), ["en"])
+    store.put("aaaaaaaaaaa", "metadata", b'{"version": 1, "title": "trunc')
+
+    result = service.verify(tmp_path / "quarantine", repair=True, preferred_languages=["en"], workers=2)
+
+    assert [(entry.video_id, entry.name) for entry in result.corrupt] == [("aaaaaaaaaaa", "metadata")]
+    assert (result.repaired, result.repair_failed) == (1, 0)
+    assert result.corrupt[0].quarantined_to.read_bytes() == b'{"version": 1, "title": "trunc'
+    assert repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"]).metadata.title == "title aaaaaaaaaaa"
+    assert sorted(api.listed) == ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+
+
+def test_refresh_refetches_aged_entries_oldest_first(tmp_path):
+    api = StubTranscriptApi()
+    store = create_cache_store("file", tmp_path)
+    repository = CachedYouTubeTranscriptRepository(store, StubMetadataGateway(), transcript_api=api)
+    service = CacheService(store, config_service=None, repository=repository)
+    for video_id in ("aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc"):
+        repository.retrieve(VideoID(video_id), ["en"])
+    store.restamp("aaaaaaaaaaa", "transcript.en.manual", 1_000.0)
+    store.restamp("aaaaaaaaaaa", "metadata", 1_000.0)
+    store.put("bbbbbbbbbbb", "metadata", b'{"version": 1, "title": "old"}', stored_at=2_000.0)
+    store.restamp("ccccccccccc", "metadata", 3_000.0)
+    api.listed.clear()
+    progress = []
+
+    result = service.refresh(
+        86400, ["en"], workers=2, limit=2, rate=1000, on_progress=lambda *event: progress.append(event)
+    )
+
+    assert (result.updated, result.unchanged, result.failed, result.deferred) == (1, 2, 0, 1)
+    assert api.listed == ["aaaaaaaaaaa"]
+    assert len(progress) == result.total == 3
+    assert repository.retrieve(VideoID("bbbbbbbbbbb"), ["en"]).metadata.title == "title bbbbbbbbbbb"
+    assert store.get("aaaaaaaaaaa", "transcript.en.manual").stored_at > 1_000.0
+    assert store.get("ccccccccccc", "metadata").stored_at == 3_000.0
+
+
+class StubGeneratedTranscript(StubTranscript):
+    is_generated = True
+
+    def fetch(self):
+        fetched = super().fetch()
+        fetched.snippets[0].text = "generated"
+        return fetched
+
+
+class ManualAndGeneratedTranscriptApi(StubTranscriptApi):
+    def list(self, video_id):
+        self.listed.append(video_id)
+        return [StubTranscript(video_id), StubGeneratedTranscript(video_id)]
+
+
+def test_refresh_refetches_the_exact_track_of_each_transcript(tmp_path):
+    api = ManualAndGeneratedTranscriptApi()
+    store = create_cache_store("file", tmp_path)
+    repository = CachedYouTubeTranscriptRepository(store, StubMetadataGateway(), transcript_api=api)
+    service = CacheService(store, config_service=None, repository=repository)
+    repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"])
+    # A retrieval picks the manual track; the generated one was cached by an earlier refresh.
+    assert repository.refresh_track(VideoID("aaaaaaaaaaa"), "en", True)
+    store.restamp("aaaaaaaaaaa", "transcript.en.manual", 1_000.0)
+    store.restamp("aaaaaaaaaaa", "transcript.en.generated", 1_000.0)
+
+    result = service.refresh(86400, ["en"], rate=1000)
+
+    assert (result.updated, result.unchanged, result.failed) == (0, 2, 0)
+    for name in ("transcript.en.manual", "transcript.en.generated"):
+        assert store.get("aaaaaaaaaaa", name).stored_at > 1_000.0
+    assert repository.retrieve(VideoID("aaaaaaaaaaa"), ["en"]).transcript[0].text == "aaaaaaaaaaa"
+
+
+def test_reextract_rewrites_metadata_from_archived_pages_in_worker_processes(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    service = CacheService(store, config_service=StubConfigService())
+
+    def archive(video_id, title, stored_at):
+        page = ArchivedPage(ARCHIVE_JSON, player_response={"videoDetails": {"title": title}})
+        store.put(video_id, "page", encode_page(page), stored_at=stored_at)
+
+    # Metadata is stamped when its page is requested, just before the page is archived.
+    archive("aaaaaaaaaaa", "better title", 1_000.0)
+    store.put("aaaaaaaaaaa", "metadata", b'{"version": 1, "title": "title", "description": null}', stored_at=999.5)
+    archive("bbbbbbbbbbb", "same", 1_000.0)
+    store.put("bbbbbbbbbbb", "metadata", b'{"version": 1, "title": "same", "description": null}', stored_at=999.5)
+    archive("ccccccccccc", "outdated", 1_000.0)
+    store.put("ccccccccccc", "metadata", b'{"version": 1, "title": "newer", "description": null}', stored_at=1_000.5)
+    store.put("ddddddddddd", "page", b"YTTPAGE\x01garbage")
+    progress = []
+
+    result = service.reextract(workers=2, on_progress=lambda *event: progress.append(event))
+
+    assert (result.updated, result.unchanged, result.superseded, result.failed) == (1, 1, 1, 1)
+    assert len(progress) == 4
+    updated = store.get("aaaaaaaaaaa", "metadata")
+    assert b"better title" in bytes(updated.data) and updated.stored_at == 1_000.0
+    history = load_history(store, "aaaaaaaaaaa", "metadata")
+    assert [version.units for version in history.versions] == [(("title", "better title"),), (("title", "title"),)]
+    assert b"newer" in bytes(store.get("ccccccccccc", "metadata").data)
+
+
+class RecordingLocks:
+    def __init__(self):
+        self.held = []
+
+    @contextmanager
+    def hold(self, key):
+        self.held.append(key)
+        yield True
+
+
+def test_reextract_reads_and_records_history_in_the_local_tier_under_the_entry_lock(tmp_path):
+    local = create_cache_store("file", tmp_path)
+    memory = MemoryCacheStore(max_entries=100, max_bytes=1 << 20)
+    remote = MemoryCacheStore(max_entries=100, max_bytes=1 << 20)
+    store = TieredCacheStore([memory, local, remote])
+    locks = RecordingLocks()
+    repository = CachedYouTubeTranscriptRepository(store, StubMetadataGateway(), locks=locks)
+    service = CacheService(store, config_service=StubConfigService(), repository=repository)
+    page = ArchivedPage(ARCHIVE_JSON, player_response={"videoDetails": {"title": "better title"}})
+    local.put("aaaaaaaaaaa", "page", encode_page(page), stored_at=1_000.0)
+    # Another machine's copy is not the version this cache replaces.
+    remote.put("aaaaaaaaaaa", "metadata", b'{"version": 1, "title": "remote", "description": null}', stored_at=999.5)
+    tier_reads = []
+    for tier in (memory, remote):
+        tier.get = lambda video_id, name, get=tier.get: tier_reads.append(name) or get(video_id, name)
+
+    result = service.reextract(workers=1)
+
+    assert result.updated == 1
+    assert locks.held == ["aaaaaaaaaaa.metadata"]
+    assert b"better title" in bytes(local.get("aaaaaaaaaaa", "metadata").data)
+    assert len(load_history(local, "aaaaaaaaaaa", "metadata").versions) == 1
+    assert remote.names("aaaaaaaaaaa") == ["metadata"]
+    # Pages and the metadata they are compared with are read from the local tier alone.
+    assert tier_reads == []
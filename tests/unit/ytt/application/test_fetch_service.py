@@ -0,0 +1,88 @@
+import io
+
+from ytt.application.fetch_service import FetchTranscriptUseCase
+from ytt.domain.entities import TranscriptLine, VideoMetadata, VideoTranscriptBundle
+from ytt.domain.value_objects import VideoID
+
+
+class StubService:
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.calls = 0
+
+    def fetch(self, video_id, languages, **kwargs):
+        self.calls += 1
+        return self.bundle
+
+
+class StubConfigService:
+    def get_preferred_languages(self):
+        return ["en"]
+
+
+class StubClipboard:
+    def __init__(self):
+        self.copied = []
+
+    def copy(self, lines):
+        self.copied.append(list(lines))
+        return True
+
+
+class StubRenderedCache:
+    def __init__(self):
+        self.documents = {}
+
+    def open(self, video_id, variant):
+        data = self.documents.get((video_id.value, variant))
+        return None if data is None else StubDocument(data)
+
+    def save(self, video_id, variant, bundle, document):
+        self.documents[(video_id.value, variant)] = document
+        return True
+
+
+class StubDocument:
+    transcript_unavailable = None
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+    def write_to(self, stream):
+        stream.write(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+def test_output_serves_the_rendered_document_on_the_next_call():
+    bundle = VideoTranscriptBundle(
+        transcript=[TranscriptLine("hello", 0.0, 1.0)],
+        metadata=VideoMetadata(title="Title", description=None),
+        sources=(("metadata", 1.0), ("transcript.en.manual", 1.0)),
+    )
+    service = StubService(bundle)
+    clipboard = StubClipboard()
+    use_case = FetchTranscriptUseCase(
+        service, StubConfigService(), clipboard, extractor=VideoID, rendered=StubRenderedCache()
+    )
+    url = "dQw4w9WgXcQ"
+
+    first, second = io.StringIO(), io.StringIO()
+    use_case.output(url, first)
+    result = use_case.output(url, second)
+
+    assert service.calls == 1
+    assert result.rendered_hit
+    assert second.getvalue() == first.getvalue()
+    assert first.getvalue() == "\n".join(FetchTranscriptUseCase.render_lines(bundle, input_url=url)) + "\n"
+    assert clipboard.copied[0] == clipboard.copied[1]
+
+    use_case.output(url, io.StringIO(), refresh=True)
+    assert service.calls == 2
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from ytt.infrastructure.cache_eviction import EvictionSchedule, PruneResult, prune_cache
+from ytt.infrastructure.cache_store import FileCacheStore, SqliteCacheStore
+
+
+def _set_access(store, video_id, name, accessed_at):
+    if isinstance(store, FileCacheStore):
+        path = store.path_for(video_id, name)
+        os.utime(path, (accessed_at, accessed_at))
+    else:
+        with store._connection() as connection:
+            connection.execute(
+                "UPDATE entries SET accessed_at = ?, stored_at = ? WHERE video_id = ? AND name = ?",
+                (accessed_at, accessed_at, video_id, name),
+            )
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        return FileCacheStore(tmp_path)
+    return SqliteCacheStore(tmp_path / "cache.sqlite3")
+
+
+def test_prune_evicts_least_recently_used_entries_over_budget(store):
+    for index, video_id in enumerate(["old", "mid", "new"]):
+        store.put(video_id, "transcript.en.manual", b"x" * 100)
+        _set_access(store, video_id, "transcript.en.manual", 1_000 + index)
+
+    result = prune_cache(store, max_bytes=150, now=2_000)
+
+    assert (result.entries, result.bytes) == (2, 200)
+    assert (result.remaining_bytes, result.oldest_access) == (100, 1_002)
+    assert store.get("new", "transcript.en.manual") is not None
+    assert store.get("old", "transcript.en.manual") is None
+
+
+def test_prune_evicts_entries_not_accessed_within_max_age(store):
+    store.put("stale", "transcript.en.manual", b"x" * 10)
+    store.put("fresh", "transcript.en.manual", b"x" * 10)
+    _set_access(store, "stale", "transcript.en.manual", 1_000)
+    _set_access(store, "fresh", "transcript.en.manual", 9_000)
+
+    result = prune_cache(store, max_age=5_000, now=10_000)
+
+    assert (result.entries, result.bytes) == (1, 10)
+    assert [entry.video_id for entry in store.entries()] == ["fresh"]
+
+
+def test_touch_protects_recently_read_entries(store):
+    store.put("a", "transcript.en.manual", b"x" * 100)
+    store.put("b", "transcript.en.manual", b"x" * 100)
+    _set_access(store, "a", "transcript.en.manual", 1_000)
+    _set_access(store, "b", "transcript.en.manual", 2_000)
+
+    store.touch("a", "transcript.en.manual")
+    prune_cache(store, max_bytes=100)
+
+    assert store.get("a", "transcript.en.manual") is not None
+    assert store.get("b", "transcript.en.manual") is None
+
+
+def test_prune_without_limits_is_a_no_op(store):
+    store.put("a", "transcript.en.manual", b"x")
+
+    result = prune_cache(store)
+
+    assert (result.entries, result.bytes) == (0, 0)
+
+
+def test_schedule_only_rescans_once_writes_may_exceed_the_budget(tmp_path):
+    path = tmp_path / "eviction.json"
+    schedule = EvictionSchedule(max_bytes=1_000, max_age=500, path=path)
+    assert schedule.due(now=1_000)
+    schedule.record(PruneResult(remaining_bytes=900, oldest_access=800), now=1_000)
+
+    schedule.note_write(50)
+    assert not schedule.due(now=1_001)
+    # Another process sharing the state file sees the bytes written so far.
+    other = EvictionSchedule(max_bytes=1_000, max_age=500, path=path)
+    other.note_write(60)
+    assert other.due(now=1_002)
+    assert not EvictionSchedule(max_bytes=2_000, max_age=500, path=path).due(now=1_003)
+    # The least recently used entry seen by the last scan expires after 1_300.
+    assert EvictionSchedule(max_bytes=2_000, max_age=500, path=path).due(now=1_301)
+    assert not EvictionSchedule(path=path).due(now=1_301)
@@ -0,0 +1,69 @@
+from ytt.infrastructure.cache_index import CacheIndex
+from ytt.infrastructure.cache_store import IndexedCacheStore, create_cache_store
+
+
+def test_writes_are_not_indexed_until_the_index_is_built(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    store.put("abc", "metadata", b"{}")
+
+    assert not store.index.exists()
+    assert store.index.lookup("abc") == []
+
+
+def test_index_follows_writes_and_deletes_of_other_instances(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    store.put("abc", "metadata", b"{}", stored_at=100.0)
+    reader = CacheIndex(store.index.path)
+    assert reader.rebuild(store.entries()) == 1
+
+    other = create_cache_store("sqlite", tmp_path)
+    assert isinstance(other, IndexedCacheStore)
+    other.put("abc", "transcript.en.manual", b"lines" * 100, stored_at=200.0)
+    other.put("xyz", "metadata", b"{}")
+    store.delete("abc", "metadata")
+
+    entries = reader.lookup("abc")
+    assert [(entry.name, entry.size, entry.stored_at) for entry in entries] == [("transcript.en.manual", 500, 200.0)]
+    assert reader.lookup_many(["xyz", "missing"])["missing"] == []
+    assert len(reader) == 2
+
+
+def test_index_compacts_long_journals(tmp_path):
+    index = CacheIndex(tmp_path / "index.tsv", min_compact_lines=10)
+    index.rebuild([])
+
+    for round_ in range(20):
+        index.record_put("abc", "metadata", round_, float(round_))
+
+    assert len(index.path.read_text().splitlines()) < 12
+    assert [entry.size for entry in CacheIndex(index.path).lookup("abc")] == [19]
+
+
+def test_writers_append_without_loading_the_index(tmp_path):
+    CacheIndex(tmp_path / "index.tsv").rebuild([])
+    writer = CacheIndex(tmp_path / "index.tsv", min_compact_lines=10)
+
+    def unexpected_refresh():
+        raise AssertionError("a writer should not parse the index")
+
+    writer._refresh = unexpected_refresh
+    for round_ in range(20):
+        writer.record_put("abc", "metadata", round_, float(round_))
+    assert len(writer.path.read_text().splitlines()) == 21
+
+    reader = CacheIndex(tmp_path / "index.tsv", min_compact_lines=10)
+    assert [entry.size for entry in reader.lookup_many(["abc"])["abc"]] == [19]
+    assert len(reader.path.read_text().splitlines()) < 12
+
+
+def test_index_ignores_partially_written_lines(tmp_path):
+    index = CacheIndex(tmp_path / "index.tsv")
+    index.rebuild([])
+    with open(index.path, "a", encoding="utf-8") as handle:
+        handle.write("P\tabc\tmetadata\t2\t1.0\nP\txyz\tmeta")
+
+    assert [entry.video_id for entry in index.entries()] == ["abc"]
+
+    with open(index.path, "a", encoding="utf-8") as handle:
+        handle.write("data\t2\t1.0\n")
+    assert sorted(entry.video_id for entry in index.entries()) == ["abc", "xyz"]
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from ytt.infrastructure.cache_lock import FileKeyLocks
+
+
+def test_lock_excludes_other_holders(tmp_path):
+    first = FileKeyLocks(tmp_path)
+    second = FileKeyLocks(tmp_path)
+    events = []
+
+    def contend():
+        with second.hold("video.transcript") as acquired:
+            events.append(("second", acquired))
+
+    with first.hold("video.transcript") as acquired:
+        events.append(("first", acquired))
+        thread = threading.Thread(target=contend)
+        thread.start()
+        time.sleep(0.1)
+        events.append(("first released", True))
+    thread.join()
+
+    assert events == [("first", True), ("first released", True), ("second", True)]
+
+
+def test_lock_gives_up_after_timeout(tmp_path):
+    holder = FileKeyLocks(tmp_path)
+    waiter = FileKeyLocks(tmp_path, timeout=0.05, poll_interval=0.01)
+
+    with holder.hold("video.metadata"):
+        with waiter.hold("video.metadata") as acquired:
+            assert acquired is False
+
+    with waiter.hold("video.metadata") as acquired:
+        assert acquired is True
+
+
+def test_lock_files_are_striped(tmp_path):
+    locks = FileKeyLocks(tmp_path, stripes=4)
+
+    paths = {locks.path_for(f"video{index}.transcript") for index in range(100)}
+
+    assert len(paths) <= 4
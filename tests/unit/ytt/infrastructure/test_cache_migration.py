@@ -0,0 +1,116 @@
+import json
+import os
+import pickle
+import struct
+
+from ytt.domain.entities import TranscriptLine, VideoMetadata, VideoTranscriptBundle
+from ytt.infrastructure.cache_migration import decode_legacy_entry, migrate_cache
+from ytt.infrastructure.cache_store import FileCacheStore, create_cache_store
+from ytt.infrastructure.transcript_codec import (
+    FORMAT_VERSION,
+    decode_transcript,
+    encode_transcript,
+    is_packed_transcript,
+    transcript_format_version,
+)
+
+LINES = [TranscriptLine(text="legacy", start=0.0, duration=1.0)]
+
+
+def test_migrate_converts_every_legacy_format_in_place(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    store.put("aaa", "en", pickle.dumps({"version": 2, "transcript": LINES, "metadata": {}}), stored_at=100.0)
+    store.put("bbb", "any", pickle.dumps(VideoTranscriptBundle(LINES, VideoMetadata(None, None))), stored_at=100.0)
+    (tmp_path / "ccccccccccc_en.pkl").write_bytes(pickle.dumps(LINES))
+
+    result = migrate_cache(store, workers=2)
+
+    assert (result.converted, result.deleted) == (3, 0)
+    for video_id, name in [("aaa", "en"), ("bbb", "any"), ("ccccccccccc", "en")]:
+        record = store.get(video_id, name)
+        assert is_packed_transcript(record.data)
+        assert list(decode_transcript(record.data).lines) == LINES
+    assert store.get("aaa", "en").stored_at == 100.0
+    assert not list(tmp_path.rglob("*.pkl"))
+
+
+def test_migrate_keeps_multi_language_legacy_keys_under_their_video(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    (tmp_path / "abcdefghijk_de_en.pkl").write_bytes(pickle.dumps({"version": 2, "transcript": LINES, "metadata": {}}))
+    (tmp_path / "a_cdefghijk_any.pkl").write_bytes(pickle.dumps(LINES))
+
+    result = migrate_cache(store)
+
+    assert (result.converted, result.deleted) == (2, 0)
+    assert sorted((entry.video_id, entry.name) for entry in store.entries()) == [
+        ("a_cdefghijk", "any"),
+        ("abcdefghijk", "de_en"),
+    ]
+    # The key a retrieval for ["en", "de"] reads.
+    assert list(decode_transcript(store.get("abcdefghijk", "de_en").data).lines) == LINES
+
+
+def test_migrate_extracts_embedded_metadata(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    payload = {"version": 2, "transcript": LINES, "metadata": {"title": "Old", "description": "text"}}
+    store.put("aaa", "en", pickle.dumps(payload), stored_at=100.0)
+    store.put("bbb", "en", pickle.dumps(payload), stored_at=100.0)
+    store.put("bbb", "metadata", b'{"version": 1, "title": "Newer", "description": null}', stored_at=200.0)
+
+    result = migrate_cache(store)
+
+    assert result.metadata_extracted == 1
+    assert json.loads(store.get("aaa", "metadata").data) == {"version": 1, "title": "Old", "description": "text"}
+    assert json.loads(store.get("bbb", "metadata").data)["title"] == "Newer"
+
+
+def test_migrate_deletes_unreadable_entries_and_keeps_current_ones(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    store.put("aaa", "en", b"not a pickle")
+    store.put("bbb", "en", pickle.dumps((os.system, ("true",))))
+    store.put("ccc", "metadata", b"{}")
+
+    progress = []
+    result = migrate_cache(store, on_progress=lambda done, total, key, outcome: progress.append((key, outcome)))
+
+    assert (result.converted, result.deleted) == (0, 2)
+    assert store.get("aaa", "en") is None
+    assert store.get("bbb", "en") is None
+    assert store.get("ccc", "metadata").data == b"{}"
+    assert sorted(progress) == [("aaa/en", "deleted"), ("bbb/en", "deleted")]
+
+
+def test_migrate_is_idempotent(tmp_path):
+    store = FileCacheStore(tmp_path)
+    store.put("aaa", "en", pickle.dumps(LINES))
+    migrate_cache(store)
+
+    result = migrate_cache(store)
+
+    assert (result.converted, result.deleted, result.unchanged) == (0, 0, 1)
+
+
+def test_decode_legacy_entry_rejects_foreign_classes():
+    assert decode_legacy_entry(pickle.dumps((os.system, ("true",)))) is None
+    assert decode_legacy_entry(pickle.dumps(["not", "lines"])) is None
+    assert decode_legacy_entry(pickle.dumps(LINES)).transcript == LINES
+
+
+def test_migrate_reencodes_packed_transcripts_without_checksum(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    payload = encode_transcript(LINES, language="English", language_code="en")
+    _magic, _version, _reserved, header_size = struct.unpack_from("<4sHHI", payload)
+    header = json.loads(payload[12 : 12 + header_size])
+    del header["crc32"]
+    encoded = json.dumps(header).encode("utf-8")
+    body = payload[12 + header_size + (-(12 + header_size) % 8) :]
+    old = struct.pack("<4sHHI", b"YTTC", 3, 0, len(encoded)) + encoded + b"\0" * (-(12 + len(encoded)) % 8) + body
+    store.put("aaaaaaaaaaa", "transcript.en.manual", old, stored_at=100.0)
+
+    result = migrate_cache(store)
+
+    record = store.get("aaaaaaaaaaa", "transcript.en.manual")
+    assert result.converted == 1
+    assert transcript_format_version(record.data) == FORMAT_VERSION
+    assert decode_transcript(record.data).language == "English"
+    assert record.stored_at == 100.0
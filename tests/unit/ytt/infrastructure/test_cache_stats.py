@@ -0,0 +1,41 @@
+import json
+
+from ytt.infrastructure.cache_stats import CacheStatsRecorder
+
+
+def test_recorder_merges_counters_from_several_processes(tmp_path):
+    path = tmp_path / "stats.json"
+    first = CacheStatsRecorder(path)
+    second = CacheStatsRecorder(path)
+
+    first.add(hits=2, bytes_read=100)
+    second.add(misses=1, fetch_seconds=0.5)
+    assert first.counters()["hits"] == 2
+    assert not path.exists()
+
+    first.flush()
+    second.flush()
+
+    counters = CacheStatsRecorder(path).counters()
+    assert (counters["hits"], counters["misses"], counters["bytes_read"]) == (2, 1, 100)
+    assert json.loads(path.read_text())["counters"]["fetch_seconds"] == 0.5
+
+
+def test_recorder_flushes_periodically_and_resets(tmp_path):
+    path = tmp_path / "stats.json"
+    recorder = CacheStatsRecorder(path, flush_interval=0)
+
+    recorder.add(hits=1)
+    assert CacheStatsRecorder(path).counters()["hits"] == 1
+
+    recorder.reset()
+    assert not path.exists()
+    assert recorder.counters()["hits"] == 0
+
+
+def test_recorder_ignores_corrupt_file(tmp_path, capsys):
+    path = tmp_path / "stats.json"
+    path.write_text("{not json")
+
+    assert CacheStatsRecorder(path).counters()["hits"] == 0
+    assert "Ignoring unreadable cache statistics" in capsys.readouterr().err
@@ -0,0 +1,374 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from ytt.infrastructure.cache_eviction import prune_cache
+from ytt.infrastructure.cache_store import (
+    DeduplicatingCacheStore,
+    FileCacheStore,
+    MemoryCacheStore,
+    SqliteCacheStore,
+    TieredCacheStore,
+    create_cache_store,
+)
+
+
+@pytest.fixture(params=["file", "sqlite", "memory", "tiered"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCacheStore(max_entries=100, max_bytes=1 << 20)
+    if request.param == "tiered":
+        return TieredCacheStore([MemoryCacheStore(max_entries=100, max_bytes=1 << 20), FileCacheStore(tmp_path)])
+    return create_cache_store(request.param, tmp_path)
+
+
+def test_store_round_trips_payload(store):
+    assert store.get("abc", "en") is None
+
+    store.put("abc", "en", b"payload")
+    record = store.get("abc", "en")
+
+    assert record is not None
+    assert record.data == b"payload"
+    assert record.stored_at > 0
+
+
+def test_store_replaces_and_deletes_entries(store):
+    store.put("abc", "en", b"old")
+    store.put("abc", "en", b"new")
+    store.put("abc", "de", b"other")
+
+    assert store.get("abc", "en").data == b"new"
+    assert store.delete("abc", "en") is True
+    assert store.delete("abc", "en") is False
+    assert store.get("abc", "en") is None
+    assert store.get("abc", "de").data == b"other"
+
+
+def test_store_lists_names_by_prefix(store):
+    store.put("abc", "transcript.en.manual", b"1")
+    store.put("abc", "transcript.de.generated", b"2")
+    store.put("abc", "en", b"3")
+    store.put("abd", "transcript.en.manual", b"4")
+
+    assert store.names("abc", "transcript.") == ["transcript.de.generated", "transcript.en.manual"]
+    assert store.names("abc") == ["en", "transcript.de.generated", "transcript.en.manual"]
+    assert store.names("missing") == []
+
+
+def test_file_store_reads_and_supersedes_legacy_pickle_files(tmp_path):
+    store = FileCacheStore(tmp_path)
+    (tmp_path / "abc_de_en.pkl").write_bytes(b"legacy")
+
+    assert store.get("abc", "de_en").data == b"legacy"
+    assert store.names("abc") == ["de_en"]
+
+    store.put("abc", "de_en", b"payload")
+
+    assert not list(tmp_path.rglob("*.pkl"))
+    assert store.path_for("abc", "de_en").read_bytes() == b"payload"
+
+
+def test_sqlite_store_uses_single_wal_database(tmp_path):
+    store = SqliteCacheStore(tmp_path / "cache.sqlite3")
+
+    store.put("abc", "en", b"payload")
+    journal_mode = store._connection().execute("PRAGMA journal_mode").fetchone()[0]
+
+    assert journal_mode == "wal"
+    assert [path.name for path in tmp_path.iterdir() if path.suffix == ".sqlite3"] == ["cache.sqlite3"]
+
+
+def test_create_cache_store_rejects_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        create_cache_store("redis", tmp_path)
+
+
+def test_file_store_maps_payload_and_survives_rewrites(tmp_path):
+    store = FileCacheStore(tmp_path)
+    store.put("abc", "transcript.en.manual", b"first payload")
+
+    record = store.get_mapped("abc", "transcript.en.manual")
+    view = memoryview(record.data)
+    store.put("abc", "transcript.en.manual", b"second")
+
+    assert bytes(view) == b"first payload"
+    assert store.get("abc", "transcript.en.manual").data == b"second"
+
+
+def test_store_keeps_explicit_stored_at(store):
+    store.put("abc", "metadata", b"{}", stored_at=1_000_000.0)
+
+    assert store.get("abc", "metadata").stored_at == pytest.approx(1_000_000.0)
+
+
+def test_memory_store_evicts_least_recently_used_entries():
+    store = MemoryCacheStore(max_entries=2, max_bytes=10)
+    store.put("a", "x", b"1234")
+    store.put("b", "x", b"1234")
+    store.get("a", "x")
+    store.put("c", "x", b"1234")
+
+    assert store.get("b", "x") is None
+    assert store.get("a", "x") is not None
+
+    store.put("d", "x", b"12345678")
+    assert [entry.video_id for entry in store.entries()] == ["d"]
+
+    store.put("e", "x", b"too large for the budget")
+    assert store.get("e", "x") is None
+
+
+def test_tiered_store_promotes_hits_with_original_timestamp(tmp_path):
+    disk = FileCacheStore(tmp_path)
+    disk.put("abc", "metadata", b"{}", stored_at=1_000_000.0)
+    memory = MemoryCacheStore(max_entries=10, max_bytes=1 << 20)
+    store = TieredCacheStore([memory, disk])
+
+    assert store.get_mapped("abc", "metadata").data[:] == b"{}"
+    promoted = memory.get("abc", "metadata")
+    assert promoted.data == b"{}"
+    assert promoted.stored_at == pytest.approx(1_000_000.0)
+
+
+def test_tiered_store_remembers_listings_until_written(tmp_path):
+    disk = FileCacheStore(tmp_path)
+    store = TieredCacheStore([MemoryCacheStore(max_entries=10, max_bytes=1 << 20), disk])
+    store.put("abc", "transcript.en.manual", b"1")
+    assert store.names("abc", "transcript.") == ["transcript.en.manual"]
+
+    disk.put("abc", "transcript.de.manual", b"2")
+    assert store.names("abc", "transcript.") == ["transcript.en.manual"]
+
+    store.delete("abc", "transcript.en.manual")
+    assert store.names("abc", "transcript.") == ["transcript.de.manual"]
+
+
+def test_tiered_store_revalidates_memory_hits_and_listings_against_the_disk(tmp_path, monkeypatch):
+    disk = FileCacheStore(tmp_path)
+    store = TieredCacheStore([MemoryCacheStore(max_entries=10, max_bytes=1 << 20), disk], listing_ttl=5.0)
+    store.put("abc", "metadata", b"old", stored_at=1_000_000.0)
+    assert store.names("abc") == ["metadata"]
+
+    # Another process rewrites one entry and adds another.
+    disk.put("abc", "metadata", b"new", stored_at=1_000_100.0)
+    disk.put("abc", "transcript.en.manual", b"1")
+    assert store.get("abc", "metadata").data == b"new"
+
+    clock = time.monotonic()
+    monkeypatch.setattr("ytt.infrastructure.cache_store.time.monotonic", lambda: clock + 5.0)
+    assert store.names("abc") == ["metadata", "transcript.en.manual"]
+
+    disk.delete("abc", "metadata")
+    assert store.get("abc", "metadata") is None
+
+
+def test_file_store_replaces_entries_atomically(tmp_path, monkeypatch):
+    store = FileCacheStore(tmp_path)
+    store.put("abc", "metadata", b"old")
+
+    def failing_replace(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("ytt.infrastructure.cache_store.os.replace", failing_replace)
+    with pytest.raises(OSError):
+        store.put("abc", "metadata", b"new")
+
+    assert store.get("abc", "metadata").data == b"old"
+    leftovers = [path.name for path in tmp_path.rglob("*") if path.is_file() and path.name != store.LAYOUT_MARKER]
+    assert leftovers == ["abc_metadata.ytc"]
+
+
+def test_dedup_store_shares_identical_transcript_payloads(tmp_path):
+    store = DeduplicatingCacheStore(FileCacheStore(tmp_path))
+    payload = b"packed transcript " * 100
+
+    store.put("abc", "transcript.en.manual", payload)
+    store.put("xyz", "transcript.en.manual", payload)
+    store.put("abc", "metadata", b"{}")
+
+    blobs = list(tmp_path.rglob("_blob_*.ytc"))
+    assert len(blobs) == 1
+    assert blobs[0].read_bytes() == payload
+    assert store.inner.path_for("abc", "transcript.en.manual").stat().st_size < 100
+    assert store.inner.path_for("abc", "metadata").read_bytes() == b"{}"
+    assert store.get("xyz", "transcript.en.manual").data == payload
+    assert store.get_mapped("abc", "transcript.en.manual").data[:] == payload
+
+    sizes = {(entry.video_id, entry.name): entry.size for entry in store.entries()}
+    assert sum(sizes.values()) == sum(path.stat().st_size for path in tmp_path.rglob("*.ytc"))
+
+
+def test_dedup_store_skips_rewriting_unchanged_payloads(tmp_path):
+    inner = FileCacheStore(tmp_path)
+    store = DeduplicatingCacheStore(inner)
+    payload = b"x" * 500
+    store.put("abc", "transcript.en.manual", payload, stored_at=1_000_000.0)
+    blob = next(tmp_path.rglob("_blob_*.ytc"))
+    inode = blob.stat().st_ino
+
+    store.put("abc", "transcript.en.manual", payload)
+
+    assert blob.stat().st_ino == inode
+    assert store.get("abc", "transcript.en.manual").stored_at > 1_000_000.0
+
+
+def test_unchanged_entries_are_restamped_in_place(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    store.put("abc", "transcript.en.manual", b"x" * 500, stored_at=100.0)
+    store.put("abc", "metadata", b"{}", stored_at=100.0)
+    files = {path.name: path.stat().st_ino for path in tmp_path.rglob("abc_*.ytc")}
+
+    store.put("abc", "transcript.en.manual", b"x" * 500, stored_at=200.0)
+    store.put("abc", "metadata", b"{}", stored_at=200.0)
+
+    assert {path.name: path.stat().st_ino for path in tmp_path.rglob("abc_*.ytc")} == files
+    assert store.get("abc", "transcript.en.manual").stored_at == 200.0
+    assert store.get("abc", "metadata").stored_at == 200.0
+    store.put("abc", "metadata", b'{"title": "new"}', stored_at=300.0)
+    assert store.get("abc", "metadata").data == b'{"title": "new"}'
+    assert not store.restamp("xyz", "metadata")
+
+
+def test_dedup_store_collects_unreferenced_blobs_after_grace_period(tmp_path):
+    store = DeduplicatingCacheStore(FileCacheStore(tmp_path), grace_period=0)
+    store.put("abc", "transcript.en.manual", b"a" * 500)
+    store.put("xyz", "transcript.en.manual", b"a" * 500)
+    store.put("xyz", "transcript.de.manual", b"b" * 500)
+
+    store.delete("abc", "transcript.en.manual")
+    store.delete("xyz", "transcript.de.manual")
+    assert store.collect_garbage() == 500
+    assert store.get("xyz", "transcript.en.manual").data == b"a" * 500
+
+    waiting = DeduplicatingCacheStore(FileCacheStore(tmp_path), grace_period=3600)
+    waiting.delete("xyz", "transcript.en.manual")
+    assert waiting.collect_garbage() == 0
+    assert len(list(tmp_path.rglob("_blob_*.ytc"))) == 1
+
+
+class ReadCountingFileStore(FileCacheStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = []
+
+    def get(self, video_id, name):
+        self.reads.append((video_id, name))
+        return super().get(video_id, name)
+
+
+def test_dedup_journal_spares_new_processes_reading_references(tmp_path):
+    journal = tmp_path / "references.tsv"
+    writer = DeduplicatingCacheStore(FileCacheStore(tmp_path / "cache"), grace_period=0, journal=journal)
+    writer.put("abc", "transcript.en.manual", b"a" * 500)
+    writer.put("xyz", "transcript.en.manual", b"a" * 500)
+    writer.restamp("xyz", "transcript.en.manual", 1_000.0)
+
+    inner = ReadCountingFileStore(tmp_path / "cache")
+    reader = DeduplicatingCacheStore(inner, grace_period=0, journal=journal)
+    sizes = {(entry.video_id, entry.name): entry.size for entry in reader.entries()}
+    assert inner.reads == []
+    assert sizes[("abc", "transcript.en.manual")] == sizes[("xyz", "transcript.en.manual")] > 250
+
+    # A reference rewritten without the journal is read once, then journaled.
+    FileCacheStore(tmp_path / "cache").restamp("abc", "transcript.en.manual", 2_000.0)
+    assert reader.collect_garbage() == 0
+    assert inner.reads == [("abc", "transcript.en.manual")]
+    list(DeduplicatingCacheStore(inner, journal=journal).entries())
+    assert inner.reads == [("abc", "transcript.en.manual")]
+
+
+def test_prune_collects_blobs_of_evicted_entries(tmp_path):
+    store = DeduplicatingCacheStore(FileCacheStore(tmp_path), grace_period=0)
+    store.put("abc", "transcript.en.manual", b"a" * 5000)
+
+    result = prune_cache(store, max_bytes=100)
+
+    assert result.entries == 1
+    assert result.bytes > 5000
+    assert list(tmp_path.rglob("*.ytc")) == []
+
+
+
+def test_file_store_shards_entries_by_video(tmp_path):
+    store = FileCacheStore(tmp_path)
+
+    store.put("abc", "metadata", b"{}")
+    store.put("abc", "transcript.en.manual", b"lines")
+    store.put("xyz", "metadata", b"{}")
+
+    path = store.path_for("abc", "metadata")
+    assert path.parent == store.path_for("abc", "transcript.en.manual").parent
+    assert path.relative_to(tmp_path).parts[:2] == (path.parent.parent.name, path.parent.name)
+    assert not list(tmp_path.glob("*.ytc"))
+    assert sorted((entry.video_id, entry.name) for entry in store.entries()) == [
+        ("abc", "metadata"),
+        ("abc", "transcript.en.manual"),
+        ("xyz", "metadata"),
+    ]
+
+
+def test_file_store_migrates_flat_entries_on_first_access(tmp_path):
+    store = FileCacheStore(tmp_path)
+    flat = store.flat_path_for("abc", "metadata")
+    flat.write_bytes(b"{}")
+    os.utime(flat, (1_000.0, 1_000.0))
+    store.flat_path_for("abc", "transcript.en.manual").write_bytes(b"lines")
+
+    assert {entry.name for entry in store.entries()} == {"metadata", "transcript.en.manual"}
+    record = store.get("abc", "metadata")
+    assert record.data == b"{}"
+    assert record.stored_at == 1_000.0
+    assert not flat.exists()
+    assert store.path_for("abc", "metadata").stat().st_mtime == 1_000.0
+
+    assert store.names("abc", "transcript.") == ["transcript.en.manual"]
+    assert not list(tmp_path.glob("*.ytc"))
+    assert store.get_mapped("abc", "transcript.en.manual").data[:] == b"lines"
+
+
+def test_file_store_stops_looking_for_flat_entries_once_none_are_left(tmp_path, monkeypatch):
+    first = FileCacheStore(tmp_path)
+    first.flat_path_for("abc", "metadata").write_bytes(b"{}")
+    assert first.names("abc") == ["metadata"]
+    assert not (tmp_path / FileCacheStore.LAYOUT_MARKER).exists()
+
+    second = FileCacheStore(tmp_path)
+    assert second.get("abc", "metadata").data == b"{}"
+    assert (tmp_path / FileCacheStore.LAYOUT_MARKER).exists()
+
+    globbed = []
+    original_glob = Path.glob
+    monkeypatch.setattr(Path, "glob", lambda path, pattern: globbed.append(path) or original_glob(path, pattern))
+    third = FileCacheStore(tmp_path)
+    assert third.names("abc") == ["metadata"]
+    third.put("abc", "transcript.en.manual", b"lines")
+    assert third.get("abc", "transcript.en.manual").data == b"lines"
+    assert tmp_path not in globbed
+
+
+def test_file_store_shards_blobs_by_digest(tmp_path):
+    store = DeduplicatingCacheStore(FileCacheStore(tmp_path))
+
+    store.put("abc", "transcript.en.manual", b"a" * 500)
+    store.put("xyz", "transcript.en.manual", b"b" * 500)
+
+    blobs = sorted(tmp_path.rglob("_blob_*.ytc"))
+    assert len(blobs) == 2
+    assert blobs[0].parent != blobs[1].parent
+    assert all(path.parent.parent.name == path.name[len("_blob_") :][:2] for path in blobs)
+
+
+def test_file_store_reads_flat_entries_it_cannot_migrate(tmp_path, monkeypatch):
+    store = FileCacheStore(tmp_path)
+    store.flat_path_for("abc", "metadata").write_bytes(b"{}")
+
+    def read_only_replace(source, destination):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr("ytt.infrastructure.cache_store.os.replace", read_only_replace)
+
+    assert store.get("abc", "metadata").data == b"{}"
+    assert store.names("abc") == ["metadata"]
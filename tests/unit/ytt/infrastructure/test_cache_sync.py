@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from ytt.infrastructure.cache_store import create_cache_store
+from ytt.infrastructure.cache_sync import (
+    MANIFEST_FILE_NAME,
+    ManifestError,
+    build_manifest,
+    export_cache,
+    import_cache,
+    read_manifest,
+)
+
+
+def test_export_and_import_round_trip_with_timestamps(tmp_path):
+    source = create_cache_store("file", tmp_path / "laptop")
+    source.put("abc", "transcript.en.manual", b"lines", stored_at=100.0)
+    source.put("abc", "metadata", b"{}", stored_at=200.0)
+    target = create_cache_store("sqlite", tmp_path / "node")
+
+    exported = export_cache(source, tmp_path / "bundle")
+    imported = import_cache(target, tmp_path / "bundle")
+
+    assert (exported.transferred, imported.transferred) == (2, 2)
+    assert target.get("abc", "transcript.en.manual").data == b"lines"
+    assert target.get("abc", "transcript.en.manual").stored_at == 100.0
+    assert target.get("abc", "metadata").stored_at == 200.0
+
+
+def test_import_keeps_fresher_local_entries(tmp_path):
+    source = create_cache_store("file", tmp_path / "laptop")
+    source.put("abc", "metadata", b"old", stored_at=100.0)
+    source.put("xyz", "metadata", b"newer", stored_at=300.0)
+    target = create_cache_store("file", tmp_path / "node")
+    target.put("abc", "metadata", b"fresh", stored_at=200.0)
+    target.put("xyz", "metadata", b"stale", stored_at=250.0)
+    export_cache(source, tmp_path / "bundle")
+
+    result = import_cache(target, tmp_path / "bundle")
+
+    assert (result.transferred, result.skipped) == (1, 1)
+    assert target.get("abc", "metadata").data == b"fresh"
+    assert target.get("xyz", "metadata").data == b"newer"
+
+
+def test_export_against_manifest_only_includes_missing_or_newer_entries(tmp_path):
+    source = create_cache_store("file", tmp_path / "laptop")
+    source.put("abc", "metadata", b"same", stored_at=100.0)
+    source.put("def", "metadata", b"updated", stored_at=300.0)
+    source.put("ghi", "metadata", b"new", stored_at=100.0)
+    target = create_cache_store("file", tmp_path / "node")
+    target.put("abc", "metadata", b"same", stored_at=100.0)
+    target.put("def", "metadata", b"old", stored_at=200.0)
+
+    result = export_cache(source, tmp_path / "bundle", against=build_manifest(target))
+
+    assert (result.transferred, result.skipped) == (2, 1)
+    assert sorted(entry.video_id for entry in read_manifest(tmp_path / "bundle")) == ["def", "ghi"]
+
+
+def test_reexport_reuses_objects_and_drops_stale_ones(tmp_path):
+    source = create_cache_store("file", tmp_path / "laptop")
+    source.put("abc", "metadata", b"one", stored_at=100.0)
+    source.put("def", "metadata", b"two", stored_at=100.0)
+    export_cache(source, tmp_path / "bundle")
+
+    source.delete("def", "metadata")
+    source.put("ghi", "metadata", b"three", stored_at=200.0)
+    result = export_cache(source, tmp_path / "bundle")
+
+    assert result.transferred == 2
+    assert result.bytes == len(b"three")
+    assert len(list((tmp_path / "bundle" / "objects").glob("*/*"))) == 2
+
+
+def test_import_rejects_corrupt_objects(tmp_path, capsys):
+    source = create_cache_store("file", tmp_path / "laptop")
+    source.put("abc", "metadata", b"{}", stored_at=100.0)
+    export_cache(source, tmp_path / "bundle")
+    for path in (tmp_path / "bundle" / "objects").glob("*/*"):
+        path.write_bytes(b"tampered")
+    target = create_cache_store("file", tmp_path / "node")
+
+    result = import_cache(target, tmp_path / "bundle")
+
+    assert result.failed == 1
+    assert target.get("abc", "metadata") is None
+    assert "Corrupt payload" in capsys.readouterr().err
+
+
+def test_read_manifest_rejects_unknown_versions(tmp_path):
+    (tmp_path / MANIFEST_FILE_NAME).write_text(json.dumps({"version": 99, "entries": []}))
+
+    with pytest.raises(ManifestError):
+        read_manifest(tmp_path)
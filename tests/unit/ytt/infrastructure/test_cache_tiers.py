@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+import requests
+
+from ytt.infrastructure.cache_eviction import prune_cache
+from ytt.infrastructure.cache_server import CacheServer
+from ytt.infrastructure.cache_store import FileCacheStore, MemoryCacheStore, TieredCacheStore
+from ytt.infrastructure.cache_tiers import HttpCacheStore, ReadOnlyCacheStore, create_cache_hierarchy
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = CacheServer(("127.0.0.1", 0), FileCacheStore(tmp_path / "server"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_store_round_trips_through_reference_server(server):
+    store = HttpCacheStore(server.url)
+
+    assert store.get("abc", "transcript.en") is None
+    store.put("abc", "transcript.en", b"payload", stored_at=1000.5)
+    store.put("abc", "metadata", b"{}")
+
+    record = store.get("abc", "transcript.en")
+    assert record.data == b"payload"
+    assert record.stored_at == 1000.5
+    assert store.names("abc", "transcript.") == ["transcript.en"]
+    assert store.names("missing") == []
+    assert server.store.get("abc", "metadata").data == b"{}"
+
+
+def test_server_rejects_unsafe_keys(server):
+    response = requests.put(f"{server.url}/entries/%2E%2E/metadata", data=b"escape", timeout=5)
+
+    assert response.status_code == 404
+    assert server.store.get("..", "metadata") is None
+
+
+def test_http_store_skips_unreachable_server_for_a_while(capsys):
+    store = HttpCacheStore("http://127.0.0.1:9", timeout=0.5, retry_after=60)
+
+    assert store.get("abc", "metadata") is None
+    assert store.names("abc") == []
+    store.put("abc", "metadata", b"{}")
+
+    assert capsys.readouterr().err.count("unavailable") == 1
+
+
+def test_hierarchy_promotes_shared_and_remote_hits_to_local_tiers(tmp_path, server):
+    shared = FileCacheStore(tmp_path / "shared")
+    shared.put("abc", "transcript.en", b"from-shared", stored_at=100.0)
+    HttpCacheStore(server.url).put("xyz", "transcript.en", b"from-remote", stored_at=200.0)
+    store = create_cache_hierarchy(
+        "file",
+        tmp_path / "local",
+        memory_entries=10,
+        memory_bytes=1 << 20,
+        shared_dir=tmp_path / "shared",
+        remote_url=server.url,
+    )
+    memory, local = store.tiers[:2]
+
+    assert store.get("abc", "transcript.en").data == b"from-shared"
+    assert store.get("xyz", "transcript.en").data == b"from-remote"
+
+    assert memory.get("abc", "transcript.en").stored_at == 100.0
+    assert local.get("xyz", "transcript.en").data == b"from-remote"
+    assert local.get("xyz", "transcript.en").stored_at == 200.0
+
+
+def test_hierarchy_writes_skip_shared_directory_but_reach_server(tmp_path, server):
+    store = create_cache_hierarchy(
+        "file", tmp_path / "local", shared_dir=tmp_path / "shared", remote_url=server.url
+    )
+
+    store.put("abc", "metadata", b"{}")
+
+    assert FileCacheStore(tmp_path / "shared").get("abc", "metadata") is None
+    assert server.store.get("abc", "metadata").data == b"{}"
+
+
+def test_prune_only_evicts_local_tiers(tmp_path):
+    shared = FileCacheStore(tmp_path / "shared")
+    shared.put("abc", "metadata", b"x" * 100)
+    local = FileCacheStore(tmp_path / "local")
+    local.put("xyz", "metadata", b"y" * 100)
+    store = TieredCacheStore([MemoryCacheStore(max_entries=10, max_bytes=1 << 20), local, ReadOnlyCacheStore(shared)])
+
+    prune_cache(store, max_bytes=0)
+
+    assert local.get("xyz", "metadata") is None
+    assert shared.get("abc", "metadata").data == b"x" * 100
+
+
+def test_hierarchy_without_extra_tiers_is_the_local_store(tmp_path):
+    store = create_cache_hierarchy("file", tmp_path)
+
+    assert not isinstance(store, TieredCacheStore)
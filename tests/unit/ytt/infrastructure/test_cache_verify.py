@@ -0,0 +1,73 @@
+import hashlib
+import pickle
+
+from ytt.domain.entities import TranscriptLine
+from ytt.infrastructure.cache_store import BLOB_NAMESPACE, FileCacheStore, create_cache_store
+from ytt.infrastructure.cache_verify import VERIFY_CORRUPT, VERIFY_OK, check_entry, verify_cache
+from ytt.infrastructure.transcript_codec import encode_transcript
+
+LINES = [TranscriptLine(text=f"line {index}", start=float(index), duration=1.0) for index in range(50)]
+
+
+def _damaged(payload):
+    damaged = bytearray(payload)
+    damaged[-5] ^= 0xFF
+    return bytes(damaged)
+
+
+def test_verify_quarantines_only_corrupt_entries(tmp_path):
+    store = create_cache_store("file", tmp_path / "cache")
+    store.put("aaaaaaaaaaa", "transcript.en.manual", encode_transcript(LINES))
+    store.put("aaaaaaaaaaa", "metadata", b'{"version": 1, "title": "ok", "description": null}')
+    store.put("bbbbbbbbbbb", "transcript.en.manual", _damaged(encode_transcript(LINES)))
+    store.put("ccccccccccc", "unavailable", b'{"version": 1, "reason": "bogus"}')
+    store.put("ddddddddddd", "en", pickle.dumps(LINES))
+    found = []
+
+    result = verify_cache(store, tmp_path / "quarantine", workers=3, on_corrupt=found.append)
+
+    assert (result.ok, result.legacy) == (2, 1)
+    assert [(entry.video_id, entry.reason) for entry in result.corrupt] == [
+        ("bbbbbbbbbbb", "checksum mismatch"),
+        ("ccccccccccc", "unknown reason 'bogus'"),
+    ]
+    assert sorted(entry.video_id for entry in found) == ["bbbbbbbbbbb", "ccccccccccc"]
+    assert store.get("bbbbbbbbbbb", "transcript.en.manual") is None
+    assert store.get("aaaaaaaaaaa", "transcript.en.manual") is not None
+    assert len(list((tmp_path / "quarantine").rglob("*"))) == 4  # two video directories, two payloads
+
+
+def test_verify_reports_references_to_missing_blobs(tmp_path):
+    store = create_cache_store("file", tmp_path / "cache")
+    store.put("aaaaaaaaaaa", "transcript.en.manual", encode_transcript(LINES))
+    inner = FileCacheStore(tmp_path / "cache")
+    for digest in inner.names(BLOB_NAMESPACE):
+        inner.delete(BLOB_NAMESPACE, digest)
+
+    result = verify_cache(store, tmp_path / "quarantine")
+
+    assert [(entry.name, entry.reason, entry.quarantined_to) for entry in result.corrupt] == [
+        ("transcript.en.manual", "payload is missing", None)
+    ]
+    assert store.names("aaaaaaaaaaa") == []
+
+
+def test_check_entry_validates_blob_digests():
+    payload = encode_transcript(LINES)
+    digest = hashlib.sha256(payload).hexdigest()
+
+    assert check_entry(BLOB_NAMESPACE, digest, payload) == (VERIFY_OK, None)
+    assert check_entry(BLOB_NAMESPACE, digest, _damaged(payload))[0] == VERIFY_CORRUPT
+
+
+def test_rewriting_a_transcript_replaces_a_damaged_blob(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    payload = encode_transcript(LINES)
+    store.put("aaaaaaaaaaa", "transcript.en.manual", payload)
+    inner = FileCacheStore(tmp_path)
+    (digest,) = inner.names(BLOB_NAMESPACE)
+    inner.put(BLOB_NAMESPACE, digest, _damaged(payload))
+
+    store.put("aaaaaaaaaaa", "transcript.en.manual", payload)
+
+    assert store.get("aaaaaaaaaaa", "transcript.en.manual").data == payload
@@ -0,0 +1,94 @@
+import json
+from functools import lru_cache
+
+import pytest
+
+from ytt.domain import CACHE_FIRST
+from ytt.domain.value_objects import VideoID
+from ytt.infrastructure.cache_store import create_cache_store
+from ytt.infrastructure.cache_verify import VERIFY_CORRUPT, VERIFY_OK, check_entry
+from ytt.infrastructure.metadata import YouTubeMetadataGateway, _page_extractor, extract_archived_metadata
+from ytt.infrastructure.page_archive import (
+    ARCHIVE_HTML,
+    ARCHIVE_JSON,
+    PAGE_NAME,
+    PageFormatError,
+    WatchPageArchive,
+    decode_page,
+)
+from ytt.infrastructure.transcript_repository import METADATA_NAME, CachedYouTubeTranscriptRepository, _NetworkUsage
+
+VIDEO = VideoID("aaaaaaaaaaa")
+PLAYER_RESPONSE = {"videoDetails": {"title": "Archived title", "shortDescription": "Archived description"}}
+HTML = (
+    '<html><head><meta property="og:title" content="Head title"></head><body><script>'
+    f"var ytInitialPlayerResponse = {json.dumps(PLAYER_RESPONSE)};</script></body></html>"
+)
+
+
+class StubResponse:
+    text = HTML
+
+    def raise_for_status(self):
+        pass
+
+
+class StubSession:
+    def __init__(self):
+        self.headers = {}
+        self.requests = 0
+
+    def get(self, url, timeout):
+        self.requests += 1
+        return StubResponse()
+
+
+@pytest.mark.parametrize("mode", [ARCHIVE_HTML, ARCHIVE_JSON])
+def test_fetched_pages_are_archived_and_extract_offline(tmp_path, mode):
+    store = create_cache_store("file", tmp_path)
+    session = StubSession()
+    gateway = YouTubeMetadataGateway(session=session, archive=WatchPageArchive(store, mode))
+
+    fetched = gateway.fetch(VIDEO)
+    data = store.get(VIDEO.value, PAGE_NAME).data
+
+    page = decode_page(data)
+    assert page.mode == mode
+    assert (page.html is not None) == (mode == ARCHIVE_HTML)
+    assert extract_archived_metadata(data) == fetched
+    assert fetched.title == "Archived title"
+    assert session.requests == 1
+    assert check_entry(VIDEO.value, PAGE_NAME, data) == (VERIFY_OK, None)
+
+
+def test_pages_are_not_archived_by_default_and_bad_payloads_are_rejected(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    YouTubeMetadataGateway(session=StubSession()).fetch(VIDEO)
+
+    assert store.names(VIDEO.value) == []
+    with pytest.raises(PageFormatError):
+        decode_page(b"<html></html>")
+    assert check_entry(VIDEO.value, PAGE_NAME, b"YTTPAGE\x01garbage")[0] == VERIFY_CORRUPT
+
+
+def test_metadata_fetched_with_its_page_is_not_newer_than_the_page(tmp_path):
+    store = create_cache_store("file", tmp_path)
+    gateway = YouTubeMetadataGateway(session=StubSession(), archive=WatchPageArchive(store, ARCHIVE_JSON))
+    repository = CachedYouTubeTranscriptRepository(store, gateway)
+
+    repository._fetch_metadata(VIDEO, _NetworkUsage(), refresh_metadata=False, policy=CACHE_FIRST)
+
+    # ``ytt cache reextract`` treats metadata stamped after its page as fetched without it.
+    assert store.stored_at(VIDEO.value, METADATA_NAME) <= store.stored_at(VIDEO.value, PAGE_NAME)
+
+
+def test_archived_pages_are_extracted_without_a_session_per_page(tmp_path, monkeypatch):
+    sessions = []
+    monkeypatch.setattr("ytt.infrastructure.metadata.requests.Session", lambda: sessions.append(1) or StubSession())
+    monkeypatch.setattr("ytt.infrastructure.metadata._page_extractor", lru_cache(maxsize=1)(_page_extractor.__wrapped__))
+    store = create_cache_store("file", tmp_path)
+    YouTubeMetadataGateway(session=StubSession(), archive=WatchPageArchive(store, ARCHIVE_JSON)).fetch(VIDEO)
+    data = store.get(VIDEO.value, PAGE_NAME).data
+
+    assert [extract_archived_metadata(data).title for _ in range(3)] == ["Archived title"] * 3
+    assert len(sessions) == 1
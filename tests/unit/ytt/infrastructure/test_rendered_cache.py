@@ -0,0 +1,168 @@
+import io
+import os
+
+from youtube_transcript_api import FetchedTranscript, FetchedTranscriptSnippet
+
+from ytt.domain.entities import VideoMetadata
+from ytt.domain.value_objects import VideoID
+from ytt.infrastructure.cache_eviction import prune_cache
+from ytt.infrastructure.cache_store import MemoryCacheStore, TieredCacheStore, create_cache_store
+from ytt.infrastructure.cache_tiers import local_cache_store
+from ytt.infrastructure.rendered_cache import RenderedOutputCache, render_variant
+from ytt.infrastructure.transcript_repository import CachedYouTubeTranscriptRepository
+
+VIDEO = VideoID("aaaaaaaaaaa")
+VARIANT = render_variant(["en"], show_title=True, show_description=True, show_url=True)
+
+
+class StubMetadataGateway:
+    def fetch(self, video_id):
+        return VideoMetadata(title="title", description="description")
+
+
+class StubTranscriptApi:
+    def __init__(self, text="hello"):
+        self.text = text
+
+    def list(self, video_id):
+        return [StubTranscript(video_id, self.text)]
+
+
+class StubTranscript:
+    language = "English"
+    language_code = "en"
+    is_generated = False
+
+    def __init__(self, video_id, text):
+        self.video_id = video_id
+        self.text = text
+
+    def fetch(self):
+        return FetchedTranscript(
+            snippets=[FetchedTranscriptSnippet(text=self.text, start=0.0, duration=1.0)],
+            video_id=self.video_id,
+            language=self.language,
+            language_code=self.language_code,
+            is_generated=self.is_generated,
+        )
+
+
+def _setup(tmp_path, **ttls):
+    store = create_cache_store("file", tmp_path / "cache")
+    api = StubTranscriptApi()
+    repository = CachedYouTubeTranscriptRepository(store, StubMetadataGateway(), transcript_api=api, **ttls)
+    rendered = RenderedOutputCache(tmp_path / "rendered", store, **ttls)
+    return store, api, repository, rendered
+
+
+def test_rendered_document_is_served_until_a_source_changes(tmp_path):
+    store, api, repository, rendered = _setup(tmp_path)
+    bundle = repository.retrieve(VIDEO, ["en"])
+    assert dict(bundle.sources).keys() == {"metadata", "tracks", "transcript.en.manual"}
+    assert rendered.save(VIDEO, VARIANT, bundle, b"document\n")
+
+    with rendered.open(VIDEO, VARIANT) as document:
+        assert document.read() == b"document\n"
+        assert document.transcript_unavailable is None
+
+    api.text = "changed"
+    repository.retrieve(VIDEO, ["en"], refresh_transcript=True)
+    assert rendered.open(VIDEO, VARIANT) is None
+    assert not rendered.path_for(VIDEO.value, VARIANT).exists()
+
+
+def test_rendered_document_is_dropped_when_a_source_is_restamped(tmp_path):
+    store, api, repository, rendered = _setup(tmp_path, transcript_ttl=3600.0)
+    rendered.save(VIDEO, VARIANT, repository.retrieve(VIDEO, ["en"]), b"document\n")
+    assert rendered.open(VIDEO, VARIANT) is not None
+
+    store.restamp(VIDEO.value, "transcript.en.manual", 1_000.0)
+    assert rendered.open(VIDEO, VARIANT) is None
+
+
+def test_rendered_document_is_dropped_when_another_transcript_appears(tmp_path):
+    store, api, repository, rendered = _setup(tmp_path)
+    rendered.save(VIDEO, VARIANT, repository.retrieve(VIDEO, ["en"]), b"document\n")
+
+    store.put(VIDEO.value, "transcript.de.manual", b"x")
+
+    assert rendered.open(VIDEO, VARIANT) is None
+
+
+def test_bundles_not_served_from_the_cache_are_not_rendered(tmp_path):
+    store, api, repository, rendered = _setup(tmp_path)
+    repository._metadata_gateway = type("Failing", (), {"fetch": lambda self, video_id: VideoMetadata(None, None)})()
+
+    bundle = repository.retrieve(VIDEO, ["en"])
+
+    assert bundle.sources == ()
+    assert not rendered.save(VIDEO, VARIANT, bundle, b"document\n")
+
+
+def test_write_to_streams_the_document_into_a_file(tmp_path):
+    store, api, repository, rendered = _setup(tmp_path)
+    rendered.save(VIDEO, VARIANT, repository.retrieve(VIDEO, ["en"]), b"line one\nline two\n")
+    target = tmp_path / "out.txt"
+
+    with open(target, "wb") as stream, rendered.open(VIDEO, VARIANT) as document:
+        document.write_to(stream)
+    buffer = io.BytesIO()
+    with rendered.open(VIDEO, VARIANT) as document:
+        document.write_to(buffer)
+
+    assert target.read_bytes() == buffer.getvalue() == b"line one\nline two\n"
+
+
+def test_prune_removes_documents_of_evicted_entries(tmp_path):
+    store, api, repository, rendered = _setup(tmp_path)
+    rendered.save(VIDEO, VARIANT, repository.retrieve(VIDEO, ["en"]), b"document\n")
+    assert rendered.prune() == 0
+
+    store.delete(VIDEO.value, "metadata")
+
+    assert rendered.prune() == 1
+    assert not any(os.scandir(rendered.path_for(VIDEO.value, VARIANT).parent))
+
+
+class CountingRemoteStore(MemoryCacheStore):
+    def __init__(self):
+        super().__init__(max_entries=100, max_bytes=1 << 20)
+        self.calls = 0
+
+    def names(self, video_id, prefix=""):
+        self.calls += 1
+        return super().names(video_id, prefix)
+
+    def stored_at(self, video_id, name):
+        self.calls += 1
+        return super().stored_at(video_id, name)
+
+
+def test_hits_are_validated_against_the_local_tier_only(tmp_path):
+    local = create_cache_store("file", tmp_path / "cache")
+    remote = CountingRemoteStore()
+    store = TieredCacheStore([local, remote])
+    repository = CachedYouTubeTranscriptRepository(store, StubMetadataGateway(), transcript_api=StubTranscriptApi())
+    rendered = RenderedOutputCache(tmp_path / "rendered", local_cache_store(store))
+    rendered.save(VIDEO, VARIANT, repository.retrieve(VIDEO, ["en"]), b"document\n")
+    remote.calls = 0
+
+    with rendered.open(VIDEO, VARIANT) as document:
+        assert document.read() == b"document\n"
+    assert remote.calls == 0
+
+
+def test_documents_count_toward_the_cache_budget(tmp_path):
+    store, api, repository, rendered = _setup(tmp_path)
+    rendered.save(VIDEO, VARIANT, repository.retrieve(VIDEO, ["en"]), b"x" * 10_000)
+    [entry] = rendered.entries()
+    assert (entry.video_id, entry.name) == (VIDEO.value, VARIANT) and entry.size > 10_000
+    # Not read for a long time, the document goes first and the entries it was rendered from fit.
+    os.utime(rendered.path_for(VIDEO.value, VARIANT), (1_000_000, 1_000_000))
+    names = store.names(VIDEO.value)
+
+    result = prune_cache(store, max_bytes=5_000, extra=(rendered,))
+
+    assert (result.entries, result.bytes) == (1, entry.size)
+    assert list(rendered.entries()) == []
+    assert store.names(VIDEO.value) == names
@@ -0,0 +1,119 @@
+import json
+import pickle
+import struct
+
+import pytest
+
+from ytt.domain.entities import TranscriptLine
+from ytt.infrastructure.transcript_codec import (
+    TranscriptFormatError,
+    check_transcript,
+    decode_transcript,
+    encode_transcript,
+    is_packed_transcript,
+)
+
+
+def _lines(count):
+    return [
+        TranscriptLine(text=f"line {index} – ünïcödé", start=index * 2.5, duration=2.25)
+        for index in range(count)
+    ]
+
+
+def test_round_trip_preserves_lines_and_track_details():
+    lines = _lines(50)
+
+    payload = encode_transcript(lines, language="English", language_code="en", is_generated=True)
+    decoded = decode_transcript(payload)
+
+    assert is_packed_transcript(payload)
+    assert decoded.lines == lines
+    assert decoded.lines[-1] == lines[-1]
+    assert decoded.lines[10:12] == lines[10:12]
+    assert (decoded.language, decoded.language_code, decoded.is_generated) == ("English", "en", True)
+
+
+def test_empty_transcript_round_trips():
+    decoded = decode_transcript(encode_transcript([]))
+
+    assert len(decoded.lines) == 0
+    assert list(decoded.lines) == []
+
+
+def test_packed_payload_is_smaller_than_pickle():
+    lines = _lines(2000)
+
+    packed = encode_transcript(lines)
+
+    assert len(packed) < len(pickle.dumps({"version": 2, "transcript": lines})) / 2
+
+
+def test_decode_rejects_truncated_payload():
+    payload = encode_transcript(_lines(10))
+
+    with pytest.raises(TranscriptFormatError):
+        decode_transcript(payload[:40])
+    with pytest.raises(TranscriptFormatError):
+        decode_transcript(b"not a transcript")
+
+
+def test_index_slices_are_lazy_views():
+    lines = _lines(100)
+    transcript = decode_transcript(encode_transcript(lines)).lines
+
+    window = transcript[10:20]
+
+    assert isinstance(window, type(transcript))
+    assert window == lines[10:20]
+    assert window[2:4] == lines[12:14]
+    assert window[-1] == lines[19]
+    assert transcript[::10] == lines[::10]
+
+
+def test_between_selects_lines_by_time():
+    lines = [TranscriptLine(text=str(index), start=index * 10.0, duration=8.0) for index in range(10)]
+    transcript = decode_transcript(encode_transcript(lines)).lines
+
+    assert [line.text for line in transcript.between(25.0, 50.0)] == ["2", "3", "4"]
+    assert [line.text for line in transcript.between(15.0, 30.0)] == ["1", "2"]
+    assert [line.text for line in transcript.between(18.5, 30.0)] == ["2"]
+    assert list(transcript.between(500.0, 600.0)) == []
+    assert [line.text for line in transcript[5:].between(0.0, 70.0)] == ["5", "6"]
+
+
+def _as_version_3(payload):
+    """Rewrite a payload in the checksum-less version 3 layout."""
+
+    _magic, _version, _reserved, header_size = struct.unpack_from("<4sHHI", payload)
+    header = json.loads(payload[12 : 12 + header_size])
+    body = payload[12 + header_size + (-(12 + header_size) % 8) :]
+    del header["crc32"]
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    padding = -(12 + len(encoded)) % 8
+    return struct.pack("<4sHHI", b"YTTC", 3, 0, len(encoded)) + encoded + b"\0" * padding + body
+
+
+def test_decode_rejects_payload_with_bad_checksum_when_verifying():
+    payload = bytearray(encode_transcript(_lines(10)))
+    payload[-3] ^= 0x01
+
+    with pytest.raises(TranscriptFormatError, match="checksum"):
+        decode_transcript(bytes(payload), verify=True)
+    # A plain decode does not read the text; decompressing it catches the damage.
+    lines = decode_transcript(bytes(payload)).lines
+    assert list(lines.starts) == [line.start for line in _lines(10)]
+    with pytest.raises(TranscriptFormatError, match="corrupt text"):
+        lines[0]
+
+
+def test_version_3_payloads_without_checksum_still_decode():
+    lines = _lines(10)
+    payload = _as_version_3(encode_transcript(lines))
+
+    assert decode_transcript(payload).lines == lines
+    check_transcript(payload)
+    damaged = bytearray(payload)
+    damaged[-3] ^= 0x01
+    with pytest.raises(TranscriptFormatError):
+        check_transcript(bytes(damaged))
@@ -0,0 +1,158 @@
+from youtube_transcript_api import FetchedTranscript, FetchedTranscriptSnippet
+
+from ytt.domain.entities import VideoMetadata
+from ytt.domain.value_objects import VideoID
+from ytt.infrastructure.cache_store import MemoryCacheStore, TieredCacheStore, create_cache_store
+from ytt.infrastructure.cache_verify import VERIFY_CORRUPT, VERIFY_OK, check_entry
+from ytt.infrastructure.transcript_history import (
+    apply_delta,
+    diff_versions,
+    history_name,
+    load_history,
+    make_delta,
+)
+from ytt.infrastructure.transcript_repository import CachedYouTubeTranscriptRepository
+
+VIDEO = VideoID("aaaaaaaaaaa")
+NAME = "transcript.en.manual"
+
+
+class StubMetadataGateway:
+    def __init__(self):
+        self.title = "Title"
+
+    def fetch(self, video_id):
+        return VideoMetadata(title=self.title, description="first line\nsecond line")
+
+
+class StubTranscriptApi:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def list(self, video_id):
+        return [StubTranscript(video_id, self.lines)]
+
+
+class StubTranscript:
+    language = "English"
+    language_code = "en"
+    is_generated = False
+
+    def __init__(self, video_id, lines):
+        self.video_id = video_id
+        self.lines = list(lines)
+
+    def fetch(self):
+        return FetchedTranscript(
+            snippets=[
+                FetchedTranscriptSnippet(text=text, start=float(index), duration=1.0)
+                for index, text in enumerate(self.lines)
+            ],
+            video_id=self.video_id,
+            language=self.language,
+            language_code=self.language_code,
+            is_generated=self.is_generated,
+        )
+
+
+def _setup(tmp_path, lines, **kwargs):
+    store = create_cache_store("file", tmp_path / "cache")
+    api = StubTranscriptApi(lines)
+    gateway = StubMetadataGateway()
+    repository = CachedYouTubeTranscriptRepository(store, gateway, transcript_api=api, **kwargs)
+    return store, api, gateway, repository
+
+
+def test_delta_rebuilds_the_older_version():
+    newer = [(0.0, 1.0, "a"), (1.0, 1.0, "b"), (2.0, 1.0, "c"), (3.0, 1.0, "d")]
+    older = [(0.0, 1.0, "a"), (1.0, 1.0, "B"), (2.0, 1.0, "c"), (4.0, 1.0, "e"), (5.0, 1.0, "f")]
+
+    delta = make_delta(newer, older)
+
+    assert apply_delta(newer, delta) == tuple(older)
+    assert ["=", 0, 1] in delta and ["=", 2, 3] in delta
+
+
+def test_refreshes_keep_a_bounded_history_of_changed_versions(tmp_path):
+    store, api, gateway, repository = _setup(tmp_path, ["one", "two", "three"], history_versions=2)
+    repository.retrieve(VIDEO, ["en"])
+    for lines in (["one", "TWO", "three"], ["one", "TWO", "three"], ["one", "TWO", "three", "four"], ["zero"]):
+        api.lines = lines
+        repository.retrieve(VIDEO, ["en"], refresh=True)
+
+    history = load_history(store, VIDEO.value, NAME)
+
+    # The unchanged refresh added no version, and the oldest one fell off.
+    assert [[unit[2] for unit in version.units] for version in history.versions] == [
+        ["zero"],
+        ["one", "TWO", "three", "four"],
+        ["one", "TWO", "three"],
+    ]
+    assert history.versions[0].stored_at > history.versions[1].stored_at > history.versions[2].stored_at
+    assert "\n".join(diff_versions(history, 2, 1)).endswith("+[00:03] four")
+    assert check_entry(VIDEO.value, history_name(NAME), store.get(VIDEO.value, history_name(NAME)).data) == (
+        VERIFY_OK,
+        None,
+    )
+    assert check_entry(VIDEO.value, history_name(NAME), b"garbage")[0] == VERIFY_CORRUPT
+
+
+def test_metadata_history_and_disabled_history(tmp_path):
+    store, api, gateway, repository = _setup(tmp_path, ["one"], history_versions=5)
+    repository.retrieve(VIDEO, ["en"])
+    gateway.title = "New title"
+    repository.retrieve(VIDEO, ["en"], refresh_metadata=True)
+
+    diff = diff_versions(load_history(store, VIDEO.value, "metadata"), 1, 0)
+    assert "-# Title" in diff and "+# New title" in diff and " second line" in diff
+
+    store, api, gateway, repository = _setup(tmp_path / "off", ["one"])
+    repository.retrieve(VIDEO, ["en"])
+    api.lines = ["two"]
+    repository.retrieve(VIDEO, ["en"], refresh=True)
+    assert store.names(VIDEO.value, "history.") == []
+
+
+def test_history_of_a_refetched_entry_is_started_over(tmp_path):
+    store, api, gateway, repository = _setup(tmp_path, ["one"], history_versions=5)
+    repository.retrieve(VIDEO, ["en"])
+    api.lines = ["two"]
+    repository.retrieve(VIDEO, ["en"], refresh=True)
+    # The entry is evicted and fetched again, so the old chain no longer applies.
+    store.delete(VIDEO.value, NAME)
+    api.lines = ["three"]
+    repository.retrieve(VIDEO, ["en"])
+    assert load_history(store, VIDEO.value, NAME).detached
+
+    api.lines = ["four"]
+    repository.retrieve(VIDEO, ["en"], refresh=True)
+    history = load_history(store, VIDEO.value, NAME)
+    assert not history.detached
+    assert [version.units[0][2] for version in history.versions] == ["four", "three"]
+
+
+class CountingRemoteStore(MemoryCacheStore):
+    def __init__(self):
+        super().__init__(max_entries=100, max_bytes=1 << 20)
+        self.reads = []
+
+    def get(self, video_id, name):
+        self.reads.append(name)
+        return super().get(video_id, name)
+
+
+def test_history_reads_the_replaced_version_from_the_local_tier_only(tmp_path):
+    store, api, gateway, repository = _setup(tmp_path, ["one"], history_versions=5)
+    repository.retrieve(VIDEO, ["en"])
+    remote = CountingRemoteStore()
+    remote.put(VIDEO.value, NAME, store.get(VIDEO.value, NAME).data)
+    local = create_cache_store("file", tmp_path / "local")
+    repository._store = TieredCacheStore([local, remote])
+
+    api.lines = ["two"]
+    fetched = api.list(VIDEO.value)[0].fetch()
+    assert repository._save_transcript(VIDEO, repository._to_transcript(fetched), fetched)
+
+    # The remote copy is not the version this cache replaced.
+    assert remote.reads == []
+    assert local.names(VIDEO.value) == [NAME]
@@ -1,8 +1,32 @@
+import json
+import pickle
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from youtube_transcript_api import FetchedTranscript, FetchedTranscriptSnippet, TranscriptsDisabled
+
 from ytt.domain.entities import TranscriptLine, VideoMetadata, VideoTranscriptBundle
 from ytt.domain.value_objects import VideoID
+from ytt.infrastructure.cache_eviction import EvictionSchedule
+from ytt.infrastructure.cache_stats import CacheStatsRecorder
+from ytt.infrastructure.cache_store import FileCacheStore, SqliteCacheStore
+from ytt.infrastructure.metadata import YouTubeMetadataGateway
 from ytt.infrastructure.transcript_repository import CachedYouTubeTranscriptRepository
 
 
+def fetched_transcript(text, language_code="en", is_generated=False):
+    return FetchedTranscript(
+        snippets=[FetchedTranscriptSnippet(text=text, start=0.0, duration=1.0)],
+        video_id="video",
+        language=language_code,
+        language_code=language_code,
+        is_generated=is_generated,
+    )
+
+
 class StubMetadataGateway:
     def fetch(self, video_id: VideoID) -> VideoMetadata:
         return VideoMetadata(title="fresh", description="fresh description")
@@ -14,7 +38,7 @@ class ProbeRepository(CachedYouTubeTranscriptRepository):
         self.load_cache_called = False
         self.fetch_from_api_called = False
 
-    def _load_cache(self, cache_path):
+    def _load_cache(self, data):
         self.load_cache_called = True
         return VideoTranscriptBundle(
             transcript=[TranscriptLine(text="cached", start=0.0, duration=1.0)],
@@ -23,15 +47,14 @@ class ProbeRepository(CachedYouTubeTranscriptRepository):
 
     def _fetch_from_api(self, video_id, preferred_languages):
         self.fetch_from_api_called = True
-        return [TranscriptLine(text="fresh", start=0.0, duration=1.0)]
+        return fetched_transcript("fresh")
 
 
 def test_retrieve_uses_cache_by_default(tmp_path):
     repository = ProbeRepository(tmp_path, StubMetadataGateway())
     video_id = VideoID("aaaaaaaaaaa")
-    cache_path = repository._cache_path(video_id, ["en"])
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    cache_path.write_bytes(b"placeholder")
+    repository._store.put(video_id.value, repository._transcript_cache_name("en", False), b"placeholder")
+    repository._save_metadata(video_id, VideoMetadata(title="cached", description="cached"))
 
     bundle = repository.retrieve(video_id, ["en"])
 
@@ -44,9 +67,7 @@ def test_retrieve_uses_cache_by_default(tmp_path):
 def test_retrieve_skips_cache_when_refresh_is_enabled(tmp_path):
     repository = ProbeRepository(tmp_path, StubMetadataGateway())
     video_id = VideoID("bbbbbbbbbbb")
-    cache_path = repository._cache_path(video_id, ["en"])
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    cache_path.write_bytes(b"placeholder")
+    repository._store.put(video_id.value, repository._transcript_cache_name("en", False), b"placeholder")
 
     bundle = repository.retrieve(video_id, ["en"], refresh=True)
 
@@ -54,3 +75,590 @@ def test_retrieve_skips_cache_when_refresh_is_enabled(tmp_path):
     assert repository.load_cache_called is False
     assert repository.fetch_from_api_called is True
     assert bundle.metadata.title == "fresh"
+
+
+def test_retrieve_round_trips_through_sqlite_store(tmp_path):
+    store = SqliteCacheStore(tmp_path / "cache.sqlite3")
+    video_id = VideoID("ccccccccccc")
+    repository = CachedYouTubeTranscriptRepository(store, StubMetadataGateway())
+    repository._fetch_from_api = lambda video_id, languages: fetched_transcript("fresh")
+    repository.retrieve(video_id, ["en"])
+
+    repository._fetch_from_api = lambda video_id, languages: None
+    bundle = repository.retrieve(video_id, ["en"])
+
+    assert bundle is not None
+    assert [line.text for line in bundle.transcript] == ["fresh"]
+    assert bundle.metadata.title == "fresh"
+
+
+class CountingRepository(CachedYouTubeTranscriptRepository):
+    def __init__(self, *args, transcripts, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transcripts = transcripts
+        self.fetch_calls = []
+
+    def _fetch_from_api(self, video_id, preferred_languages):
+        self.fetch_calls.append(list(preferred_languages))
+        return self.transcripts.pop(0)
+
+
+def test_cached_transcript_satisfies_extended_language_preferences(tmp_path):
+    repository = CountingRepository(
+        tmp_path, StubMetadataGateway(), transcripts=[fetched_transcript("hello", "en")]
+    )
+    video_id = VideoID("ddddddddddd")
+
+    repository.retrieve(video_id, ["en"])
+    bundle = repository.retrieve(video_id, ["en", "de"])
+
+    assert repository.fetch_calls == [["en"]]
+    assert [line.text for line in bundle.transcript] == ["hello"]
+
+
+def test_cached_transcript_in_other_language_goes_to_network(tmp_path):
+    repository = CountingRepository(
+        tmp_path,
+        StubMetadataGateway(),
+        transcripts=[fetched_transcript("hello", "en"), fetched_transcript("hallo", "de")],
+    )
+    video_id = VideoID("eeeeeeeeeee")
+
+    repository.retrieve(video_id, ["en"])
+    bundle = repository.retrieve(video_id, ["de"])
+
+    assert repository.fetch_calls == [["en"], ["de"]]
+    assert [line.text for line in bundle.transcript] == ["hallo"]
+
+
+def test_cached_selection_respects_preference_order(tmp_path):
+    repository = CountingRepository(
+        tmp_path,
+        StubMetadataGateway(),
+        transcripts=[fetched_transcript("hello", "en"), fetched_transcript("hallo", "de")],
+    )
+    video_id = VideoID("fffffffffff")
+    repository.retrieve(video_id, ["en"])
+    repository.retrieve(video_id, ["de"])
+
+    assert repository.retrieve(video_id, ["de", "en"]).transcript[0].text == "hallo"
+    assert repository.retrieve(video_id, ["en", "de"]).transcript[0].text == "hello"
+    assert len(repository.fetch_calls) == 2
+
+
+class CountingMetadataGateway:
+    def __init__(self):
+        self.calls = 0
+
+    def fetch(self, video_id: VideoID) -> VideoMetadata:
+        self.calls += 1
+        return VideoMetadata(title=f"title {self.calls}", description="description")
+
+
+def _separate_records_repository(tmp_path, **kwargs):
+    gateway = CountingMetadataGateway()
+    repository = CountingRepository(
+        tmp_path,
+        gateway,
+        transcripts=[fetched_transcript("first"), fetched_transcript("second")],
+        **kwargs,
+    )
+    return repository, gateway
+
+
+def test_refresh_metadata_keeps_cached_transcript(tmp_path):
+    repository, gateway = _separate_records_repository(tmp_path)
+    video_id = VideoID("ggggggggggg")
+    repository.retrieve(video_id, ["en"])
+
+    bundle = repository.retrieve(video_id, ["en"], refresh_metadata=True)
+
+    assert len(repository.fetch_calls) == 1
+    assert gateway.calls == 2
+    assert bundle.metadata.title == "title 2"
+    assert bundle.transcript[0].text == "first"
+
+
+def test_refresh_transcript_keeps_cached_metadata(tmp_path):
+    repository, gateway = _separate_records_repository(tmp_path)
+    video_id = VideoID("hhhhhhhhhhh")
+    repository.retrieve(video_id, ["en"])
+
+    bundle = repository.retrieve(video_id, ["en"], refresh_transcript=True)
+
+    assert len(repository.fetch_calls) == 2
+    assert gateway.calls == 1
+    assert bundle.metadata.title == "title 1"
+    assert bundle.transcript[0].text == "second"
+
+
+def test_expired_metadata_is_refetched_independently(tmp_path, monkeypatch):
+    repository, gateway = _separate_records_repository(
+        tmp_path, metadata_ttl=60.0, transcript_ttl=3600.0
+    )
+    video_id = VideoID("iiiiiiiiiii")
+    repository.retrieve(video_id, ["en"])
+
+    later = time.time() + 120
+    monkeypatch.setattr("ytt.infrastructure.transcript_repository.time.time", lambda: later)
+    bundle = repository.retrieve(video_id, ["en"])
+
+    assert len(repository.fetch_calls) == 1
+    assert gateway.calls == 2
+    assert bundle.metadata.title == "title 2"
+
+
+def test_legacy_pickle_entries_are_misses_until_migrated(tmp_path, capsys):
+    store = FileCacheStore(tmp_path)
+    legacy_payload = {
+        "version": 2,
+        "transcript": [TranscriptLine(text="legacy", start=0.0, duration=1.0)],
+        "metadata": {"title": "legacy title", "description": None},
+    }
+    (tmp_path / "jjjjjjjjjjj_en.pkl").write_bytes(pickle.dumps(legacy_payload))
+    repository = CountingRepository(store, StubMetadataGateway(), transcripts=[fetched_transcript("fresh")])
+
+    bundle = repository.retrieve(VideoID("jjjjjjjjjjj"), ["en"])
+
+    assert len(repository.fetch_calls) == 1
+    assert bundle.transcript[0].text == "fresh"
+    assert "ytt cache migrate" in capsys.readouterr().err
+
+
+def test_new_entries_are_stored_without_pickle(tmp_path):
+    repository = CountingRepository(
+        tmp_path, StubMetadataGateway(), transcripts=[fetched_transcript("hello")]
+    )
+    repository.retrieve(VideoID("kkkkkkkkkkk"), ["en"])
+
+    payload = FileCacheStore(tmp_path).path_for("kkkkkkkkkkk", "transcript.en.manual").read_bytes()
+
+    assert payload.startswith(b"YTTC")
+    assert repository.retrieve(VideoID("kkkkkkkkkkk"), ["en"]).transcript == [
+        TranscriptLine(text="hello", start=0.0, duration=1.0)
+    ]
+
+
+def test_damaged_transcript_text_is_refetched_on_load(tmp_path, capsys):
+    repository = CountingRepository(
+        tmp_path, StubMetadataGateway(), transcripts=[fetched_transcript("hello"), fetched_transcript("again")]
+    )
+    video_id = VideoID("kkkkkkkkkkk")
+    repository.retrieve(video_id, ["en"])
+    path = FileCacheStore(tmp_path).path_for(video_id.value, "transcript.en.manual")
+    payload = bytearray(path.read_bytes())
+    # A byte inside the zlib-compressed text, which is only decompressed when a line is read.
+    payload[-3] ^= 0x01
+    path.write_bytes(bytes(payload))
+
+    bundle = repository.retrieve(video_id, ["en"])
+
+    assert [line.text for line in bundle.transcript] == ["again"]
+    assert len(repository.fetch_calls) == 2
+    assert "checksum mismatch" in capsys.readouterr().err
+
+
+def test_cached_transcript_is_a_lazy_view_over_the_mapped_file(tmp_path):
+    lines = [TranscriptLine(text=f"line {index}", start=float(index), duration=1.0) for index in range(1000)]
+    repository = CountingRepository(tmp_path, StubMetadataGateway(), transcripts=[])
+    repository._save_transcript(VideoID("lllllllllll"), lines, fetched_transcript("unused"))
+
+    bundle = repository.retrieve(VideoID("lllllllllll"), ["en"])
+
+    assert repository.fetch_calls == []
+    assert len(bundle.transcript) == 1000
+    assert list(bundle.transcript.between(500.0, 503.0)) == lines[500:503]
+
+
+class SlowCountingRepository(CountingRepository):
+    def _fetch_from_api(self, video_id, preferred_languages):
+        time.sleep(0.2)
+        return super()._fetch_from_api(video_id, preferred_languages)
+
+
+def test_concurrent_misses_fetch_once(tmp_path):
+    gateway = CountingMetadataGateway()
+    repositories = [
+        SlowCountingRepository(tmp_path, gateway, transcripts=[fetched_transcript("hello")]) for _ in range(3)
+    ]
+    video_id = VideoID("sssssssssss")
+    bundles = []
+    threads = [
+        threading.Thread(target=lambda repository=repository: bundles.append(repository.retrieve(video_id, ["en"])))
+        for repository in repositories
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(len(repository.fetch_calls) for repository in repositories) == 1
+    assert gateway.calls == 1
+    assert [[line.text for line in bundle.transcript] for bundle in bundles] == [["hello"]] * 3
+
+
+class DisabledTranscriptApi:
+    def __init__(self):
+        self.calls = 0
+
+    def list(self, video_id):
+        self.calls += 1
+        raise TranscriptsDisabled(video_id)
+
+
+def test_unavailable_transcript_is_cached_with_metadata(tmp_path):
+    api = DisabledTranscriptApi()
+    gateway = CountingMetadataGateway()
+    repository = CachedYouTubeTranscriptRepository(tmp_path, gateway, negative_ttl=3600, transcript_api=api)
+    video_id = VideoID("nnnnnnnnnnn")
+
+    first = repository.retrieve(video_id, ["en"])
+    second = repository.retrieve(video_id, ["en"])
+
+    assert api.calls == 1
+    assert gateway.calls == 1
+    assert list(second.transcript) == []
+    assert second.transcript_unavailable == first.transcript_unavailable
+    assert "disabled" in second.transcript_unavailable
+    assert second.metadata.title == "title 1"
+
+
+def test_refresh_bypasses_and_clears_unavailable_entry(tmp_path):
+    repository = CountingRepository(
+        tmp_path, StubMetadataGateway(), transcripts=[fetched_transcript("hello")], negative_ttl=3600
+    )
+    video_id = VideoID("rrrrrrrrrrr")
+    repository._save_unavailable(video_id, "disabled")
+
+    assert repository.retrieve(video_id, ["en"]).transcript_unavailable is not None
+    bundle = repository.retrieve(video_id, ["en"], refresh_transcript=True)
+
+    assert bundle.transcript_unavailable is None
+    assert [line.text for line in bundle.transcript] == ["hello"]
+    assert repository._store.get(video_id.value, "unavailable") is None
+
+
+def test_unavailable_entries_expire_and_can_be_disabled(tmp_path, monkeypatch):
+    api = DisabledTranscriptApi()
+    repository = CachedYouTubeTranscriptRepository(
+        tmp_path, StubMetadataGateway(), negative_ttl=60, transcript_api=api
+    )
+    video_id = VideoID("xxxxxxxxxxx")
+    repository.retrieve(video_id, ["en"])
+    later = time.time() + 120
+    monkeypatch.setattr("ytt.infrastructure.transcript_repository.time.time", lambda: later)
+    repository.retrieve(video_id, ["en"])
+    assert api.calls == 2
+
+    uncached = CachedYouTubeTranscriptRepository(tmp_path / "other", StubMetadataGateway(), transcript_api=api)
+    uncached.retrieve(video_id, ["en"])
+    uncached.retrieve(video_id, ["en"])
+    assert api.calls == 4
+
+
+
+def test_retrieve_records_cache_statistics(tmp_path):
+    stats = CacheStatsRecorder()
+    repository = CountingRepository(
+        tmp_path, StubMetadataGateway(), transcripts=[fetched_transcript("hello")], stats=stats
+    )
+    video_id = VideoID("ttttttttttt")
+
+    repository.retrieve(video_id, ["en"])
+    repository.retrieve(video_id, ["en"])
+    repository.retrieve(video_id, ["en"], refresh_metadata=True)
+
+    counters = stats.counters()
+    assert (counters["hits"], counters["misses"], counters["refreshes"]) == (1, 1, 1)
+    assert counters["fetches"] == 3
+    assert counters["bytes_written"] > 0
+    assert counters["bytes_read"] > 0
+
+
+def test_cache_only_policy_never_uses_the_network(tmp_path, monkeypatch, capsys):
+    gateway = CountingMetadataGateway()
+    repository = CountingRepository(
+        tmp_path, gateway, transcripts=[fetched_transcript("hello")], transcript_ttl=60, metadata_ttl=60
+    )
+    cached_id, missing_id = VideoID("ppppppppppp"), VideoID("qqqqqqqqqqq")
+    repository.retrieve(cached_id, ["en"])
+    later = time.time() + 120
+    monkeypatch.setattr("ytt.infrastructure.transcript_repository.time.time", lambda: later)
+
+    bundle = repository.retrieve(cached_id, ["en"], policy="cache-only")
+    missing = repository.retrieve(missing_id, ["en"], policy="cache-only")
+
+    assert [line.text for line in bundle.transcript] == ["hello"]
+    assert bundle.metadata.title == "title 1"
+    assert missing is None
+    assert "No cached transcript for qqqqqqqqqqq" in capsys.readouterr().err
+    assert len(repository.fetch_calls) == 1
+    assert gateway.calls == 1
+
+
+def test_stale_while_revalidate_serves_expired_entries_and_schedules_a_refresh(tmp_path, monkeypatch):
+    revalidated = []
+    repository = CountingRepository(
+        tmp_path,
+        CountingMetadataGateway(),
+        transcripts=[fetched_transcript("old")],
+        transcript_ttl=60,
+        metadata_ttl=3600,
+        revalidate=lambda video_id, languages: revalidated.append((video_id, list(languages))),
+    )
+    video_id = VideoID("rrrrrrrrrrr")
+    repository.retrieve(video_id, ["en"], policy="stale-while-revalidate")
+    assert revalidated == []
+
+    later = time.time() + 120
+    monkeypatch.setattr("ytt.infrastructure.transcript_repository.time.time", lambda: later)
+    first = repository.retrieve(video_id, ["en"], policy="stale-while-revalidate")
+    second = repository.retrieve(video_id, ["en"], policy="stale-while-revalidate")
+
+    assert [line.text for line in first.transcript] == ["old"]
+    assert [line.text for line in second.transcript] == ["old"]
+    assert len(repository.fetch_calls) == 1
+    assert revalidated == [(video_id, ["en"])]
+
+    # Another selection is refreshed for its own languages.
+    repository.retrieve(video_id, ["de", "en"], policy="stale-while-revalidate")
+    assert revalidated == [(video_id, ["en"]), (video_id, ["de", "en"])]
+
+
+def test_network_first_falls_back_to_cached_entries(tmp_path):
+    repository = CountingRepository(
+        tmp_path, StubMetadataGateway(), transcripts=[fetched_transcript("cached"), None, fetched_transcript("new")]
+    )
+    video_id = VideoID("sssssssssss")
+    repository.retrieve(video_id, ["en"])
+
+    offline = repository.retrieve(video_id, ["en"], policy="network-first")
+    online = repository.retrieve(video_id, ["en"], policy="network-first")
+
+    assert [line.text for line in offline.transcript] == ["cached"]
+    assert [line.text for line in online.transcript] == ["new"]
+    assert len(repository.fetch_calls) == 3
+
+
+class StubTrack:
+    def __init__(self, language_code, is_generated=False, is_translatable=True):
+        self.language_code = language_code
+        self.language = language_code.upper()
+        self.is_generated = is_generated
+        self.is_translatable = is_translatable
+
+    def fetch(self):
+        return fetched_transcript(f"text {self.language_code}", self.language_code, self.is_generated)
+
+
+class StubTrackApi:
+    def __init__(self, tracks):
+        self.tracks = tracks
+        self.list_calls = 0
+
+    def list(self, video_id):
+        self.list_calls += 1
+        if self.tracks is None:
+            raise TranscriptsDisabled(video_id)
+        return list(self.tracks)
+
+
+def test_cached_track_list_selects_cached_transcripts_for_any_preference(tmp_path):
+    api = StubTrackApi([StubTrack("de"), StubTrack("de", is_generated=True)])
+    repository = CachedYouTubeTranscriptRepository(tmp_path, StubMetadataGateway(), transcript_api=api)
+    video_id = VideoID("ttttttttttt")
+    repository.retrieve(video_id, ["de"])
+
+    # The only manual track is German, so a listing would pick it for English too.
+    bundle = repository.retrieve(video_id, ["en"])
+
+    assert [line.text for line in bundle.transcript] == ["text de"]
+    assert api.list_calls == 1
+    assert [(track.language_code, track.is_generated) for track in repository.list_tracks(video_id)] == [
+        ("de", False),
+        ("de", True),
+    ]
+    assert api.list_calls == 1
+
+
+def test_list_tracks_policies(tmp_path, monkeypatch, capsys):
+    api = StubTrackApi([StubTrack("en", is_translatable=False)])
+    repository = CachedYouTubeTranscriptRepository(tmp_path, StubMetadataGateway(), transcript_api=api, metadata_ttl=60)
+    video_id, missing_id = VideoID("uuuuuuuuuuu"), VideoID("vvvvvvvvvvv")
+
+    assert repository.list_tracks(missing_id, policy="cache-only") is None
+    assert "No cached track list for vvvvvvvvvvv" in capsys.readouterr().err
+    [track] = repository.list_tracks(video_id)
+    assert (track.language, track.is_translatable) == ("EN", False)
+
+    later = time.time() + 120
+    monkeypatch.setattr("ytt.infrastructure.transcript_repository.time.time", lambda: later)
+    assert repository.list_tracks(video_id, policy="cache-only") == [track]
+    assert api.list_calls == 1
+    api.tracks = None
+    assert repository.list_tracks(video_id) == []
+    assert repository.list_tracks(video_id, policy="network-first") == []
+    assert api.list_calls == 3
+
+
+class SlowYouTubeHandler(BaseHTTPRequestHandler):
+    """Serves a watch page and transcript endpoints, each after a delay."""
+
+    delays = {"/watch": 0.6, "/list": 0.3, "/transcript": 0.3}
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        time.sleep(self.delays[path])
+        if path == "/watch":
+            player_response = {"videoDetails": {"title": "Served title", "shortDescription": "Served description"}}
+            body = f"<script>var ytInitialPlayerResponse = {json.dumps(player_response)};</script>"
+        else:
+            body = json.dumps({"text": "served"})
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowYouTubeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class LocalSession(requests.Session):
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def get(self, url, **kwargs):
+        return super().get(url.replace("https://www.youtube.com", self.base_url), **kwargs)
+
+
+class ServedTrack(StubTrack):
+    def __init__(self, base_url):
+        super().__init__("en")
+        self.base_url = base_url
+
+    def fetch(self):
+        text = requests.get(f"{self.base_url}/transcript", timeout=5).json()["text"]
+        return fetched_transcript(text)
+
+
+class ServedTrackApi:
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def list(self, video_id):
+        requests.get(f"{self.base_url}/list", timeout=5).raise_for_status()
+        return [ServedTrack(self.base_url)]
+
+
+def test_cold_fetch_requests_metadata_alongside_the_transcript(tmp_path, slow_server):
+    stats = CacheStatsRecorder()
+    repository = CachedYouTubeTranscriptRepository(
+        tmp_path,
+        YouTubeMetadataGateway(session=LocalSession(slow_server)),
+        transcript_api=ServedTrackApi(slow_server),
+        stats=stats,
+    )
+
+    started = time.perf_counter()
+    bundle = repository.retrieve(VideoID("wwwwwwwwwww"), ["en"])
+    elapsed = time.perf_counter() - started
+
+    assert [line.text for line in bundle.transcript] == ["served"]
+    assert bundle.metadata.title == "Served title"
+    # One after another, the three requests take 1.2 s; the watch page alone takes 0.6 s.
+    assert 0.6 <= elapsed < 0.95
+    counters = stats.counters()
+    assert counters["fetches"] == 2
+    assert counters["fetch_seconds"] < 0.95
+
+
+class OverlapMetadataGateway:
+    """Answers only while the transcript is being listed; ``finished`` is set once it has answered."""
+
+    def __init__(self, overlap, *, delay=0.0):
+        self.overlap = overlap
+        self.delay = delay
+        self.finished = threading.Event()
+
+    def fetch(self, video_id):
+        self.overlap.wait(timeout=5)
+        time.sleep(self.delay)
+        self.finished.set()
+        return VideoMetadata(title="Served title", description="Served description")
+
+
+class FailingTrackApi:
+    """Fails to list tracks, but only while the watch page is being requested."""
+
+    def __init__(self, overlap):
+        self.overlap = overlap
+
+    def list(self, video_id):
+        self.overlap.wait(timeout=5)
+        raise RuntimeError("network down")
+
+
+def test_failed_cold_fetch_waits_for_the_metadata_request(tmp_path):
+    # Each side waits at the barrier for the other, so the listing fails while the watch page is in flight.
+    overlap = threading.Barrier(2)
+    gateway = OverlapMetadataGateway(overlap, delay=0.2)
+    repository = CachedYouTubeTranscriptRepository(tmp_path, gateway, transcript_api=FailingTrackApi(overlap))
+
+    assert repository.retrieve(VideoID("wwwwwwwwwww"), ["en"]) is None
+    assert not overlap.broken
+    # The watch page request did not outlive the retrieval that started it.
+    assert gateway.finished.is_set()
+
+
+class CountingScanStore(FileCacheStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scans = 0
+
+    def entries(self):
+        self.scans += 1
+        return super().entries()
+
+
+def test_writes_under_the_cache_budget_do_not_rescan_the_cache(tmp_path):
+    store = CountingScanStore(tmp_path / "cache")
+    transcripts = [fetched_transcript(f"text {index}") for index in range(3)]
+    repository = CountingRepository(
+        store,
+        StubMetadataGateway(),
+        transcripts=transcripts,
+        max_cache_bytes=1_000_000,
+        eviction=EvictionSchedule(max_bytes=1_000_000, path=tmp_path / "eviction.json"),
+    )
+    for video_id in ("xxxxxxxxxx1", "xxxxxxxxxx2", "xxxxxxxxxx3"):
+        repository.retrieve(VideoID(video_id), ["en"])
+
+    assert store.scans == 1
+
+
+def test_writes_over_the_cache_budget_evict_entries(tmp_path):
+    store = CountingScanStore(tmp_path / "cache")
+    repository = CountingRepository(
+        store,
+        StubMetadataGateway(),
+        transcripts=[fetched_transcript("one"), fetched_transcript("two")],
+        max_cache_bytes=1,
+        eviction=EvictionSchedule(max_bytes=1, path=tmp_path / "eviction.json"),
+    )
+    repository.retrieve(VideoID("yyyyyyyyyy1"), ["en"])
+    repository.retrieve(VideoID("yyyyyyyyyy2"), ["en"])
+
+    assert store.scans == 2
+    assert list(store.entries()) == []
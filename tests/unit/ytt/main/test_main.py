@@ -1,8 +1,10 @@
 import pyperclip
 import pytest
 
+from ytt.domain.value_objects import VideoID
 from ytt.main import _prepare_args
 from ytt.infrastructure import PyperclipClipboardGateway
+from ytt.infrastructure.revalidation import revalidation_command
 
 
 class StubClipboard:
@@ -124,3 +126,96 @@ def test_prepare_args_reports_clipboard_exceptions(capsys, monkeypatch):
 
     assert excinfo.value.code == 1
     assert "Warning: Could not read from clipboard: Mock read error" in capsys.readouterr().err
+
+
+def test_prepare_args_parses_cache_prune_limits():
+    clipboard = StubClipboard("")
+
+    parser, args = _prepare_args(["cache", "prune", "--max-size", "1.5G", "--older-than", "30d"], clipboard)
+
+    assert args.command == "cache"
+    assert args.cache_command == "prune"
+    assert args.max_size == int(1.5 * 1024**3)
+    assert args.older_than == 30 * 86400
+
+
+def test_prepare_args_top_level_partial_refresh_flags_use_clipboard():
+    clipboard = StubClipboard("https://youtu.be/example")
+
+    parser, args = _prepare_args(["--refresh-metadata"], clipboard)
+
+    assert args.command == "fetch"
+    assert args.refresh_metadata is True
+    assert args.refresh_transcript is False
+
+
+def test_prepare_args_parses_cache_warm():
+    clipboard = StubClipboard("")
+
+    parser, args = _prepare_args(["cache", "warm", "-", "--workers", "8"], clipboard)
+
+    assert args.cache_command == "warm"
+    assert args.source == "-"
+    assert args.workers == 8
+
+
+def test_prepare_args_rejects_non_positive_warm_workers(capsys):
+    with pytest.raises(SystemExit):
+        _prepare_args(["cache", "warm", "ids.txt", "--workers", "0"], StubClipboard(""))
+
+    assert "expected a positive integer" in capsys.readouterr().err
+
+
+def test_prepare_args_parses_cache_refresh():
+    parser, args = _prepare_args(
+        ["cache", "refresh", "--older-than", "30d", "--limit", "50", "--rate", "0.5"], StubClipboard("")
+    )
+
+    assert args.cache_command == "refresh"
+    assert args.older_than == 30 * 86400
+    assert (args.workers, args.limit, args.rate) == (4, 50, 0.5)
+
+
+def test_prepare_args_parses_history_and_diff():
+    parser, args = _prepare_args(["history", "aaaaaaaaaaa"], StubClipboard(""))
+    assert (args.command, args.youtube_url) == ("history", "aaaaaaaaaaa")
+
+    parser, args = _prepare_args(["diff", "aaaaaaaaaaa", "--entry", "metadata", "--from", "3"], StubClipboard(""))
+    assert (args.command, args.entry, args.older, args.newer) == ("diff", "metadata", 3, 0)
+
+
+def test_prepare_args_parses_langs():
+    parser, args = _prepare_args(["langs", "aaaaaaaaaaa"], StubClipboard(""))
+    assert (args.command, args.youtube_url, args.json, args.policy) == ("langs", "aaaaaaaaaaa", False, "cache-first")
+
+    parser, args = _prepare_args(["langs", "aaaaaaaaaaa", "--json", "--offline"], StubClipboard(""))
+    assert (args.json, args.policy) == (True, "cache-only")
+
+
+def test_prepare_args_parses_cache_stats_flags():
+    parser, args = _prepare_args(["cache", "stats", "--json", "--reset"], StubClipboard(""))
+
+    assert args.cache_command == "stats"
+    assert args.json is True
+    assert args.reset is True
+
+
+def test_prepare_args_top_level_policy_flags_use_clipboard():
+    clipboard = StubClipboard("https://youtu.be/example")
+
+    _parser, offline = _prepare_args(["--offline"], clipboard)
+    _parser, swr = _prepare_args(["--policy", "stale-while-revalidate", "--no-copy"], clipboard)
+    _parser, default = _prepare_args(["fetch", "https://youtu.be/example"], clipboard)
+
+    assert (offline.command, offline.policy) == ("fetch", "cache-only")
+    assert (swr.command, swr.policy, swr.no_copy) == ("fetch", "stale-while-revalidate", True)
+    assert default.policy == "cache-first"
+
+
+def test_revalidation_fetches_for_the_callers_languages():
+    command = revalidation_command(VideoID("dQw4w9WgXcQ"), ["de", "en"])
+    _parser, args = _prepare_args(command[3:], StubClipboard(""))
+
+    assert (args.command, args.policy, args.languages) == ("fetch", "cache-first", ["de", "en"])
+    assert args.youtube_url == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    assert "--languages" not in revalidation_command(VideoID("dQw4w9WgXcQ"))